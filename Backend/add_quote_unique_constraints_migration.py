@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the unique (quote_request_id, vendor_id)
+keys to the quote_request_vendors and quote_responses tables.
+
+Quote submissions and vendor selections are upserted on these keys, so
+duplicates left behind by earlier concurrent requests are removed first:
+a vendor keeps its accepted response if it has one, else its latest, and
+its earliest selection, marked as responded if any duplicate was. Every
+row removed is first copied, as JSON, to the quote_duplicates_audit table
+together with the id of the row kept in its place.
+
+Run this script before starting the upgraded application; it refuses to
+start while a key is missing. The script only adds missing keys, so it can
+safely be run more than once.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, inspect, text
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(__file__))
+
+from database import engine
+
+# table -> (unique key name, ordering that puts the row to keep first)
+UNIQUE_KEYS = {
+    "quote_request_vendors": ("uq_quote_request_vendor", "sent_date, id"),
+    "quote_responses": (
+        "uq_quote_response_vendor",
+        "CASE WHEN status = 'accepted' THEN 0 ELSE 1 END, submitted_at DESC, id",
+    ),
+}
+
+# Copies of the duplicate rows removed before adding the keys
+quote_duplicates_audit = Table(
+    "quote_duplicates_audit", MetaData(),
+    Column("table_name", String(64), primary_key=True),
+    Column("row_id", String(36), primary_key=True),
+    Column("kept_id", String(36), nullable=False),
+    Column("row_data", Text, nullable=False),
+    Column("removed_at", DateTime, nullable=False),
+)
+
+def _has_unique_key(inspector, table_name, key_name):
+    names = [constraint["name"] for constraint in inspector.get_unique_constraints(table_name)]
+    names += [index["name"] for index in inspector.get_indexes(table_name) if index.get("unique")]
+    return key_name in names
+
+def missing_unique_keys(bind=engine):
+    """Return the existing quote tables that still lack their unique key"""
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    # Tables created later by create_all get the key with them
+    return [
+        table_name for table_name, (key_name, _) in UNIQUE_KEYS.items()
+        if table_name in existing_tables and not _has_unique_key(inspector, table_name, key_name)
+    ]
+
+def _remove_duplicates(connection, table_name, ordering):
+    """Delete all but the first row of each (quote_request_id, vendor_id) pair, auditing the deleted rows"""
+    duplicates = connection.execute(text(
+        f"SELECT quote_request_id, vendor_id FROM {table_name} "
+        f"GROUP BY quote_request_id, vendor_id HAVING COUNT(*) > 1"
+    )).fetchall()
+    removed = 0
+    for quote_request_id, vendor_id in duplicates:
+        pair = {"quote_request_id": quote_request_id, "vendor_id": vendor_id}
+        rows = connection.execute(text(
+            f"SELECT * FROM {table_name} "
+            f"WHERE quote_request_id = :quote_request_id AND vendor_id = :vendor_id ORDER BY {ordering}"
+        ), pair).mappings().all()
+        ids = [row["id"] for row in rows]
+        if table_name == "quote_request_vendors" and any(row["has_responded"] for row in rows):
+            connection.execute(text(
+                "UPDATE quote_request_vendors SET has_responded = :has_responded WHERE id = :id"
+            ), {"has_responded": True, "id": ids[0]})
+        removed_at = datetime.utcnow()
+        connection.execute(quote_duplicates_audit.insert(), [
+            {
+                "table_name": table_name,
+                "row_id": row["id"],
+                "kept_id": ids[0],
+                "row_data": json.dumps(dict(row), default=str),
+                "removed_at": removed_at,
+            }
+            for row in rows[1:]
+        ])
+        for duplicate_id in ids[1:]:
+            connection.execute(text(f"DELETE FROM {table_name} WHERE id = :id"), {"id": duplicate_id})
+        removed += len(ids) - 1
+    if removed:
+        print(f"✅ Removed {removed} duplicate rows from {table_name} (copied to quote_duplicates_audit)")
+
+def migrate_database(bind=engine):
+    """Add the unique key to every quote table that lacks it"""
+    missing = missing_unique_keys(bind)
+    if not missing:
+        return True
+
+    with bind.begin() as connection:
+        quote_duplicates_audit.create(bind=connection, checkfirst=True)
+        for table_name in missing:
+            key_name, ordering = UNIQUE_KEYS[table_name]
+            _remove_duplicates(connection, table_name, ordering)
+            connection.execute(text(f"CREATE UNIQUE INDEX {key_name} ON {table_name} (quote_request_id, vendor_id)"))
+            print(f"✅ Added unique key {key_name} to {table_name}")
+    return True
+
+if __name__ == "__main__":
+    print("Starting database migration...")
+    try:
+        migrate_database()
+        print("\n🎉 Migration completed successfully!")
+    except Exception as e:
+        print(f"\n💥 Migration failed: {e}")
+        sys.exit(1)
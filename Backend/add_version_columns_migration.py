@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the optimistic concurrency version column
+to the complaints, assets and quote_responses tables.
+
+Existing rows start at version 1. The script only adds missing columns, so
+it can safely be run more than once; the application also runs it on
+startup.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(__file__))
+
+from database import engine
+
+VERSIONED_TABLES = ["complaints", "assets", "quote_responses"]
+
+def migrate_database(bind=engine):
+    """Add the version column to every versioned table that lacks it"""
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    with bind.begin() as connection:
+        for table_name in VERSIONED_TABLES:
+            if table_name not in existing_tables:
+                # Created with the column by create_all
+                continue
+            columns = [column["name"] for column in inspector.get_columns(table_name)]
+            if "version" in columns:
+                continue
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+            print(f"✅ Added version column to {table_name}")
+    return True
+
+if __name__ == "__main__":
+    print("Starting database migration...")
+    try:
+        migrate_database()
+        print("\n🎉 Migration completed successfully!")
+    except Exception as e:
+        print(f"\n💥 Migration failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,214 @@
+"""
+Async client for the external AI prediction service.
+
+One httpx.AsyncClient is shared by every request, so connections to the AI
+API are pooled and kept alive instead of being opened per prediction. Calls
+are limited to AI_MAX_CONCURRENCY at a time, and a circuit breaker stops
+calling the service for AI_CIRCUIT_RESET_SECONDS after AI_CIRCUIT_FAILURES
+consecutive failures (timeouts, connection errors, 429 and 5xx responses);
+callers get AIServiceUnavailable immediately and use their fallback.
+
+Completions are cached per asset together with a fingerprint of the asset
+fields and complaint history that went into the prompt. A new or changed
+complaint changes the fingerprint, so the cached completion is replaced on
+the next call; unchanged assets are answered from the cache for
+AI_CACHE_SECONDS.
+
+AI_API_URL points the client at another endpoint, e.g. a local stub server
+in tests.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+import httpx
+
+AI_API_URL = os.getenv("AI_API_URL", "https://api.perplexity.ai/chat/completions")
+AI_API_KEY = os.getenv("PERPLEXITY_API_KEY", "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")
+AI_MODEL = os.getenv("AI_MODEL", "llama-3.1-sonar-small-128k-online")
+
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "30"))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_CIRCUIT_FAILURES = int(os.getenv("AI_CIRCUIT_FAILURES", "5"))
+AI_CIRCUIT_RESET_SECONDS = float(os.getenv("AI_CIRCUIT_RESET_SECONDS", "60"))
+AI_CACHE_SECONDS = int(os.getenv("AI_CACHE_SECONDS", "86400"))
+AI_CACHE_SIZE = 1024
+
+
+class AIServiceUnavailable(Exception):
+    """The AI service could not be reached, timed out, or the circuit is open."""
+
+
+class AIServiceError(Exception):
+    """The AI service rejected the request."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code} - {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` consecutive failures
+    the circuit opens and calls are refused for `reset_seconds`; then one
+    trial call is let through (half-open) and its outcome closes or reopens
+    the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = AI_CIRCUIT_FAILURES, reset_seconds: float = AI_CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of the prompt inputs."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class AIClient:
+    def __init__(
+        self,
+        url: str = AI_API_URL,
+        api_key: str = AI_API_KEY,
+        model: str = AI_MODEL,
+        timeout: float = AI_TIMEOUT_SECONDS,
+        max_concurrency: int = AI_MAX_CONCURRENCY,
+        breaker: Optional[CircuitBreaker] = None,
+        cache_seconds: int = AI_CACHE_SECONDS,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self.cache_seconds = cache_seconds
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # cache key -> (fingerprint, expires at, completion)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_cached(self, cache_key: str, prompt_fingerprint: str) -> Optional[str]:
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            return None
+        cached_fingerprint, expires_at, completion = cached
+        if cached_fingerprint != prompt_fingerprint or expires_at <= time.monotonic():
+            # The inputs changed (e.g. a new complaint) or the entry expired
+            del self._cache[cache_key]
+            return None
+        self._cache.move_to_end(cache_key)
+        return completion
+
+    def set_cached(self, cache_key: str, prompt_fingerprint: str, completion: str):
+        self._cache[cache_key] = (prompt_fingerprint, time.monotonic() + self.cache_seconds, completion)
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > AI_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, cache_key: str):
+        self._cache.pop(cache_key, None)
+
+    async def complete(self, messages: List[dict], max_tokens: int = 300, temperature: float = 0.2, top_p: float = 0.9) -> str:
+        """Send a chat completion request and return the reply text."""
+        if not self.breaker.allow():
+            raise AIServiceUnavailable("AI service circuit is open")
+
+        client = self._get_client()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+        }
+        try:
+            async with self._semaphore:
+                response = await client.post(self.url, json=payload)
+        except httpx.HTTPError as e:
+            self.breaker.record_failure()
+            raise AIServiceUnavailable(str(e) or type(e).__name__) from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+            raise AIServiceUnavailable(f"AI service returned {response.status_code}")
+        if response.status_code != 200:
+            # The service is up; the request itself was rejected
+            self.breaker.record_success()
+            raise AIServiceError(response.status_code, response.text)
+
+        self.breaker.record_success()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def cached_complete(self, cache_key: str, prompt_inputs: Any, messages: List[dict], **options) -> tuple:
+        """
+        complete() with the per-key cache. Returns (completion, cached), where
+        `cached` tells whether the completion came from the cache.
+        """
+        prompt_fingerprint = fingerprint(prompt_inputs, messages, self.model)
+        completion = self.get_cached(cache_key, prompt_fingerprint)
+        if completion is not None:
+            return completion, True
+
+        completion = await self.complete(messages, **options)
+        self.set_cached(cache_key, prompt_fingerprint, completion)
+        return completion, False
+
+
+# Shared by the app; closed on shutdown
+ai_client = AIClient()
@@ -0,0 +1,191 @@
+"""
+Asset analytics computed in SQL.
+
+All aggregation happens in the database: grouped counts and cost totals with
+GROUP BY, age and warranty buckets with conditional sums in a single pass,
+and an optional purchase-date time series bucketed by month, quarter or year.
+The application only ever holds the aggregated rows, so memory and
+serialization cost do not grow with the fleet.
+
+Results are cached in-process for ANALYTICS_CACHE_SECONDS. Cache keys include
+the assets table version (see change_tracking), so any committed asset change
+invalidates cached results immediately; the TTL only bounds how long
+unchanged results are kept.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, String, case, cast, func
+from sqlalchemy.orm import Session
+
+from models import Asset
+
+ANALYTICS_CACHE_SECONDS = int(os.getenv("ANALYTICS_CACHE_SECONDS", "60"))
+ANALYTICS_CACHE_SIZE = 128
+
+# ?group_by= -> grouped column
+GROUP_COLUMNS = {
+    "status": Asset.status,
+    "type": Asset.type,
+    "condition": Asset.condition,
+    "vendor": Asset.vendor_id,
+    "assigned_to": Asset.assigned_to_id,
+}
+
+TIME_BUCKETS = ("month", "quarter", "year")
+
+# (label, lower bound in days, upper bound in days) of each bucket
+AGE_BUCKETS = [
+    ("under_1_year", 0, 365),
+    ("1_to_3_years", 365, 3 * 365),
+    ("3_to_5_years", 3 * 365, 5 * 365),
+    ("over_5_years", 5 * 365, None),
+]
+WARRANTY_BUCKETS = [
+    ("within_30_days", 0, 30),
+    ("within_90_days", 30, 90),
+    ("within_1_year", 90, 365),
+    ("over_1_year", 365, None),
+]
+
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+
+def validate_params(group_by: str, bucket: Optional[str]):
+    if group_by not in GROUP_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must be one of: {', '.join(GROUP_COLUMNS)}"
+        )
+    if bucket is not None and bucket not in TIME_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"bucket must be one of: {', '.join(TIME_BUCKETS)}"
+        )
+
+
+def _period(dialect: str, bucket: str):
+    """SQL expression labelling purchase_date with its month / quarter / year."""
+    column = Asset.purchase_date
+    if dialect == "mysql":
+        if bucket == "month":
+            return func.date_format(column, "%Y-%m")
+        if bucket == "quarter":
+            return func.concat(func.year(column), "-Q", func.quarter(column))
+        return func.date_format(column, "%Y")
+
+    if bucket == "month":
+        return func.strftime("%Y-%m", column)
+    if bucket == "quarter":
+        quarter = (cast(func.strftime("%m", column), Integer) + 2) // 3
+        return func.strftime("%Y", column).concat("-Q").concat(cast(quarter, String))
+    return func.strftime("%Y", column)
+
+
+def _bucket_sums(column, buckets, now: datetime, past: bool) -> list:
+    """
+    One SUM(CASE ...) per bucket. For past dates (age) the bounds count days
+    back from now; for future dates (warranty) they count days ahead.
+    """
+    sums = []
+    for label, lower_days, upper_days in buckets:
+        conditions = []
+        if past:
+            conditions.append(column <= now - timedelta(days=lower_days))
+            if upper_days is not None:
+                conditions.append(column > now - timedelta(days=upper_days))
+        else:
+            conditions.append(column > now + timedelta(days=lower_days))
+            if upper_days is not None:
+                conditions.append(column <= now + timedelta(days=upper_days))
+        condition = conditions[0] if len(conditions) == 1 else conditions[0] & conditions[1]
+        sums.append(func.sum(case((condition, 1), else_=0)).label(label))
+    return sums
+
+
+def compute_analytics(db: Session, group_by: str = "status", bucket: Optional[str] = None) -> dict:
+    now = datetime.utcnow()
+
+    # 1. Fleet totals, age buckets and warranty buckets in one pass
+    summary = db.query(
+        func.count(Asset.id).label("count"),
+        func.coalesce(func.sum(Asset.purchase_cost), 0).label("total_purchase_cost"),
+        func.avg(Asset.purchase_cost).label("average_purchase_cost"),
+        func.coalesce(func.sum(Asset.total_repair_cost), 0).label("total_repair_cost"),
+        func.sum(case((Asset.warranty_expiry.is_(None), 1), else_=0)).label("warranty_none"),
+        func.sum(case((Asset.warranty_expiry <= now, 1), else_=0)).label("warranty_expired"),
+        *_bucket_sums(Asset.purchase_date, AGE_BUCKETS, now, past=True),
+        *_bucket_sums(Asset.warranty_expiry, WARRANTY_BUCKETS, now, past=False),
+    ).one()._mapping
+
+    # 2. Counts and costs per group
+    group_column = GROUP_COLUMNS[group_by]
+    groups = db.query(
+        group_column.label("key"),
+        func.count(Asset.id).label("count"),
+        func.coalesce(func.sum(Asset.purchase_cost), 0).label("total_purchase_cost"),
+        func.avg(Asset.purchase_cost).label("average_purchase_cost"),
+        func.coalesce(func.sum(Asset.total_repair_cost), 0).label("total_repair_cost"),
+    ).group_by(group_column).order_by(func.count(Asset.id).desc()).all()
+
+    result = {
+        "total": summary["count"],
+        "total_purchase_cost": float(summary["total_purchase_cost"]),
+        "average_purchase_cost": float(summary["average_purchase_cost"] or 0),
+        "total_repair_cost": float(summary["total_repair_cost"]),
+        "group_by": group_by,
+        "groups": [
+            {
+                "key": row.key,
+                "count": row.count,
+                "total_purchase_cost": float(row.total_purchase_cost),
+                "average_purchase_cost": float(row.average_purchase_cost or 0),
+                "total_repair_cost": float(row.total_repair_cost),
+            }
+            for row in groups
+        ],
+        "age_buckets": {label: int(summary[label] or 0) for label, _, _ in AGE_BUCKETS},
+        "warranty_buckets": {
+            "none": int(summary["warranty_none"] or 0),
+            "expired": int(summary["warranty_expired"] or 0),
+            **{label: int(summary[label] or 0) for label, _, _ in WARRANTY_BUCKETS},
+        },
+    }
+
+    # 3. Optional purchase-date time series
+    if bucket is not None:
+        period = _period(db.get_bind().dialect.name, bucket).label("period")
+        series = db.query(
+            period,
+            func.count(Asset.id).label("count"),
+            func.coalesce(func.sum(Asset.purchase_cost), 0).label("total_purchase_cost"),
+        ).filter(Asset.purchase_date.isnot(None)).group_by(period).order_by(period).all()
+        result["bucket"] = bucket
+        result["purchases"] = [
+            {"period": row.period, "count": row.count, "total_purchase_cost": float(row.total_purchase_cost)}
+            for row in series
+        ]
+
+    result["generated_at"] = now.isoformat()
+    return result
+
+
+def get_analytics(db: Session, version_key: str, group_by: str = "status", bucket: Optional[str] = None) -> dict:
+    """Cached compute_analytics; `version_key` changes whenever assets change."""
+    cache_key = (version_key, group_by, bucket)
+    cached = _cache.get(cache_key)
+    if cached is not None and cached[0] > time.monotonic():
+        _cache.move_to_end(cache_key)
+        return cached[1]
+
+    result = compute_analytics(db, group_by, bucket)
+    _cache[cache_key] = (time.monotonic() + ANALYTICS_CACHE_SECONDS, result)
+    _cache.move_to_end(cache_key)
+    while len(_cache) > ANALYTICS_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
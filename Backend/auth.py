@@ -2,11 +2,12 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import User
+import complaint_events
 import os
 from dotenv import load_dotenv
 
@@ -61,7 +62,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 # Get current user
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    # Sub-requests of a /batch call run as the user the batch was authenticated as
+    batch_user = getattr(request.state, "batch_user", None)
+    if batch_user is not None:
+        complaint_events.set_actor(batch_user)
+        return batch_user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -83,6 +90,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     user.last_login = datetime.utcnow()
     db.commit()
     
+    # Complaint workflow events written during this request are attributed to the user
+    complaint_events.set_actor(user)
     return user
 
 # Check if user is active
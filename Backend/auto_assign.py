@@ -0,0 +1,334 @@
+"""
+Workload-aware automatic complaint assignment.
+
+New complaints are assigned to an active ATS agent as they are filed. Each
+agent's load is the priority-weighted count of the active complaints
+assigned to them (critical 4, high 3, medium 2, low 1). A complaint about an
+asset goes to the least loaded agent, except that agents who have handled
+that asset type before get up to AUTO_ASSIGN_AFFINITY_BONUS load units of
+credit, so a specialist is preferred while not much busier than the rest.
+Critical complaints ignore affinity and go to whoever is least loaded.
+
+The loads live in memory in a WorkloadBalancer: one min-heap of agents by
+load, plus one heap per asset type holding the agents with affinity for it,
+keyed by load minus their affinity credit. Picking an agent looks at the top
+of at most two heaps, and a load change pushes a fresh entry (stale ones
+are skipped when they reach the top), so an assignment is O(log agents).
+
+Session listeners keep the loads in step with complaint changes committed
+in this process (reassignment, status and priority changes, including bulk
+updates, whose rows are compared before and after the statement, or with
+the values it sets when those are plain values). The balancer
+is rebuilt from the database every AUTO_ASSIGN_RECONCILE_SECONDS, which
+also picks up other processes and new or deactivated agents.
+
+Every assignment is recorded in complaint_assignments with the agent's load
+and affinity at the time, for audit.
+"""
+
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+import fast_updates
+from models import Asset, Complaint, ComplaintAssignment, User
+
+AUTO_ASSIGN_ENABLED = os.getenv("AUTO_ASSIGN_ENABLED", "true").lower() == "true"
+AUTO_ASSIGN_RECONCILE_SECONDS = int(os.getenv("AUTO_ASSIGN_RECONCILE_SECONDS", "300"))
+AUTO_ASSIGN_AFFINITY_BONUS = float(os.getenv("AUTO_ASSIGN_AFFINITY_BONUS", "4"))
+# Complaints on an asset type after which an agent counts as a full specialist
+AUTO_ASSIGN_AFFINITY_SATURATION = 10
+AUTO_ASSIGN_AFFINITY_DAYS = 365
+
+PRIORITY_WEIGHTS = {"critical": 4, "high": 3, "medium": 2, "low": 1}
+DEFAULT_PRIORITY_WEIGHT = 2
+
+# Complaints that still need work from the ATS agent they are assigned to
+ACTIVE_STATUSES = ["open", "submitted", "in_progress"]
+
+# Complaint columns an agent's load depends on
+LOAD_COLUMNS = ("assigned_to", "status", "priority")
+
+
+def priority_weight(priority: Optional[str]) -> int:
+    return PRIORITY_WEIGHTS.get((priority or "").lower(), DEFAULT_PRIORITY_WEIGHT)
+
+
+class WorkloadBalancer:
+    def __init__(self, loads: Dict[str, float], counts: Dict[str, int], affinity: Dict[str, Dict[str, float]]):
+        self.loads = dict(loads)
+        self.counts = dict(counts)
+        # agent -> {asset type: 0..1}
+        self.affinity = affinity
+        self._versions = {agent_id: 0 for agent_id in self.loads}
+        self._heap: List[tuple] = []
+        self._type_heaps: Dict[str, List[tuple]] = defaultdict(list)
+        self._rebuild_heaps()
+
+    def _rebuild_heaps(self):
+        self._heap = [(load, agent_id, self._versions[agent_id]) for agent_id, load in self.loads.items()]
+        heapq.heapify(self._heap)
+        self._type_heaps = defaultdict(list)
+        for agent_id, types in self.affinity.items():
+            for asset_type in types:
+                self._type_heaps[asset_type].append(self._type_entry(agent_id, asset_type))
+        for heap in self._type_heaps.values():
+            heapq.heapify(heap)
+
+    def _type_entry(self, agent_id: str, asset_type: str) -> tuple:
+        credit = AUTO_ASSIGN_AFFINITY_BONUS * self.affinity[agent_id][asset_type]
+        return (self.loads[agent_id] - credit, agent_id, self._versions[agent_id])
+
+    def _top(self, heap: List[tuple]) -> Optional[tuple]:
+        # Entries pushed before an agent's last load change are stale
+        while heap and heap[0][2] != self._versions.get(heap[0][1]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def pick(self, asset_type: Optional[str] = None, priority: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """(agent id, reason) of the agent to assign to, or None without agents."""
+        least_loaded = self._top(self._heap)
+        if least_loaded is None:
+            return None
+        if not asset_type or (priority or "").lower() == "critical" or asset_type not in self._type_heaps:
+            return least_loaded[1], "least_loaded"
+        specialist = self._top(self._type_heaps[asset_type])
+        if specialist is not None and specialist[0] < least_loaded[0]:
+            return specialist[1], "asset_type_affinity"
+        return least_loaded[1], "least_loaded"
+
+    def add_load(self, agent_id: Optional[str], weight: float, count: int):
+        if agent_id not in self.loads:
+            return
+        self.loads[agent_id] += weight
+        self.counts[agent_id] += count
+        self._versions[agent_id] += 1
+        heapq.heappush(self._heap, (self.loads[agent_id], agent_id, self._versions[agent_id]))
+        for asset_type in self.affinity.get(agent_id, ()):
+            heapq.heappush(self._type_heaps[asset_type], self._type_entry(agent_id, asset_type))
+        # Drop the stale entries once they outnumber the live ones
+        if len(self._heap) > 4 * len(self.loads):
+            self._rebuild_heaps()
+
+
+def load_balancer(db: Session) -> WorkloadBalancer:
+    """Build a balancer from the current assignments and assignment history."""
+    agent_ids = [
+        agent_id for agent_id, in
+        db.query(User.id).filter(User.role == "ats", User.is_active == True).all()
+    ]
+    loads = {agent_id: 0.0 for agent_id in agent_ids}
+    counts = {agent_id: 0 for agent_id in agent_ids}
+    affinity: Dict[str, Dict[str, float]] = {}
+    if not agent_ids:
+        return WorkloadBalancer(loads, counts, affinity)
+
+    active = db.query(Complaint.assigned_to, Complaint.priority, func.count(Complaint.id))\
+        .filter(Complaint.assigned_to.in_(agent_ids), Complaint.status.in_(ACTIVE_STATUSES))\
+        .group_by(Complaint.assigned_to, Complaint.priority)
+    for agent_id, priority, count in active:
+        loads[agent_id] += priority_weight(priority) * count
+        counts[agent_id] += count
+
+    since = datetime.utcnow() - timedelta(days=AUTO_ASSIGN_AFFINITY_DAYS)
+    history = db.query(Complaint.assigned_to, Asset.type, func.count(Complaint.id))\
+        .join(Asset, Complaint.asset_id == Asset.id)\
+        .filter(Complaint.assigned_to.in_(agent_ids), Complaint.date_submitted >= since)\
+        .group_by(Complaint.assigned_to, Asset.type)
+    for agent_id, asset_type, count in history:
+        affinity.setdefault(agent_id, {})[asset_type] = min(1.0, count / AUTO_ASSIGN_AFFINITY_SATURATION)
+    return WorkloadBalancer(loads, counts, affinity)
+
+
+_lock = threading.Lock()
+_balancer: Optional[WorkloadBalancer] = None
+_reconciled_at = 0.0
+
+
+def get_balancer(db: Session, reconcile: bool = False) -> WorkloadBalancer:
+    """The shared balancer, rebuilt from the database when it is due."""
+    global _balancer, _reconciled_at
+    with _lock:
+        if reconcile or _balancer is None or time.monotonic() - _reconciled_at >= AUTO_ASSIGN_RECONCILE_SECONDS:
+            _balancer = load_balancer(db)
+            _reconciled_at = time.monotonic()
+        return _balancer
+
+
+def _contribution(agent_id, status, priority) -> Optional[Tuple[str, int]]:
+    if agent_id is None or status not in ACTIVE_STATUSES:
+        return None
+    return agent_id, priority_weight(priority)
+
+
+def _previous(state, key):
+    history = getattr(state.attrs, key).history
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return None
+    return getattr(state.object, key)
+
+
+def _queue_delta(deltas: list, before, after):
+    if before != after:
+        if before:
+            deltas.append((before[0], -before[1], -1))
+        if after:
+            deltas.append((after[0], after[1], 1))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_load_changes(session, flush_context):
+    if _balancer is None:
+        return
+    reserved = session.info.get("auto_assign_reserved", {})
+    deltas = session.info.setdefault("auto_assign_deltas", [])
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Complaint) or obj.id in reserved:
+            continue
+        state = inspect(obj)
+        if obj in session.new:
+            before = None
+        else:
+            if obj in session.dirty and not any(
+                getattr(state.attrs, key).history.has_changes() for key in LOAD_COLUMNS
+            ):
+                continue
+            before = _contribution(_previous(state, "assigned_to"), _previous(state, "status"), _previous(state, "priority"))
+        after = None if obj in session.deleted else _contribution(obj.assigned_to, obj.status, obj.priority)
+        _queue_delta(deltas, before, after)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_load_changes(orm_execute_state):
+    """Remember the contribution of rows a bulk update is about to change."""
+    if _balancer is None or not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    statement = orm_execute_state.statement
+    if statement.table.name != Complaint.__tablename__:
+        return
+    values = fast_updates.statement_values(statement)
+    if orm_execute_state.is_update and not any(key in values for key in LOAD_COLUMNS):
+        return
+    # Plain values give the contribution after the statement without reading the rows again
+    known_after = orm_execute_state.is_delete or not any(
+        fast_updates.is_expression(values[key]) for key in LOAD_COLUMNS if key in values
+    )
+    session = orm_execute_state.session
+    before = session.info.setdefault("auto_assign_bulk_before", {})
+    deltas = session.info.setdefault("auto_assign_deltas", [])
+    for row in fast_updates.affected_rows(orm_execute_state):
+        contribution = _contribution(row["assigned_to"], row["status"], row["priority"])
+        if not known_after or row["id"] in before:
+            before.setdefault(row["id"], contribution)
+        elif orm_execute_state.is_delete:
+            _queue_delta(deltas, contribution, None)
+        else:
+            row = {**row, **{key: values[key] for key in LOAD_COLUMNS if key in values}}
+            _queue_delta(deltas, contribution, _contribution(row["assigned_to"], row["status"], row["priority"]))
+
+
+@event.listens_for(Session, "before_commit")
+def _collect_bulk_results(session):
+    before = session.info.pop("auto_assign_bulk_before", None)
+    if not before:
+        return
+    after = {
+        complaint_id: _contribution(agent_id, status, priority)
+        for complaint_id, agent_id, status, priority in session.execute(
+            select(Complaint.id, Complaint.assigned_to, Complaint.status, Complaint.priority)
+            .where(Complaint.id.in_(list(before)))
+        )
+    }
+    deltas = session.info.setdefault("auto_assign_deltas", [])
+    for complaint_id, contribution in before.items():
+        _queue_delta(deltas, contribution, after.get(complaint_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_load_changes(session):
+    session.info.pop("auto_assign_reserved", None)
+    deltas = session.info.pop("auto_assign_deltas", None)
+    if deltas and _balancer is not None:
+        with _lock:
+            for agent_id, weight, count in deltas:
+                _balancer.add_load(agent_id, weight, count)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_load_changes(session):
+    session.info.pop("auto_assign_deltas", None)
+    session.info.pop("auto_assign_bulk_before", None)
+    reserved = session.info.pop("auto_assign_reserved", None)
+    if reserved and _balancer is not None:
+        with _lock:
+            for agent_id, weight in reserved.values():
+                _balancer.add_load(agent_id, -weight, -1)
+
+
+def assign_new_complaint(db: Session, complaint: Complaint) -> Optional[ComplaintAssignment]:
+    """Assign an unassigned complaint to an ATS agent and record the decision."""
+    if not AUTO_ASSIGN_ENABLED or complaint.assigned_to:
+        return None
+    balancer = get_balancer(db)
+    asset_type = complaint.asset.type if complaint.asset_id and complaint.asset else None
+    weight = priority_weight(complaint.priority)
+    with _lock:
+        choice = balancer.pick(asset_type, complaint.priority)
+        if choice is None:
+            return None
+        agent_id, reason = choice
+        agent_load = balancer.loads[agent_id]
+        # Reserve the load now so concurrent assignments see it
+        balancer.add_load(agent_id, weight, 1)
+    db.info.setdefault("auto_assign_reserved", {})[complaint.id] = (agent_id, weight)
+
+    assignment = ComplaintAssignment(
+        complaint_id=complaint.id,
+        agent_id=agent_id,
+        priority=complaint.priority,
+        asset_type=asset_type,
+        agent_load=agent_load,
+        affinity=balancer.affinity.get(agent_id, {}).get(asset_type, 0.0) if asset_type else 0.0,
+        reason=reason,
+        created_at=datetime.utcnow(),
+    )
+    complaint.assigned_to = agent_id
+    db.add(assignment)
+    db.commit()
+    db.refresh(complaint)
+    return assignment
+
+
+def get_workload(db: Session) -> List[dict]:
+    """Current load of every agent, least loaded first"""
+    balancer = get_balancer(db)
+    with _lock:
+        return [
+            {"agent_id": agent_id, "load": load, "active_complaints": balancer.counts[agent_id]}
+            for agent_id, load in sorted(balancer.loads.items(), key=lambda item: (item[1], item[0]))
+        ]
+
+
+def get_assignments(
+    db: Session,
+    complaint_id: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[ComplaintAssignment]:
+    query = db.query(ComplaintAssignment)
+    if complaint_id:
+        query = query.filter(ComplaintAssignment.complaint_id == complaint_id)
+    if agent_id:
+        query = query.filter(ComplaintAssignment.agent_id == agent_id)
+    return query.order_by(ComplaintAssignment.created_at.desc(), ComplaintAssignment.id.desc()).offset(skip).limit(limit).all()
@@ -0,0 +1,157 @@
+"""
+Multiplexed batch API: run several GET sub-requests in one HTTP request.
+
+POST /batch takes a list of sub-requests against the existing routes and
+dispatches them one after another through the app itself, in-process. The
+caller is authenticated once for the whole batch: each sub-request carries
+the authenticated user in its ASGI scope state, so get_current_user reuses it
+instead of decoding the JWT and loading the user again. Each sub-request gets
+its own DB session from get_db, so one that fails or is cut off cannot leave
+a broken session behind for the others.
+
+The endpoints run their queries synchronously on the event loop, so running
+sub-requests concurrently would not overlap them and a running query cannot
+be interrupted. BATCH_TIMEOUT_SECONDS is therefore checked between
+sub-requests (and whenever a sub-request awaits): once it runs out, the
+remaining sub-requests are reported as 504 without being run, but a slow
+sub-request that has already started is allowed to finish.
+
+Only GET sub-requests are accepted; writes would need their own transaction
+and ordering guarantees, so they keep going through their own endpoints.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import HTTPException, Request, status
+from starlette.types import Message
+
+from models import User
+
+MAX_BATCH_REQUESTS = int(os.getenv("MAX_BATCH_REQUESTS", "20"))
+BATCH_TIMEOUT_SECONDS = float(os.getenv("BATCH_TIMEOUT_SECONDS", "10"))
+
+BATCH_PATH = "/batch"
+ALLOWED_METHODS = ("GET",)
+
+# Headers a sub-request may set; authentication always comes from the batch
+FORWARDED_HEADERS = ("accept", "if-none-match", "if-modified-since")
+
+
+def validate_batch(sub_requests: list):
+    """Reject empty or oversized batches as a whole."""
+    if not sub_requests:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Batch contains no requests")
+    if len(sub_requests) > MAX_BATCH_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {MAX_BATCH_REQUESTS} requests"
+        )
+
+
+def error_result(request_id: Optional[str], status_code: int, detail: str) -> dict:
+    return {"id": request_id, "status": status_code, "headers": {}, "body": {"detail": detail}}
+
+
+def _build_scope(parent: Request, path: str, headers: Dict[str, str], user: User) -> dict:
+    url = urlsplit(path)
+    raw_headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in headers.items()
+        if name.lower() in FORWARDED_HEADERS
+    ]
+    authorization = parent.headers.get("authorization")
+    if authorization:
+        raw_headers.append((b"authorization", authorization.encode("latin-1")))
+
+    return {
+        "type": "http",
+        "asgi": parent.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": parent.url.scheme,
+        "server": parent.scope.get("server"),
+        "client": parent.scope.get("client"),
+        "root_path": parent.scope.get("root_path", ""),
+        "path": url.path,
+        "raw_path": url.path.encode("latin-1"),
+        "query_string": url.query.encode("latin-1"),
+        "headers": raw_headers,
+        # Picked up by get_current_user in place of its usual work
+        "state": {"batch_user": user},
+    }
+
+
+def _decode_body(headers: Dict[str, str], body: bytes) -> Any:
+    if not body:
+        return None
+    if headers.get("content-type", "").startswith("application/json"):
+        return json.loads(body)
+    return body.decode("utf-8", errors="replace")
+
+
+async def dispatch(parent: Request, sub_request, user: User) -> dict:
+    """Run one sub-request through the app and capture its response."""
+    method = sub_request.method.upper()
+    if method not in ALLOWED_METHODS:
+        return error_result(sub_request.id, status.HTTP_405_METHOD_NOT_ALLOWED, "Only GET requests can be batched")
+    if not sub_request.path.startswith("/") or urlsplit(sub_request.path).path.rstrip("/") == BATCH_PATH:
+        return error_result(sub_request.id, status.HTTP_400_BAD_REQUEST, f"Invalid path: {sub_request.path}")
+
+    scope = _build_scope(parent, sub_request.path, sub_request.headers or {}, user)
+    start: Message = {}
+    chunks: List[bytes] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message):
+        nonlocal start
+        if message["type"] == "http.response.start":
+            start = message
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await parent.app(scope, receive, send)
+    except Exception as exc:
+        # The error middleware has already produced the 500 response
+        if not start:
+            return error_result(sub_request.id, status.HTTP_500_INTERNAL_SERVER_ERROR, str(exc))
+
+    headers = {
+        name.decode("latin-1"): value.decode("latin-1")
+        for name, value in start.get("headers", [])
+        if name.lower() != b"content-length"
+    }
+    return {
+        "id": sub_request.id,
+        "status": start.get("status", status.HTTP_500_INTERNAL_SERVER_ERROR),
+        "headers": headers,
+        "body": _decode_body(headers, b"".join(chunks)),
+    }
+
+
+async def run_batch(parent: Request, sub_requests: list, user: User) -> List[dict]:
+    """
+    Dispatch the sub-requests in order. Sub-requests not finished or not yet
+    started when BATCH_TIMEOUT_SECONDS runs out are reported as 504; the limit
+    is only checked between sub-requests and while a sub-request awaits.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + BATCH_TIMEOUT_SECONDS
+
+    results = []
+    for sub_request in sub_requests:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            results.append(error_result(sub_request.id, status.HTTP_504_GATEWAY_TIMEOUT, "Batch time limit exceeded"))
+            continue
+        try:
+            results.append(await asyncio.wait_for(dispatch(parent, sub_request, user), remaining))
+        except asyncio.TimeoutError:
+            results.append(error_result(sub_request.id, status.HTTP_504_GATEWAY_TIMEOUT, "Batch time limit exceeded"))
+    return results
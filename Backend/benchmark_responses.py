@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the fast response path.
+
+Builds 100 and 1000 row pages of complaints and assets in an in-memory
+SQLite database and compares:
+- serialization time of the standard FastAPI path (per-item model
+  validation + json.dumps) against the precompiled TypeAdapter path,
+- bytes on the wire uncompressed, gzipped and (if installed) brotli.
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(__file__))
+
+from database import Base
+import models
+import schemas
+import fast_responses
+
+PAGE_SIZES = [100, 1000]
+REPEATS = 20
+
+
+def seed(db, rows):
+    """Insert `rows` complaints, each with an asset, two images and a reply."""
+    employee = models.Employee(
+        name="Benchmark User", email="bench@company.com",
+        department="IT", role="Engineer", location="HQ"
+    )
+    user = models.User(email="bench@company.com", password="x", role="employee")
+    db.add_all([employee, user])
+    db.flush()
+
+    now = datetime.utcnow()
+    for i in range(rows):
+        asset = models.Asset(
+            name=f"Laptop {i}", type="Laptop", status="assigned",
+            serial_number=f"SN-{i:06d}", condition="good",
+            specifications="16GB RAM, 512GB SSD, 14 inch display",
+            purchase_cost=1200.0 + i, purchase_date=now - timedelta(days=i),
+            expected_lifespan=4, total_repair_cost=35.5,
+            assigned_to_id=employee.id, assigned_date=now
+        )
+        db.add(asset)
+        db.flush()
+
+        complaint = models.Complaint(
+            employee_id=employee.id, asset_id=asset.id,
+            title=f"Screen flickers on laptop {i}",
+            description="The screen flickers every few minutes when connected to the docking station.",
+            priority="medium", status="open",
+            image_records=[
+                models.ComplaintImage(path=f"uploads/complaint_images/{i}-{n}.jpg", position=n)
+                for n in range(2)
+            ]
+        )
+        db.add(complaint)
+        db.flush()
+        db.add(models.Reply(complaint_id=complaint.id, user_id=user.id, from_user="ATS", message="Looking into it."))
+
+    db.commit()
+
+
+def standard_serialize(schema, rows):
+    """What FastAPI does for response_model=List[schema] with JSONResponse."""
+    content = [schema.model_validate(row).model_dump(mode="json") for row in rows]
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def time_it(func):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = func()
+    return (time.perf_counter() - start) / REPEATS * 1000, result
+
+
+def wire_sizes(body):
+    sizes = {"raw": len(body), "gzip": len(gzip.compress(body, compresslevel=fast_responses.GZIP_LEVEL))}
+    if fast_responses.brotli is not None:
+        sizes["br"] = len(fast_responses.brotli.compress(body, quality=fast_responses.BROTLI_QUALITY))
+    return sizes
+
+
+def run_benchmark():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, max(PAGE_SIZES))
+
+    cases = [
+        ("complaints", models.Complaint, schemas.ComplaintResponse, fast_responses.complaint_list_adapter),
+        ("assets", models.Asset, schemas.AssetResponse, fast_responses.asset_list_adapter),
+    ]
+
+    for name, model, schema, adapter in cases:
+        for page_size in PAGE_SIZES:
+            rows = db.query(model).limit(page_size).all()
+            # Touch relationships up front so both paths measure serialization only
+            standard_serialize(schema, rows)
+
+            standard_ms, standard_body = time_it(lambda: standard_serialize(schema, rows))
+            fast_ms, fast_body = time_it(lambda: fast_responses.serialize_list(adapter, rows))
+
+            if json.loads(standard_body) != json.loads(fast_body):
+                print(f"❌ {name}: fast path output differs from the standard path")
+
+            sizes = wire_sizes(fast_body)
+            print(f"📊 {name} x{page_size}")
+            print(f"   standard: {standard_ms:8.2f} ms")
+            print(f"   fast:     {fast_ms:8.2f} ms ({standard_ms / fast_ms:.1f}x)")
+            print("   bytes:    " + ", ".join(f"{k}={v:,}" for k, v in sizes.items()))
+
+    db.close()
+
+
+if __name__ == "__main__":
+    print("⏱️  Response serialization benchmark")
+    print("=" * 50)
+    if fast_responses.brotli is None:
+        print("ℹ️  brotli not installed - reporting gzip only")
+    run_benchmark()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the single-statement update paths.
+
+Seeds an in-memory SQLite database and runs update_complaint,
+update_asset, mark_notification_read and review_quote_response once per
+session (as a request would) with FAST_UPDATES off and on, reporting the
+SQL statements each call sends to the database, including those written
+by the change tracking, counter, workflow and queue listeners, and the
+time per call. Every statement is a round trip to a networked database.
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(__file__))
+
+from database import Base
+import models
+import crud
+import fast_updates
+
+REPEATS = 200
+
+
+def seed(db):
+    employee = models.Employee(
+        name="Benchmark User", email="bench@company.com",
+        department="IT", role="Engineer", location="HQ"
+    )
+    user = models.User(email="bench@company.com", password="x", role="manager")
+    vendor = models.Vendor(name="Bench Vendor", email="vendor@bench.com", phone="555", service_type="Hardware")
+    db.add_all([employee, user, vendor])
+    db.flush()
+
+    now = datetime.utcnow()
+    asset = models.Asset(
+        name="Laptop", type="Laptop", status="assigned", serial_number="SN-000001",
+        condition="good", purchase_cost=1200.0, purchase_date=now, expected_lifespan=4,
+        assigned_to_id=employee.id, assigned_date=now
+    )
+    db.add(asset)
+    db.flush()
+    complaint = models.Complaint(
+        employee_id=employee.id, asset_id=asset.id, title="Screen flickers",
+        description="The screen flickers every few minutes.", priority="medium", status="open"
+    )
+    # One unread notification per call and path
+    notifications = [
+        models.Notification(user_id=user.id, message=f"Benchmark {i}", type="Complaint")
+        for i in range(REPEATS * 2)
+    ]
+    quote_request = models.QuoteRequest(title="Docking stations", description="Ten docks", created_by_id=user.id)
+    db.add_all([complaint, quote_request, *notifications])
+    db.flush()
+    quote_response = models.QuoteResponse(
+        quote_request_id=quote_request.id, vendor_id=vendor.id, quote_amount=900.0, description="Ten docks"
+    )
+    db.add(quote_response)
+    db.commit()
+    return {
+        "user": user.id, "complaint": complaint.id, "asset": asset.id,
+        "notifications": [notification.id for notification in notifications],
+        "quote_response": quote_response.id,
+    }
+
+
+def cases(ids):
+    statuses = ["in_progress", "open"]
+    conditions = ["fair", "good"]
+    return [
+        ("update_complaint (title)", lambda db, i: crud.update_complaint(db, ids["complaint"], title=f"Screen flickers {i}")),
+        ("update_complaint (status)", lambda db, i: crud.update_complaint(db, ids["complaint"], status=statuses[i % 2])),
+        ("update_asset", lambda db, i: crud.update_asset(db, ids["asset"], condition=conditions[i % 2])),
+        ("mark_notification_read", lambda db, i: crud.mark_notification_read(db, ids["notifications"].pop())),
+        ("review_quote_response", lambda db, i: crud.review_quote_response(
+            db, ids["quote_response"], "accepted", "Benchmark", ids["user"]
+        )),
+    ]
+
+
+def run_case(session_factory, statements, update):
+    """Average statements and milliseconds per call, one session per call"""
+    statements.clear()
+    start = time.perf_counter()
+    for i in range(REPEATS):
+        db = session_factory()
+        try:
+            update(db, i)
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - start
+    return len(statements) / REPEATS, elapsed / REPEATS * 1000
+
+
+def run_benchmark():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+    ids = seed(db)
+    db.close()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    for name, update in cases(ids):
+        results = {}
+        for enabled in (False, True):
+            fast_updates.FAST_UPDATES_ENABLED = enabled
+            results[enabled] = run_case(session_factory, statements, update)
+        (orm_statements, orm_ms), (fast_statements, fast_ms) = results[False], results[True]
+        print(f"📊 {name}")
+        print(f"   read-modify-write: {orm_statements:5.1f} statements, {orm_ms:6.2f} ms")
+        print(f"   single statement:  {fast_statements:5.1f} statements, {fast_ms:6.2f} ms "
+              f"({orm_statements - fast_statements:.1f} round trips saved)")
+
+
+if __name__ == "__main__":
+    print("⏱️  Update path benchmark")
+    print("=" * 50)
+    run_benchmark()
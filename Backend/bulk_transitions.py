@@ -0,0 +1,246 @@
+"""
+Bulk complaint state transitions.
+
+Resolve, forward, forward to manager or reject many complaints in one call.
+The portal endpoints do one get_complaint (with three joined loads), update,
+commit, refresh and notification round trip per complaint; here the whole
+batch is read in one query of (id, status), every item is validated, and
+the valid ones are changed with a single UPDATE ... WHERE id IN (...) per
+call, in one transaction together with their notifications, which are
+inserted in one flush.
+
+The UPDATE also repeats the from-status condition, so a complaint moved on
+by someone else between validation and update is reported as failed rather
+than overwritten. Only the complaints the UPDATE returns as changed count as
+applied (on MySQL, which cannot return them, the candidates are locked with
+SELECT ... FOR UPDATE first and updated by id). Workflow events, change tracking, counters and the ATS
+queue pick up the bulk statement through their session listeners.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+import complaint_events
+import crud
+import fast_updates
+import schemas
+import work_queue
+from models import Complaint, Employee, User
+
+MAX_BULK_TRANSITIONS = int(os.getenv("MAX_BULK_TRANSITIONS", "500"))
+
+FINAL_STATUSES = ["resolved", "closed"]
+
+
+@dataclass
+class Transition:
+    roles: List[str]
+    to_status: str
+    event_action: str
+    # Statuses the transition may start from; None allows any non-final status
+    from_statuses: Optional[List[str]] = None
+    # Agents may not act on complaints another agent has claimed from the ATS queue
+    respects_claims: bool = False
+
+
+TRANSITIONS: Dict[str, Transition] = {
+    "resolve": Transition(["ats"], "resolved", "resolved", respects_claims=True),
+    "forward": Transition(
+        ["ats"], "forwarded", "forwarded",
+        from_statuses=crud.ATS_INBOX_STATUSES + ["in_progress"], respects_claims=True,
+    ),
+    "forward_to_manager": Transition(
+        ["assistant_manager"], "pending_manager_approval", "forwarded_to_manager",
+        from_statuses=["forwarded"],
+    ),
+    "reject": Transition(
+        ["admin", "manager", "assistant_manager"], "in_progress", "rejected",
+        from_statuses=["forwarded", "pending_manager_approval", "pending_approval"],
+    ),
+}
+
+
+def _from_condition(transition: Transition):
+    if transition.from_statuses is None:
+        return Complaint.status.notin_(FINAL_STATUSES)
+    return Complaint.status.in_(transition.from_statuses)
+
+
+def _allows(transition: Transition, current_status: Optional[str]) -> bool:
+    if transition.from_statuses is None:
+        return current_status not in FINAL_STATUSES
+    return current_status in transition.from_statuses
+
+
+def _values(action: str, data: schemas.BulkComplaintTransition, current_user: User, now: datetime) -> dict:
+    """Column values the UPDATE sets besides the status"""
+    if action == "resolve":
+        notes = data.notes or "Resolved by ATS team"
+        return {"resolution_notes": notes, "resolution_date": now}
+    if action == "forward":
+        reason = (data.notes or "").strip()
+        if len(reason) < 10:
+            raise HTTPException(status_code=422, detail="Component purchase reason must be at least 10 characters")
+        return {"component_purchase_reason": reason, "assigned_to": data.assigned_to}
+    if action == "forward_to_manager":
+        return {
+            "resolution_notes": data.notes or f"Forwarded to manager by {current_user.email}",
+            "assigned_to": data.assigned_to,
+        }
+    reason = (data.notes or "").strip()
+    if not reason:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Rejection reason is required")
+    rejection_notes = f"Rejected by {current_user.role.replace('_', ' ').title()}: {reason}"
+    # Appended to each complaint's own notes, as the single reject endpoint does
+    return {
+        "resolution_notes": func.coalesce(Complaint.resolution_notes + "\n", "") + rejection_notes,
+        "assigned_to": None,
+    }
+
+
+def _event_notes(action: str, data: schemas.BulkComplaintTransition, values: dict) -> Optional[str]:
+    if action == "forward":
+        return values["component_purchase_reason"]
+    if action == "forward_to_manager":
+        return values["resolution_notes"]
+    return data.notes or ("Resolved by ATS team" if action == "resolve" else None)
+
+
+def _resolution_notifications(db: Session, complaint_ids: List[str]) -> List[schemas.NotificationCreate]:
+    """One notification for the user account of each complaint's employee"""
+    rows = db.execute(
+        select(Complaint.id, Complaint.title, User.id)
+        .join(Employee, Complaint.employee_id == Employee.id)
+        .join(User, User.email == Employee.email)
+        .where(Complaint.id.in_(complaint_ids))
+    )
+    return [
+        schemas.NotificationCreate(
+            user_id=user_id,
+            message=f"Your complaint '{title}' has been resolved by the ATS team.",
+            type="complaint_resolved",
+            related_id=complaint_id,
+        )
+        for complaint_id, title, user_id in rows
+    ]
+
+
+def _rejection_notifications(db: Session, complaint_ids: List[str], data: schemas.BulkComplaintTransition, current_user: User) -> List[schemas.NotificationCreate]:
+    """Every ATS user hears about every rejected complaint"""
+    ats_user_ids = [user_id for user_id, in db.query(User.id).filter(User.role == "ats")]
+    rejected_by = current_user.role.replace('_', ' ').title()
+    return [
+        schemas.NotificationCreate(
+            user_id=user_id,
+            message=f"Complaint {complaint_id} has been rejected by {rejected_by}. Reason: {data.notes.strip()}",
+            type="Complaint Rejection",
+            related_id=complaint_id,
+        )
+        for complaint_id in complaint_ids
+        for user_id in ats_user_ids
+    ]
+
+
+NOTIFICATIONS: Dict[str, Callable] = {
+    "resolve": lambda db, ids, data, user: _resolution_notifications(db, ids),
+    "reject": _rejection_notifications,
+}
+
+
+def apply(db: Session, data: schemas.BulkComplaintTransition, current_user: User) -> dict:
+    """Validate and apply a bulk transition; returns the per-complaint report."""
+    action = data.action.value
+    transition = TRANSITIONS[action]
+    if current_user.role not in transition.roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Not authorized to {action.replace('_', ' ')} complaints"
+        )
+    complaint_ids = list(dict.fromkeys(data.complaint_ids))
+    if not complaint_ids:
+        raise HTTPException(status_code=422, detail="No complaints given")
+    if len(complaint_ids) > MAX_BULK_TRANSITIONS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BULK_TRANSITIONS} complaints per call")
+
+    now = datetime.utcnow()
+    values = _values(action, data, current_user, now)
+
+    current = dict(db.execute(
+        select(Complaint.id, Complaint.status).where(Complaint.id.in_(complaint_ids))
+    ).all())
+    claimed = work_queue.claimed_by_others(db, complaint_ids, current_user.id) if transition.respects_claims else set()
+
+    errors = {}
+    for complaint_id in complaint_ids:
+        if complaint_id not in current:
+            errors[complaint_id] = "Complaint not found"
+        elif not _allows(transition, current[complaint_id]):
+            errors[complaint_id] = f"Cannot {action.replace('_', ' ')} a complaint that is {current[complaint_id]}"
+        elif complaint_id in claimed:
+            errors[complaint_id] = "Complaint is claimed by another ATS agent"
+
+    valid = [complaint_id for complaint_id in complaint_ids if complaint_id not in errors]
+    if errors and data.all_or_nothing:
+        valid = []
+
+    applied = set()
+    if valid:
+        notes = _event_notes(action, data, values)
+        for complaint_id in valid:
+            complaint_events.annotate(db, complaint_id, transition.event_action, notes)
+        statement = update(Complaint)\
+            .values(status=transition.to_status, last_updated=now, version=Complaint.version + 1, **values)\
+            .execution_options(synchronize_session=False)
+        # Complaints whose status changed concurrently are left alone by the WHERE,
+        # and only the rows the UPDATE itself changed count as applied
+        if fast_updates.supports_returning(db):
+            applied = {
+                complaint_id for complaint_id, in db.execute(
+                    statement.where(Complaint.id.in_(valid), _from_condition(transition)).returning(Complaint.id)
+                )
+            }
+        else:
+            # MySQL cannot return the updated rows: lock the ones that can still
+            # make the transition, so nothing moves them before the UPDATE does
+            applied = {
+                complaint_id for complaint_id, in db.execute(
+                    select(Complaint.id)
+                    .where(Complaint.id.in_(valid), _from_condition(transition))
+                    .with_for_update()
+                )
+            }
+            if applied:
+                db.execute(statement.where(Complaint.id.in_(applied)))
+        for complaint_id in valid:
+            if complaint_id not in applied:
+                complaint_events.discard_annotation(db, complaint_id)
+                errors[complaint_id] = "Complaint changed while the transition was applied"
+
+        build_notifications = NOTIFICATIONS.get(action)
+        notifications = build_notifications(db, sorted(applied), data, current_user) if build_notifications and applied else []
+        # Notifications and the transitions are committed together
+        crud.create_notifications(db, notifications)
+
+    results = []
+    for complaint_id in complaint_ids:
+        if complaint_id in applied:
+            results.append({"complaint_id": complaint_id, "success": True, "status": transition.to_status})
+        else:
+            results.append({
+                "complaint_id": complaint_id,
+                "success": False,
+                "status": current.get(complaint_id),
+                "error": errors.get(complaint_id, "Not applied: another complaint in the batch failed validation"),
+            })
+    return {
+        "action": action,
+        "applied": len(applied),
+        "failed": len(complaint_ids) - len(applied),
+        "results": results,
+    }
@@ -0,0 +1,373 @@
+"""
+Change tracking for cache validators and delta sync.
+
+Every commit that inserts, updates or deletes rows in a tracked table bumps
+that table's row in table_versions. List endpoints build weak ETags and
+Last-Modified headers from these counters with one primary key lookup, so a
+conditional GET can be answered with 304 before the list query runs.
+
+Changes to complaints (including their replies and images) and notifications
+are also appended to change_log, one row per changed record per commit. The
+log id is the cursor clients pass back as ?updated_since= to fetch only what
+changed. Log entries are written under a lock held until commit, so ids are
+handed out in commit order and a client polling past an id cannot miss an
+entry with a lower id that was still uncommitted.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from itertools import chain
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+import fast_updates
+from models import ChangeLog, Complaint, Notification, TableVersion
+
+# Tables whose changes invalidate cached list responses
+TRACKED_TABLES = {
+    "complaints", "replies", "complaint_images",
+    "employees", "assets", "vendors", "notifications",
+    "maintenance_records",
+}
+
+# Tables embedded in each list payload
+COMPLAINT_TABLES = ("complaints", "replies", "complaint_images", "employees", "assets", "vendors")
+ASSET_TABLES = ("assets", "employees", "vendors")
+VENDOR_TABLES = ("vendors",)
+NOTIFICATION_TABLES = ("notifications",)
+
+# Tables written to change_log: table -> (logged as, row id column, owner column).
+# Replies and images are logged as a change to their complaint.
+LOGGED_TABLES = {
+    "complaints": ("complaints", "id", "employee_id"),
+    "replies": ("complaints", "complaint_id", None),
+    "complaint_images": ("complaints", "complaint_id", None),
+    "notifications": ("notifications", "id", "user_id"),
+}
+
+# Logged tables -> (model, owner column), for entries queued without an owner
+LOGGED_OWNERS = {
+    "complaints": (Complaint, "employee_id"),
+    "notifications": (Notification, "user_id"),
+}
+
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# table_versions row that serializes change_log writers (see _bump_table_versions)
+CHANGE_LOG_SEQUENCE = "change_log_sequence"
+
+
+class SyncCursorExpired(Exception):
+    """Raised when changes after a cursor have already been pruned from the log."""
+
+
+def _pending_tables(session: Session) -> set:
+    return session.info.setdefault("changed_tables", set())
+
+
+def _log_row_change(session: Session, table_name: str, row_id: Optional[str], owner_id: Optional[str], operation: str):
+    """Queue a change_log entry, keeping one entry per record per commit."""
+    if not row_id:
+        return
+    pending = session.info.setdefault("changed_rows", {})
+    previous = pending.get((table_name, row_id))
+    if previous:
+        owner_id = owner_id or previous[0]
+        if previous[1] == "delete":
+            operation = "delete"
+    pending[(table_name, row_id)] = (owner_id, operation)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session, flush_context):
+    """Remember which tracked tables and logged records this flush wrote to."""
+    changed = _pending_tables(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table_name = getattr(type(obj), "__tablename__", None)
+        if table_name not in TRACKED_TABLES:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        changed.add(table_name)
+
+        if table_name in LOGGED_TABLES:
+            logged_as, row_column, owner_column = LOGGED_TABLES[table_name]
+            # Removing a reply or image is an update of its complaint
+            deleted = obj in session.deleted and row_column == "id"
+            _log_row_change(
+                session,
+                logged_as,
+                getattr(obj, row_column),
+                getattr(obj, owner_column) if owner_column else None,
+                "delete" if deleted else "upsert",
+            )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(orm_execute_state):
+    """Bulk query.update() / query.delete() calls bypass the flush."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+
+    statement = orm_execute_state.statement
+    table_name = statement.table.name
+    if table_name not in TRACKED_TABLES:
+        return
+    session = orm_execute_state.session
+    _pending_tables(session).add(table_name)
+
+    if table_name in LOGGED_TABLES:
+        logged_as, row_column, owner_column = LOGGED_TABLES[table_name]
+        deleted = orm_execute_state.is_delete and row_column == "id"
+        row_ids = fast_updates.affected_ids(orm_execute_state)
+        if row_ids is not None and row_column == "id" and owner_column not in fast_updates.statement_values(statement):
+            # A single-row update by primary key; the owner is filled in on write
+            for row_id in row_ids:
+                _log_row_change(session, logged_as, row_id, None, "delete" if deleted else "upsert")
+            return
+        # Look up the affected records before the statement changes them
+        for row in fast_updates.affected_rows(orm_execute_state):
+            _log_row_change(
+                session, logged_as, row[row_column], row[owner_column] if owner_column else None,
+                "delete" if deleted else "upsert",
+            )
+
+
+def _missing_owners(session: Session, changed_rows: dict) -> dict:
+    """(table, row id) -> owner for entries queued without one."""
+    owners = {}
+    for table_name, (model, owner_column) in LOGGED_OWNERS.items():
+        missing = []
+        for (logged_as, row_id), (owner_id, _) in changed_rows.items():
+            if logged_as != table_name or owner_id is not None:
+                continue
+            # Rows the session already holds (e.g. just returned by an UPDATE) need no query
+            obj = session.identity_map.get(identity_key(model, row_id))
+            if obj is not None and owner_column in obj.__dict__:
+                owners[(table_name, row_id)] = obj.__dict__[owner_column]
+            else:
+                missing.append(row_id)
+        if missing:
+            owner = getattr(model, owner_column)
+            owners.update(
+                ((table_name, row_id), owner_id)
+                for row_id, owner_id in session.execute(select(model.id, owner).where(model.id.in_(missing)))
+            )
+    return owners
+
+
+def _write_change_log(session: Session, changed_rows: dict, now: datetime):
+    # Replies, images and single-row updates are queued without their owner
+    owners = _missing_owners(session, changed_rows)
+
+    session.execute(insert(ChangeLog), [
+        {
+            "table_name": table_name,
+            "row_id": row_id,
+            "owner_id": owner_id or owners.get((table_name, row_id)),
+            "operation": operation,
+            "changed_at": now,
+        }
+        for (table_name, row_id), (owner_id, operation) in sorted(changed_rows.items())
+    ])
+
+
+def _bump_counter(session: Session, name: str, now: datetime):
+    result = session.execute(
+        update(TableVersion)
+        .where(TableVersion.table_name == name)
+        .values(version=TableVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        # First bump of this counter: create the row, tolerating a concurrent
+        # writer creating it at the same time
+        session.execute(
+            insert(TableVersion)
+            .prefix_with("OR IGNORE", dialect="sqlite")
+            .prefix_with("IGNORE", dialect="mysql")
+            .values(table_name=name, version=0, updated_at=now)
+        )
+        session.execute(
+            update(TableVersion)
+            .where(TableVersion.table_name == name)
+            .values(version=TableVersion.version + 1, updated_at=now)
+        )
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_table_versions(session):
+    """Bump the counters in the same transaction as the change itself."""
+    # Flush first so changes flushed by the commit itself are counted too
+    session.flush()
+    changed = session.info.pop("changed_tables", None)
+    changed_rows = session.info.pop("changed_rows", None)
+    if not changed:
+        return
+
+    now = datetime.utcnow()
+    if changed_rows:
+        # The sequence row stays locked until this transaction commits, so
+        # writers insert their log entries one at a time in commit order and
+        # a cursor never passes an entry that is still uncommitted
+        _bump_counter(session, CHANGE_LOG_SEQUENCE, now)
+        _write_change_log(session, changed_rows, now)
+
+    for table_name in sorted(changed):
+        _bump_counter(session, table_name, now)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_tables(session):
+    session.info.pop("changed_tables", None)
+    session.info.pop("changed_rows", None)
+
+
+def get_validators(db: Session, tables: Iterable[str], *scope) -> Tuple[str, Optional[datetime]]:
+    """
+    Return a weak ETag and the Last-Modified time for a response built from
+    `tables`. `scope` holds whatever else shapes the payload (user, path,
+    query parameters) so different views never share an ETag.
+    """
+    tables = tuple(tables)
+    rows = db.query(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)\
+        .filter(TableVersion.table_name.in_(tables))\
+        .all()
+    versions = {row.table_name: row.version for row in rows}
+
+    fingerprint = "|".join(
+        [f"{table}:{versions.get(table, 0)}" for table in tables] + [str(part) for part in scope]
+    )
+    etag = 'W/"' + hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:20] + '"'
+
+    timestamps = [row.updated_at for row in rows if row.updated_at]
+    last_modified = max(timestamps).replace(microsecond=0) if timestamps else None
+    return etag, last_modified
+
+
+def request_validators(db: Session, request: Request, tables: Iterable[str], user_id: str):
+    """Validators scoped to the requesting user and the exact URL."""
+    return get_validators(db, tables, user_id, request.url.path, request.url.query)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: ignore the W/ prefix on both sides
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            if since.tzinfo is not None:
+                since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            return False
+        return last_modified <= since
+
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime]):
+    response.headers.update(validator_headers(etag, last_modified))
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+
+def conditional_get(db: Session, request: Request, response: Response, tables: Iterable[str], user_id: str) -> Optional[Response]:
+    """
+    Return a 304 response if the client's copy is current. Otherwise set the
+    validators on the endpoint's response and return None.
+    """
+    etag, last_modified = request_validators(db, request, tables, user_id)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    return None
+
+
+def get_sync_cursor(db: Session) -> int:
+    """Current end of the change log; changes after it are not yet seen."""
+    return db.query(func.max(ChangeLog.id)).scalar() or 0
+
+
+def get_changes(
+    db: Session,
+    table_name: str,
+    since: int,
+    limit: int = 100,
+    owner_id: Optional[str] = None,
+) -> Tuple[List[str], int, bool]:
+    """
+    Return (changed row ids, next cursor, has_more) for records of
+    `table_name` changed after the cursor `since`, oldest change first.
+    """
+    if since < get_pruned_cursor(db):
+        raise SyncCursorExpired()
+
+    # Pin the end of the log first so changes committed meanwhile are picked
+    # up by the next poll instead of being skipped
+    end = get_sync_cursor(db)
+
+    latest_change = func.max(ChangeLog.id)
+    query = db.query(ChangeLog.row_id, latest_change.label("cursor"))\
+        .filter(ChangeLog.table_name == table_name, ChangeLog.id > since, ChangeLog.id <= end)
+    if owner_id is not None:
+        query = query.filter(ChangeLog.owner_id == owner_id)
+
+    rows = query.group_by(ChangeLog.row_id).order_by(latest_change).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = rows[-1].cursor if has_more else max(since, end)
+    return [row.row_id for row in rows], next_cursor, has_more
+
+
+def get_pruned_cursor(db: Session) -> int:
+    """Highest change_log id removed by pruning (0 if nothing was pruned)."""
+    return db.query(TableVersion.version).filter(TableVersion.table_name == "change_log").scalar() or 0
+
+
+def prune_change_log(db: Session, retention_days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+    """
+    Delete change_log entries older than the retention window. Clients whose
+    cursor falls inside the pruned range must reload the full list.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    last_pruned = db.query(func.max(ChangeLog.id)).filter(ChangeLog.changed_at < cutoff).scalar()
+    if last_pruned is None:
+        return 0
+
+    deleted = db.query(ChangeLog).filter(ChangeLog.id <= last_pruned).delete(synchronize_session=False)
+    # Remember the pruned watermark alongside the table counters
+    marker = db.query(TableVersion).filter(TableVersion.table_name == "change_log").first()
+    if marker is None:
+        db.add(TableVersion(table_name="change_log", version=last_pruned, updated_at=datetime.utcnow()))
+    else:
+        marker.version = max(marker.version, last_pruned)
+        marker.updated_at = datetime.utcnow()
+    db.commit()
+    return deleted
+
+
+def set_sync_cursor(db: Session, response: Response):
+    """Hand out the cursor for the first ?updated_since= poll after a full load."""
+    response.headers["X-Sync-Cursor"] = str(get_sync_cursor(db))
@@ -0,0 +1,206 @@
+"""
+Append-only complaint workflow log.
+
+Every complaint status transition is recorded in complaint_events with the
+acting user, their role, the action and the from / to status, in the same
+transaction as the change itself. Nothing has to call this module for that:
+an after_flush listener picks up new complaints and status changes, and a
+do_orm_execute listener picks up bulk query.update() status changes.
+
+The acting user is taken from the request (get_current_user calls
+set_actor). Endpoints whose action is more specific than a status change
+(reject, forward to manager, resolve) name it with annotate(), which also
+records actions that leave the status unchanged.
+
+Approval history, complaint timelines and audits read this table through
+its (actor_id, created_at) and (complaint_id, created_at) indexes instead of
+searching resolution_notes.
+"""
+
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event, func, insert, inspect
+from sqlalchemy.orm import Session
+
+import fast_updates
+from models import Complaint, ComplaintEvent
+
+# (user id, role) of the user making the current request
+_current_actor: ContextVar[Optional[Tuple[str, str]]] = ContextVar("complaint_event_actor", default=None)
+
+# Action recorded for a plain status change, by new status
+STATUS_ACTIONS = {
+    "forwarded": "forwarded",
+    "pending_manager_approval": "forwarded_to_manager",
+    "pending_approval": "submitted_for_approval",
+    "resolved": "resolved",
+    "closed": "closed",
+}
+
+# Note prefixes the portals write when approving or rejecting
+NOTE_ACTIONS = (("approved by", "approved"), ("rejected by", "rejected"))
+
+
+def set_actor(user) -> None:
+    _current_actor.set((user.id, user.role) if user is not None else None)
+
+
+def annotate(db: Session, complaint_id: str, action: str, notes: Optional[str] = None):
+    """Name the action of the complaint's next change in this session."""
+    db.info.setdefault("complaint_event_actions", {})[complaint_id] = (action, notes)
+
+
+def discard_annotation(db: Session, complaint_id: str):
+    """Drop an annotation whose change did not happen."""
+    db.info.get("complaint_event_actions", {}).pop(complaint_id, None)
+
+
+def _pending_events(session: Session) -> list:
+    return session.info.setdefault("complaint_events", [])
+
+
+def _note_action(notes: Optional[str]) -> Optional[str]:
+    if not notes or not notes.strip():
+        return None
+    # Notes accumulate; the latest line describes this change
+    last_line = notes.strip().splitlines()[-1].lower()
+    for prefix, action in NOTE_ACTIONS:
+        if last_line.startswith(prefix):
+            return action
+    return None
+
+
+def _queue_event(session: Session, complaint_id: str, from_status: Optional[str], to_status: Optional[str], default_action: str, notes_action: Optional[str] = None):
+    action, notes = session.info.get("complaint_event_actions", {}).pop(complaint_id, (None, None))
+    _pending_events(session).append({
+        "complaint_id": complaint_id,
+        "action": action or notes_action or default_action,
+        "from_status": from_status,
+        "to_status": to_status,
+        "notes": notes,
+    })
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_complaint_events(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Complaint):
+            _queue_event(session, obj.id, None, obj.status, "created")
+
+    for obj in session.dirty:
+        if not isinstance(obj, Complaint):
+            continue
+        history = inspect(obj).attrs.status.history
+        if not history.added:
+            continue
+        from_status = history.deleted[0] if history.deleted else None
+        to_status = history.added[0]
+        if from_status == to_status:
+            continue
+        notes_history = inspect(obj).attrs.resolution_notes.history
+        notes_action = _note_action(notes_history.added[0]) if notes_history.added else None
+        _queue_event(
+            session, obj.id, from_status, to_status,
+            STATUS_ACTIONS.get(to_status, "status_changed"), notes_action,
+        )
+
+    for obj in session.deleted:
+        if isinstance(obj, Complaint):
+            _queue_event(session, obj.id, obj.status, None, "deleted")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_status_changes(orm_execute_state):
+    """Bulk status updates bypass the flush; log them from the statement."""
+    if not orm_execute_state.is_update:
+        return
+    statement = orm_execute_state.statement
+    if statement.table.name != Complaint.__tablename__:
+        return
+    new_status = fast_updates.statement_values(statement).get("status")
+    if new_status is None or fast_updates.is_expression(new_status):
+        return
+    new_status = getattr(new_status, "value", new_status)
+
+    session = orm_execute_state.session
+    for row in fast_updates.affected_rows(orm_execute_state):
+        if row["status"] != new_status:
+            _queue_event(
+                session, row["id"], row["status"], new_status,
+                STATUS_ACTIONS.get(new_status, "status_changed"),
+            )
+
+
+@event.listens_for(Session, "before_commit")
+def _write_complaint_events(session):
+    session.flush()
+    events = session.info.pop("complaint_events", None) or []
+    # Annotated actions that came with no status change are still recorded
+    for complaint_id, (action, notes) in session.info.pop("complaint_event_actions", {}).items():
+        events.append({
+            "complaint_id": complaint_id,
+            "action": action,
+            "from_status": None,
+            "to_status": None,
+            "notes": notes,
+        })
+    if not events:
+        return
+
+    actor_id, role = _current_actor.get() or (None, None)
+    now = datetime.utcnow()
+    session.execute(insert(ComplaintEvent), [
+        {**complaint_event, "actor_id": actor_id, "role": role, "created_at": now}
+        for complaint_event in events
+    ])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_complaint_events(session):
+    session.info.pop("complaint_events", None)
+    session.info.pop("complaint_event_actions", None)
+
+
+def get_timeline(db: Session, complaint_id: str) -> List[ComplaintEvent]:
+    return db.query(ComplaintEvent)\
+        .filter(ComplaintEvent.complaint_id == complaint_id)\
+        .order_by(ComplaintEvent.created_at, ComplaintEvent.id)\
+        .all()
+
+
+def actor_history_query(db: Session, actor_id: str, actions: Optional[List[str]] = None):
+    """(complaint_id, last_event_at) of complaints the actor acted on, for joining onto complaints"""
+    query = db.query(
+        ComplaintEvent.complaint_id.label("complaint_id"),
+        func.max(ComplaintEvent.created_at).label("last_event_at"),
+    ).filter(ComplaintEvent.actor_id == actor_id)
+    if actions:
+        query = query.filter(ComplaintEvent.action.in_(actions))
+    return query.group_by(ComplaintEvent.complaint_id).subquery()
+
+
+def search_events(
+    db: Session,
+    actor_id: Optional[str] = None,
+    complaint_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[ComplaintEvent]:
+    """Audit query; filtering by actor or complaint uses the indexes."""
+    query = db.query(ComplaintEvent)
+    if actor_id:
+        query = query.filter(ComplaintEvent.actor_id == actor_id)
+    if complaint_id:
+        query = query.filter(ComplaintEvent.complaint_id == complaint_id)
+    if action:
+        query = query.filter(ComplaintEvent.action == action)
+    if since:
+        query = query.filter(ComplaintEvent.created_at >= since)
+    if until:
+        query = query.filter(ComplaintEvent.created_at < until)
+    return query.order_by(ComplaintEvent.created_at.desc(), ComplaintEvent.id.desc()).offset(skip).limit(limit).all()
@@ -1,17 +1,22 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, and_
+from sqlalchemy import DateTime, Float, Integer, desc, and_, func, literal, null, select, type_coerce, union_all, update
 from models import (
-    User, Employee, Complaint, Reply, Asset, Vendor, 
+    User, Employee, Complaint, ComplaintImage, Reply, Asset, Vendor, 
     MaintenanceRequest, MaintenanceRecord, Notification,
-    QuoteRequest, QuoteRequestVendor, QuoteResponse
+    QuoteRequest, QuoteRequestVendor, QuoteResponse, UploadSession
 )
 from schemas import (
     UserCreate, EmployeeCreate, ComplaintCreate, ReplyCreate, 
     AssetCreate, VendorCreate, MaintenanceRequestCreate,
     MaintenanceRecordCreate, NotificationCreate,
-    QuoteRequestCreate, QuoteRequestVendorCreate, QuoteResponseCreate
+    QuoteRequestCreate, QuoteRequestVendorCreate, QuoteResponseCreate,
+    UploadSessionCreate
 )
 from auth import get_password_hash
+from image_utils import read_image_metadata
+import fast_updates
+import versioning
+import work_queue
 import uuid
 from datetime import datetime
 import json
@@ -63,14 +68,17 @@ def delete_user(db: Session, user_id: str):
     return False
 
 # Employee CRUD operations
-def get_employee(db: Session, employee_id: str):
-    return db.query(Employee).filter(Employee.id == employee_id).first()
+def get_employee(db: Session, employee_id: str, options: Optional[list] = None):
+    return db.query(Employee).options(*(options or [])).filter(Employee.id == employee_id).first()
+
+def get_employees_by_ids(db: Session, employee_ids: List[str]):
+    return db.query(Employee).filter(Employee.id.in_(employee_ids)).all()
 
 def get_employee_by_email(db: Session, email: str):
     return db.query(Employee).filter(Employee.email == email).first()
 
-def get_employees(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Employee).offset(skip).limit(limit).all()
+def get_employees(db: Session, skip: int = 0, limit: int = 100, options: Optional[list] = None):
+    return db.query(Employee).options(*(options or [])).offset(skip).limit(limit).all()
 
 def create_employee(db: Session, employee_data: EmployeeCreate, user_id: str):
     db_employee = Employee(
@@ -116,54 +124,76 @@ def get_complaint(db: Session, complaint_id: str):
         .filter(Complaint.id == complaint_id)\
         .first()
     
-    # ⚠️ DO NOT modify complaint.images directly as it marks the object as dirty
-    # Instead, let the Pydantic model handle the conversion in the response
-    # The ComplaintResponse schema has proper handling for this
-    
     return complaint
 
-def get_complaints(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None):
+def get_complaints_query(db: Session, status: Optional[str] = None, options: Optional[list] = None):
     query = db.query(Complaint)\
-        .options(
+        .options(*(options or [
             joinedload(Complaint.employee),
             joinedload(Complaint.asset),
             joinedload(Complaint.replies)
-        )
+        ]))
     
     if status:
         query = query.filter(Complaint.status == status)
     
-    complaints = query.order_by(desc(Complaint.date_submitted)).offset(skip).limit(limit).all()
-    
-    # ⚠️ DO NOT modify complaint.images directly as it marks objects as dirty
-    # Instead, let the Pydantic model handle the conversion in the response
-    # The ComplaintResponse schema has proper handling for this
+    return query
+
+def get_complaints(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None, options: Optional[list] = None):
+    complaints = get_complaints_query(db, status=status, options=options)\
+        .order_by(desc(Complaint.date_submitted)).offset(skip).limit(limit).all()
     
     return complaints
 
-def get_employee_complaints(db: Session, employee_id: str, skip: int = 0, limit: int = 100):
-    complaints = db.query(Complaint)\
-        .options(
+def get_complaints_by_ids(db: Session, complaint_ids: List[str]):
+    return get_complaints_query(db).filter(Complaint.id.in_(complaint_ids)).all()
+
+# Complaints waiting on each review portal by default
+ATS_INBOX_STATUSES = work_queue.QUEUED_STATUSES
+MANAGER_INBOX_STATUSES = ["pending_manager_approval", "in_progress", "pending_approval"]
+
+def assistant_manager_inbox_filter(user_id: str):
+    """Forwarded complaints, plus those assigned to the assistant manager"""
+    return (Complaint.status == "forwarded") | (Complaint.assigned_to == user_id)
+
+def get_employee_complaints_query(db: Session, employee_id: str, options: Optional[list] = None):
+    return db.query(Complaint)\
+        .options(*(options or [
             joinedload(Complaint.employee),
             joinedload(Complaint.asset),
             joinedload(Complaint.replies)
-        )\
-        .filter(Complaint.employee_id == employee_id)\
+        ]))\
+        .filter(Complaint.employee_id == employee_id)
+
+def get_employee_complaints(db: Session, employee_id: str, skip: int = 0, limit: int = 100, options: Optional[list] = None):
+    complaints = get_employee_complaints_query(db, employee_id, options=options)\
         .order_by(desc(Complaint.date_submitted))\
         .offset(skip)\
         .limit(limit)\
         .all()
     
-    # ⚠️ DO NOT modify complaint.images directly as it marks objects as dirty
-    # Instead, let the Pydantic model handle the conversion in the response
-    # The ComplaintResponse schema has proper handling for this
-    
     return complaints
 
+def build_complaint_images(image_paths: List[str]) -> List[ComplaintImage]:
+    """Create ComplaintImage rows, with file metadata, for the given paths in order"""
+    return [
+        ComplaintImage(
+            id=str(uuid.uuid4()),
+            path=path,
+            position=position,
+            created_at=datetime.utcnow(),
+            **read_image_metadata(path)
+        )
+        for position, path in enumerate(image_paths or [])
+    ]
+
+def get_complaint_images(db: Session, complaint_id: str):
+    return db.query(ComplaintImage)\
+        .filter(ComplaintImage.complaint_id == complaint_id)\
+        .order_by(ComplaintImage.position)\
+        .all()
+
 def create_complaint(db: Session, complaint_data: ComplaintCreate):
-    # Convert images list to JSON string
-    images_json = json.dumps(complaint_data.images) if complaint_data.images else "[]"
-    
     db_complaint = Complaint(
         id=str(uuid.uuid4()),
         employee_id=complaint_data.employee_id,
@@ -173,58 +203,49 @@ def create_complaint(db: Session, complaint_data: ComplaintCreate):
         status="open",
         date_submitted=datetime.utcnow(),
         last_updated=datetime.utcnow(),
-        images=images_json,
         asset_id=complaint_data.asset_id
     )
+    db_complaint.image_records = build_complaint_images(complaint_data.images)
     db.add(db_complaint)
     db.commit()
     db.refresh(db_complaint)
     
-    # ⚠️ DO NOT modify db_complaint.images to list here as it marks object as dirty
-    # Let the Pydantic response model handle the conversion instead
-    
     return db_complaint
 
-def update_complaint(db: Session, complaint_id: str, **kwargs):
+def _commit_fast_update(db: Session, obj):
+    if obj is not None:
+        try:
+            fast_updates.commit(db)
+        except Exception as e:
+            print(f"❌ Database error during update: {e}")
+            db.rollback()
+            raise e
+    return obj
+
+def update_complaint(db: Session, complaint_id: str, expected_version: Optional[int] = None, **kwargs):
+    # Image changes go through the ORM; anything else is one UPDATE ... RETURNING
+    values = fast_updates.column_values(Complaint, kwargs) if fast_updates.FAST_UPDATES_ENABLED and not kwargs.get('images') else None
+    if values is not None:
+        now = datetime.utcnow()
+        values = {**values, "last_updated": now}
+        # If status changing to resolved, set resolution date unless it is already set
+        if values.get("status") == "resolved" and not values.get("resolution_date"):
+            values["resolution_date"] = func.coalesce(Complaint.resolution_date, now)
+        db_complaint = fast_updates.update_returning(db, Complaint, complaint_id, values, expected_version, "Complaint")
+        return _commit_fast_update(db, db_complaint)
+
     db_complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
     if db_complaint:
-        # Make a copy of kwargs to avoid modifying the original
+        versioning.check_version(db_complaint, expected_version, "Complaint")
         update_data = kwargs.copy()
         
-        print(f"🔍 DEBUG: Original update_data: {update_data}")
-        
-        # Handle images field properly to prevent SQL errors
-        if 'images' in update_data:
-            images_value = update_data['images']
-            print(f"🔍 DEBUG: Images value type: {type(images_value)}, value: {images_value}")
-            
-            if images_value == [] or images_value is None:
-                # Remove empty images from update to avoid SQL error
-                print("⚠️ Removing empty/null images from update_data to prevent SQL error")
-                del update_data['images']
-            elif isinstance(images_value, list):
-                # Convert non-empty list to JSON string
-                update_data['images'] = json.dumps(images_value)
-                print(f"✅ Converted images list to JSON string: {update_data['images']}")
-            elif isinstance(images_value, str):
-                # Already a string, validate it's valid JSON or set to empty
-                try:
-                    json.loads(images_value)  # Test if valid JSON
-                    print(f"✅ Images already valid JSON string: {images_value}")
-                except:
-                    print("⚠️ Invalid JSON string in images, setting to empty array")
-                    update_data['images'] = "[]"
-            else:
-                # Unknown type, convert to empty JSON array
-                print(f"⚠️ Unknown images type {type(images_value)}, setting to empty array")
-                update_data['images'] = "[]"
-        
-        print(f"🔍 DEBUG: Final update_data: {update_data}")
+        # A non-empty images list replaces the complaint's images
+        images = update_data.pop('images', None)
+        if images:
+            db_complaint.image_records = build_complaint_images(images)
         
-        # Update fields - now including images if it's properly formatted
         for key, value in update_data.items():
             if hasattr(db_complaint, key):
-                print(f"🔄 Setting {key} = {value}")
                 setattr(db_complaint, key, value)
         
         # Always update the last_updated field
@@ -233,27 +254,14 @@ def update_complaint(db: Session, complaint_id: str, **kwargs):
         # If status changing to resolved, set resolution date
         if kwargs.get("status") == "resolved" and not db_complaint.resolution_date:
             db_complaint.resolution_date = datetime.utcnow()
-        
-        # Extra safety check: ensure images field is properly handled before commit
-        if hasattr(db_complaint, 'images') and isinstance(db_complaint.images, list):
-            print(f"⚠️ CRITICAL: Found list in db_complaint.images before commit: {db_complaint.images}")
-            db_complaint.images = json.dumps(db_complaint.images) if db_complaint.images else "[]"
-            print(f"✅ Fixed images field to: {db_complaint.images}")
             
         try:
-            print("💾 Attempting database commit...")
             db.commit()
-            print("✅ Database commit successful!")
             db.refresh(db_complaint)
         except Exception as e:
             print(f"❌ Database error during complaint update: {e}")
-            print(f"❌ Final db_complaint.images type: {type(db_complaint.images)}")
-            print(f"❌ Final db_complaint.images value: {db_complaint.images}")
             db.rollback()
             raise e
-        
-        # ⚠️ DO NOT convert images back to list here as it marks the object as dirty
-        # Let the Pydantic response model handle the conversion instead
                 
     return db_complaint
 
@@ -310,24 +318,30 @@ def delete_reply(db: Session, reply_id: str):
     return False
 
 # Asset CRUD operations
-def get_asset(db: Session, asset_id: str):
+def get_asset(db: Session, asset_id: str, options: Optional[list] = None):
     return db.query(Asset)\
-        .options(joinedload(Asset.assigned_to), joinedload(Asset.vendor))\
+        .options(*(options or [joinedload(Asset.assigned_to), joinedload(Asset.vendor)]))\
         .filter(Asset.id == asset_id)\
         .first()
 
-def get_assets(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None):
+def get_assets_by_ids(db: Session, asset_ids: List[str]):
+    return db.query(Asset)\
+        .options(joinedload(Asset.assigned_to), joinedload(Asset.vendor))\
+        .filter(Asset.id.in_(asset_ids))\
+        .all()
+
+def get_assets(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None, options: Optional[list] = None):
     query = db.query(Asset)\
-        .options(joinedload(Asset.assigned_to), joinedload(Asset.vendor))
+        .options(*(options or [joinedload(Asset.assigned_to), joinedload(Asset.vendor)]))
     
     if status:
         query = query.filter(Asset.status == status)
     
     return query.order_by(Asset.name).offset(skip).limit(limit).all()
 
-def get_employee_assets(db: Session, employee_id: str):
+def get_employee_assets(db: Session, employee_id: str, options: Optional[list] = None):
     return db.query(Asset)\
-        .options(joinedload(Asset.vendor))\
+        .options(*(options or [joinedload(Asset.vendor)]))\
         .filter(Asset.assigned_to_id == employee_id)\
         .all()
 
@@ -352,18 +366,25 @@ def create_asset(db: Session, asset_data: AssetCreate):
     db.refresh(db_asset)
     return db_asset
 
-def update_asset(db: Session, asset_id: str, **kwargs):
+def update_asset(db: Session, asset_id: str, expected_version: Optional[int] = None, **kwargs):
+    values = fast_updates.column_values(Asset, kwargs) if fast_updates.FAST_UPDATES_ENABLED else None
+    if values:
+        db_asset = fast_updates.update_returning(db, Asset, asset_id, values, expected_version, "Asset")
+        return _commit_fast_update(db, db_asset)
+
     db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
     if db_asset:
+        versioning.check_version(db_asset, expected_version, "Asset")
         for key, value in kwargs.items():
             setattr(db_asset, key, value)
         db.commit()
         db.refresh(db_asset)
     return db_asset
 
-def assign_asset(db: Session, asset_id: str, employee_id: str):
+def assign_asset(db: Session, asset_id: str, employee_id: str, expected_version: Optional[int] = None):
     db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
     if db_asset:
+        versioning.check_version(db_asset, expected_version, "Asset")
         db_asset.assigned_to_id = employee_id
         db_asset.assigned_date = datetime.utcnow()
         db_asset.status = "assigned"
@@ -371,9 +392,10 @@ def assign_asset(db: Session, asset_id: str, employee_id: str):
         db.refresh(db_asset)
     return db_asset
 
-def unassign_asset(db: Session, asset_id: str):
+def unassign_asset(db: Session, asset_id: str, expected_version: Optional[int] = None):
     db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
     if db_asset:
+        versioning.check_version(db_asset, expected_version, "Asset")
         db_asset.assigned_to_id = None
         db_asset.assigned_date = None
         db_asset.status = "available"
@@ -390,14 +412,17 @@ def delete_asset(db: Session, asset_id: str):
     return False
 
 # Vendor CRUD operations
-def get_vendor(db: Session, vendor_id: str):
-    return db.query(Vendor).filter(Vendor.id == vendor_id).first()
+def get_vendor(db: Session, vendor_id: str, options: Optional[list] = None):
+    return db.query(Vendor).options(*(options or [])).filter(Vendor.id == vendor_id).first()
+
+def get_vendors_by_ids(db: Session, vendor_ids: List[str]):
+    return db.query(Vendor).filter(Vendor.id.in_(vendor_ids)).all()
 
 def get_vendor_by_email(db: Session, email: str):
     return db.query(Vendor).filter(Vendor.email == email).first()
 
-def get_vendors(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Vendor).offset(skip).limit(limit).all()
+def get_vendors(db: Session, skip: int = 0, limit: int = 100, options: Optional[list] = None):
+    return db.query(Vendor).options(*(options or [])).offset(skip).limit(limit).all()
 
 def create_vendor(db: Session, vendor_data: VendorCreate):
     db_vendor = Vendor(
@@ -451,7 +476,7 @@ def delete_vendor(db: Session, vendor_id: str):
     db.query(QuoteResponse).filter(QuoteResponse.vendor_id == vendor_id).delete()
 
     # 3. Null-out vendor link on Assets
-    db.query(Asset).filter(Asset.vendor_id == vendor_id).update({Asset.vendor_id: None})
+    db.query(Asset).filter(Asset.vendor_id == vendor_id).update({Asset.vendor_id: None, Asset.version: Asset.version + 1})
 
     # 4. Null-out vendor link on MaintenanceRequests
     db.query(MaintenanceRequest).filter(MaintenanceRequest.vendor_id == vendor_id).update({MaintenanceRequest.vendor_id: None})
@@ -593,12 +618,16 @@ def delete_maintenance_record(db: Session, record_id: str):
 def get_notification(db: Session, notification_id: str):
     return db.query(Notification).filter(Notification.id == notification_id).first()
 
-def get_user_notifications(db: Session, user_id: str, skip: int = 0, limit: int = 100, unread_only: bool = False):
+def get_user_notifications_query(db: Session, user_id: str, unread_only: bool = False):
     query = db.query(Notification).filter(Notification.user_id == user_id)
     
     if unread_only:
         query = query.filter(Notification.read == False)
     
+    return query
+
+def get_user_notifications(db: Session, user_id: str, skip: int = 0, limit: int = 100, unread_only: bool = False):
+    query = get_user_notifications_query(db, user_id, unread_only=unread_only)
     return query.order_by(desc(Notification.created_at)).offset(skip).limit(limit).all()
 
 def create_notification(db: Session, notification_data: NotificationCreate):
@@ -616,7 +645,29 @@ def create_notification(db: Session, notification_data: NotificationCreate):
     db.refresh(db_notification)
     return db_notification
 
+def create_notifications(db: Session, notifications: List[NotificationCreate]):
+    """Insert several notifications in one flush and commit"""
+    db_notifications = [
+        Notification(
+            id=str(uuid.uuid4()),
+            user_id=notification_data.user_id,
+            message=notification_data.message,
+            type=notification_data.type,
+            related_id=notification_data.related_id,
+            created_at=datetime.utcnow(),
+            read=False
+        )
+        for notification_data in notifications
+    ]
+    db.add_all(db_notifications)
+    db.commit()
+    return db_notifications
+
 def mark_notification_read(db: Session, notification_id: str):
+    if fast_updates.FAST_UPDATES_ENABLED:
+        db_notification = fast_updates.update_returning(db, Notification, notification_id, {"read": True})
+        return _commit_fast_update(db, db_notification)
+
     db_notification = db.query(Notification).filter(Notification.id == notification_id).first()
     if db_notification:
         db_notification.read = True
@@ -640,36 +691,36 @@ def delete_notification(db: Session, notification_id: str):
     return False
 
 # Quote Request CRUD operations
-def get_quote_request(db: Session, quote_request_id: str):
+def get_quote_request(db: Session, quote_request_id: str, options: Optional[list] = None):
     return db.query(QuoteRequest)\
-        .options(
+        .options(*(options or [
             joinedload(QuoteRequest.created_by),
             joinedload(QuoteRequest.vendor_selections).joinedload(QuoteRequestVendor.vendor),
             joinedload(QuoteRequest.responses).joinedload(QuoteResponse.vendor)
-        )\
+        ]))\
         .filter(QuoteRequest.id == quote_request_id)\
         .first()
 
-def get_quote_requests(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None):
+def get_quote_requests(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None, options: Optional[list] = None):
     query = db.query(QuoteRequest)\
-        .options(
+        .options(*(options or [
             joinedload(QuoteRequest.created_by),
             joinedload(QuoteRequest.vendor_selections).joinedload(QuoteRequestVendor.vendor),
             joinedload(QuoteRequest.responses).joinedload(QuoteResponse.vendor)
-        )
+        ]))
     
     if status:
         query = query.filter(QuoteRequest.status == status)
     
     return query.order_by(desc(QuoteRequest.created_at)).offset(skip).limit(limit).all()
 
-def get_user_quote_requests(db: Session, user_id: str, skip: int = 0, limit: int = 100, status: Optional[str] = None):
+def get_user_quote_requests(db: Session, user_id: str, skip: int = 0, limit: int = 100, status: Optional[str] = None, options: Optional[list] = None):
     query = db.query(QuoteRequest)\
-        .options(
+        .options(*(options or [
             joinedload(QuoteRequest.created_by),
             joinedload(QuoteRequest.vendor_selections).joinedload(QuoteRequestVendor.vendor),
             joinedload(QuoteRequest.responses).joinedload(QuoteResponse.vendor)
-        )\
+        ]))\
         .filter(QuoteRequest.created_by_id == user_id)
     
     if status:
@@ -677,6 +728,51 @@ def get_user_quote_requests(db: Session, user_id: str, skip: int = 0, limit: int
     
     return query.order_by(desc(QuoteRequest.created_at)).offset(skip).limit(limit).all()
 
+def _quote_request_stats():
+    """Per quote request response stats, aggregated in one GROUP BY over selections and responses"""
+    rows = union_all(
+        select(
+            QuoteRequestVendor.quote_request_id.label("quote_request_id"),
+            literal(1, Integer).label("invited"),
+            type_coerce(null(), Float).label("quote_amount"),
+            type_coerce(null(), DateTime).label("submitted_at"),
+        ),
+        select(
+            QuoteResponse.quote_request_id,
+            literal(0, Integer),
+            QuoteResponse.quote_amount,
+            QuoteResponse.submitted_at,
+        ),
+    ).subquery()
+    return select(
+        rows.c.quote_request_id,
+        func.sum(rows.c.invited).label("invited_count"),
+        func.count(rows.c.quote_amount).label("responded_count"),
+        func.min(rows.c.quote_amount).label("min_quote_amount"),
+        func.avg(rows.c.quote_amount).label("avg_quote_amount"),
+        func.max(rows.c.submitted_at).label("latest_submission"),
+    ).group_by(rows.c.quote_request_id).subquery()
+
+def get_quote_request_summaries(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None, created_by_id: Optional[str] = None):
+    """Quote requests with their response stats instead of the nested selections and responses"""
+    stats = _quote_request_stats()
+    query = select(
+        *QuoteRequest.__table__.c,
+        func.coalesce(stats.c.invited_count, 0).label("invited_count"),
+        func.coalesce(stats.c.responded_count, 0).label("responded_count"),
+        stats.c.min_quote_amount,
+        stats.c.avg_quote_amount,
+        stats.c.latest_submission,
+    ).outerjoin(stats, stats.c.quote_request_id == QuoteRequest.id)
+    
+    if created_by_id:
+        query = query.where(QuoteRequest.created_by_id == created_by_id)
+    if status:
+        query = query.where(QuoteRequest.status == status)
+    
+    rows = db.execute(query.order_by(desc(QuoteRequest.created_at)).offset(skip).limit(limit))
+    return [dict(row._mapping) for row in rows]
+
 def create_quote_request(db: Session, request_data: QuoteRequestCreate, user_id: str):
     db_request = QuoteRequest(
         id=str(uuid.uuid4()),
@@ -727,26 +823,19 @@ def get_quote_request_vendors(db: Session, quote_request_id: str):
         .all()
 
 def create_quote_request_vendor(db: Session, vendor_data: QuoteRequestVendorCreate):
-    # Check if this vendor is already added to this quote request
-    existing = db.query(QuoteRequestVendor)\
-        .filter(
-            QuoteRequestVendor.quote_request_id == vendor_data.quote_request_id,
-            QuoteRequestVendor.vendor_id == vendor_data.vendor_id
-        ).first()
-    
-    if existing:
-        return existing
-    
-    db_vendor_selection = QuoteRequestVendor(
-        id=str(uuid.uuid4()),
-        quote_request_id=vendor_data.quote_request_id,
-        vendor_id=vendor_data.vendor_id,
-        sent_date=datetime.utcnow(),
-        has_responded=False
+    # Returns the existing selection if this vendor is already added to this quote request
+    db_vendor_selection = fast_updates.upsert_returning(
+        db, QuoteRequestVendor,
+        {
+            "id": str(uuid.uuid4()),
+            "quote_request_id": vendor_data.quote_request_id,
+            "vendor_id": vendor_data.vendor_id,
+            "sent_date": datetime.utcnow(),
+            "has_responded": False,
+        },
+        ["quote_request_id", "vendor_id"],
     )
-    db.add(db_vendor_selection)
-    db.commit()
-    db.refresh(db_vendor_selection)
+    _commit_fast_update(db, db_vendor_selection)
     return db_vendor_selection
 
 def delete_quote_request_vendor(db: Session, quote_request_vendor_id: str):
@@ -768,6 +857,16 @@ def get_quote_response(db: Session, quote_response_id: str):
         .filter(QuoteResponse.id == quote_response_id)\
         .first()
 
+def get_quote_responses_by_ids(db: Session, quote_response_ids: List[str]):
+    return db.query(QuoteResponse)\
+        .options(
+            joinedload(QuoteResponse.quote_request),
+            joinedload(QuoteResponse.vendor),
+            joinedload(QuoteResponse.reviewed_by)
+        )\
+        .filter(QuoteResponse.id.in_(quote_response_ids))\
+        .all()
+
 def get_quote_responses(db: Session, quote_request_id: str):
     return db.query(QuoteResponse)\
         .options(
@@ -791,60 +890,38 @@ def get_vendor_quote_responses(db: Session, vendor_id: str, skip: int = 0, limit
         .all()
 
 def create_quote_response(db: Session, response_data: QuoteResponseCreate):
-    # Check if this vendor already has a response for this quote request
-    existing = db.query(QuoteResponse)\
-        .filter(
-            QuoteResponse.quote_request_id == response_data.quote_request_id,
-            QuoteResponse.vendor_id == response_data.vendor_id
-        ).first()
-    
-    if existing:
-        # Update existing response
-        for key, value in response_data.dict().items():
-            if value is not None:
-                setattr(existing, key, value)
-        existing.submitted_at = datetime.utcnow()
-        db.commit()
-        db.refresh(existing)
-        
-        # Update the QuoteRequestVendor record
-        vendor_selection = db.query(QuoteRequestVendor)\
-            .filter(
-                QuoteRequestVendor.quote_request_id == response_data.quote_request_id,
-                QuoteRequestVendor.vendor_id == response_data.vendor_id
-            ).first()
-        
-        if vendor_selection:
-            vendor_selection.has_responded = True
-            db.commit()
-        
-        return existing
-    
-    # Create new response
-    db_response = QuoteResponse(
-        id=str(uuid.uuid4()),
-        quote_request_id=response_data.quote_request_id,
-        vendor_id=response_data.vendor_id,
-        quote_amount=response_data.quote_amount,
-        description=response_data.description,
-        delivery_timeline=response_data.delivery_timeline,
-        status="pending_review",
-        submitted_at=datetime.utcnow()
+    # A vendor that already responded to this quote request updates its response
+    now = datetime.utcnow()
+    resubmitted = {
+        key: value for key, value in response_data.dict().items()
+        if value is not None and key not in ("quote_request_id", "vendor_id")
+    }
+    db_response = fast_updates.upsert_returning(
+        db, QuoteResponse,
+        {
+            "id": str(uuid.uuid4()),
+            "quote_request_id": response_data.quote_request_id,
+            "vendor_id": response_data.vendor_id,
+            "quote_amount": response_data.quote_amount,
+            "description": response_data.description,
+            "delivery_timeline": response_data.delivery_timeline,
+            "status": "pending_review",
+            "submitted_at": now,
+        },
+        ["quote_request_id", "vendor_id"],
+        {**resubmitted, "submitted_at": now, "version": QuoteResponse.version + 1},
     )
-    db.add(db_response)
-    
+
     # Update the QuoteRequestVendor record
-    vendor_selection = db.query(QuoteRequestVendor)\
-        .filter(
+    db.execute(
+        update(QuoteRequestVendor)
+        .where(
             QuoteRequestVendor.quote_request_id == response_data.quote_request_id,
             QuoteRequestVendor.vendor_id == response_data.vendor_id
-        ).first()
-    
-    if vendor_selection:
-        vendor_selection.has_responded = True
-        
-    db.commit()
-    db.refresh(db_response)
+        )
+        .values(has_responded=True)
+    )
+    _commit_fast_update(db, db_response)
     return db_response
 
 def update_quote_response(db: Session, quote_response_id: str, **kwargs):
@@ -856,9 +933,27 @@ def update_quote_response(db: Session, quote_response_id: str, **kwargs):
         db.refresh(db_response)
     return db_response
 
-def review_quote_response(db: Session, quote_response_id: str, status: str, notes: Optional[str], reviewer_id: str):
+def review_quote_response(db: Session, quote_response_id: str, status: str, notes: Optional[str], reviewer_id: str, expected_version: Optional[int] = None):
+    if fast_updates.FAST_UPDATES_ENABLED:
+        now = datetime.utcnow()
+        db_response = fast_updates.update_returning(db, QuoteResponse, quote_response_id, {
+            "status": status,
+            "notes": notes,
+            "reviewed_by_id": reviewer_id,
+            "reviewed_at": now,
+        }, expected_version, "Quote response")
+        # If accepting this quote, update the quote request status
+        if db_response and status == "accepted":
+            db.execute(
+                update(QuoteRequest)
+                .where(QuoteRequest.id == db_response.quote_request_id)
+                .values(status="fulfilled", completed_date=now)
+            )
+        return _commit_fast_update(db, db_response)
+
     db_response = db.query(QuoteResponse).filter(QuoteResponse.id == quote_response_id).first()
     if db_response:
+        versioning.check_version(db_response, expected_version, "Quote response")
         db_response.status = status
         db_response.notes = notes
         db_response.reviewed_by_id = reviewer_id
@@ -885,7 +980,7 @@ def delete_quote_response(db: Session, quote_response_id: str):
 
 # Add after the existing quote request functions
 
-def get_vendor_quote_requests(db: Session, vendor_id: str, skip: int = 0, limit: int = 100, status: str = None):
+def get_vendor_quote_requests(db: Session, vendor_id: str, skip: int = 0, limit: int = 100, status: str = None, options: Optional[list] = None):
     """Get quote requests where a specific vendor is selected"""
     query = db.query(QuoteRequest).join(QuoteRequestVendor).filter(
         QuoteRequestVendor.vendor_id == vendor_id
@@ -895,10 +990,100 @@ def get_vendor_quote_requests(db: Session, vendor_id: str, skip: int = 0, limit:
         query = query.filter(QuoteRequest.status == status)
     
     # Eagerly load related data
-    query = query.options(
+    query = query.options(*(options or [
         joinedload(QuoteRequest.created_by),
         joinedload(QuoteRequest.vendor_selections),
         joinedload(QuoteRequest.responses)
-    )
+    ]))
     
-    return query.order_by(desc(QuoteRequest.created_at)).offset(skip).limit(limit).all()
\ No newline at end of file
+    return query.order_by(desc(QuoteRequest.created_at)).offset(skip).limit(limit).all()
+
+# Upload Session CRUD operations
+def get_upload_session(db: Session, session_id: str):
+    return db.query(UploadSession).filter(UploadSession.id == session_id).first()
+
+def create_upload_session(db: Session, session_data: UploadSessionCreate, user_id: str):
+    db_session = UploadSession(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        filename=session_data.filename,
+        content_type=session_data.content_type,
+        total_size=session_data.total_size,
+        received_bytes=0,
+        status="in_progress",
+        created_at=datetime.utcnow()
+    )
+    db.add(db_session)
+    db.commit()
+    db.refresh(db_session)
+    return db_session
+
+def update_upload_session(db: Session, session_id: str, **kwargs):
+    db_session = db.query(UploadSession).filter(UploadSession.id == session_id).first()
+    if db_session:
+        for key, value in kwargs.items():
+            setattr(db_session, key, value)
+        db.commit()
+        db.refresh(db_session)
+    return db_session
+
+def get_attachable_uploads(db: Session, upload_ids: List[str], user_id: str):
+    """Get completed uploads owned by the user that are not yet attached to a complaint"""
+    if not upload_ids:
+        return []
+    return db.query(UploadSession)\
+        .filter(
+            UploadSession.id.in_(upload_ids),
+            UploadSession.user_id == user_id,
+            UploadSession.status == "completed",
+            UploadSession.complaint_id.is_(None)
+        )\
+        .all()
+
+def attach_uploads_to_complaint(db: Session, upload_ids: List[str], complaint_id: str, user_id: str):
+    """Claim the user's completed, unattached uploads for a complaint; returns how many were claimed"""
+    if not upload_ids:
+        return 0
+    count = db.query(UploadSession)\
+        .filter(
+            UploadSession.id.in_(upload_ids),
+            UploadSession.user_id == user_id,
+            UploadSession.status == "completed",
+            UploadSession.complaint_id.is_(None)
+        )\
+        .update({UploadSession.complaint_id: complaint_id}, synchronize_session=False)
+    db.commit()
+    return count
+
+def get_expired_upload_sessions(db: Session, cutoff: datetime):
+    """IDs of in-progress uploads that have not received a chunk since `cutoff`"""
+    return [
+        session_id for session_id, in db.query(UploadSession.id)
+        .filter(UploadSession.status == "in_progress", UploadSession.updated_at < cutoff)
+    ]
+
+def expire_upload_session(db: Session, session_id: str, cutoff: datetime) -> bool:
+    """Abort an upload if it is still in progress and idle since `cutoff`"""
+    count = db.query(UploadSession)\
+        .filter(
+            UploadSession.id == session_id,
+            UploadSession.status == "in_progress",
+            UploadSession.updated_at < cutoff
+        )\
+        .update({UploadSession.status: "aborted"}, synchronize_session=False)
+    db.commit()
+    return count == 1
+
+def get_in_progress_upload_ids(db: Session, session_ids: List[str]):
+    if not session_ids:
+        return set()
+    return {
+        session_id for session_id, in db.query(UploadSession.id)
+        .filter(UploadSession.id.in_(session_ids), UploadSession.status == "in_progress")
+    }
+
+def get_complaint_uploads(db: Session, complaint_id: str):
+    return db.query(UploadSession)\
+        .filter(UploadSession.complaint_id == complaint_id)\
+        .order_by(UploadSession.completed_at)\
+        .all()
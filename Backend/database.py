@@ -1,10 +1,12 @@
 import os
 import sys
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from unit_of_work import UnitOfWorkSession
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -49,6 +51,17 @@ if DB_TYPE == "sqlite":
         connect_args={"check_same_thread": False},
         echo=False
     )
+
+    # pysqlite only opens a transaction before the first write, so a SAVEPOINT
+    # taken before any write would start a transaction of its own that RELEASE
+    # commits. Emit the BEGIN ourselves first, as SQLAlchemy's pysqlite recipe
+    # does from its "begin" event - but only ahead of a savepoint: a BEGIN on
+    # every transaction would make reads hold locks, and concurrent writers
+    # that had read first would fail with "database is locked".
+    @event.listens_for(engine, "savepoint")
+    def _begin_before_savepoint(connection, name):
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN")
 else:
     # MySQL-specific parameters
     engine = create_engine(
@@ -57,8 +70,9 @@ else:
         pool_pre_ping=True
     )
 
-# Create a SessionLocal class for database sessions
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create a SessionLocal class for database sessions; commits inside a unit of
+# work (see unit_of_work.py) are deferred to the end of the request
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=UnitOfWorkSession)
 
 # Create a Base class for declarative models
 Base = declarative_base() 
\ No newline at end of file
@@ -13,11 +13,48 @@ def perform_maintenance():
         
         # 1. Archive old notifications (older than 30 days)
         archive_date = (datetime.utcnow() - timedelta(days=30)).strftime('%Y-%m-%d')
+        now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+        has_change_log = cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='change_log'"
+        ).fetchone() is not None
+        if has_change_log:
+            # Leave tombstones so delta-syncing clients drop archived notifications
+            cursor.execute("""
+                INSERT INTO change_log (table_name, row_id, owner_id, operation, changed_at)
+                SELECT 'notifications', id, user_id, 'delete', ?
+                FROM notifications
+                WHERE created_at < ? AND read = 1
+            """, (now, archive_date))
         cursor.execute("""
             DELETE FROM notifications 
             WHERE created_at < ? AND read = 1
         """, (archive_date,))
-        print(f"Archived {cursor.rowcount} old notifications")
+        archived = cursor.rowcount
+        print(f"Archived {archived} old notifications")
+        
+        if has_change_log:
+            if archived:
+                # Invalidate cached notification lists (ETags)
+                cursor.execute("""
+                    UPDATE table_versions SET version = version + 1, updated_at = ?
+                    WHERE table_name = 'notifications'
+                """, (now,))
+            
+            # Prune delta sync history older than 30 days; clients with an
+            # older cursor get 410 Gone and reload the full list
+            last_pruned = cursor.execute(
+                "SELECT MAX(id) FROM change_log WHERE changed_at < ?", (archive_date,)
+            ).fetchone()[0]
+            if last_pruned:
+                cursor.execute("DELETE FROM change_log WHERE id <= ?", (last_pruned,))
+                print(f"Pruned {cursor.rowcount} change log entries")
+                cursor.execute("""
+                    INSERT INTO table_versions (table_name, version, updated_at)
+                    VALUES ('change_log', ?, ?)
+                    ON CONFLICT(table_name) DO UPDATE SET
+                        version = MAX(version, excluded.version),
+                        updated_at = excluded.updated_at
+                """, (last_pruned, now))
         
         # 2. Clean up any orphaned records
         cursor.execute("PRAGMA foreign_key_check")
@@ -29,6 +66,9 @@ def perform_maintenance():
                 f.write(f"\n--- Maintenance run: {datetime.now()} ---\n")
                 json.dump(orphaned, f, indent=2)
         
+        # VACUUM cannot run inside the transaction opened by the deletes above
+        conn.commit()
+        
         # 3. Optimize database
         print("Optimizing database...")
         cursor.execute("PRAGMA optimize")
@@ -9,7 +9,7 @@ import smtplib
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from jinja2 import Template
 import aiosmtplib
 from dotenv import load_dotenv
@@ -263,6 +263,74 @@ This is an automated message. Please do not reply to this email.
             logger.error(f"Failed to send credentials email to {user_data.get('email', 'Unknown')}: {str(e)}")
             return False
 
+    def generate_quote_invitation_email_text(self, invitation: Dict[str, Any]) -> str:
+        """Generate plain text email content for a quote request invitation."""
+        
+        template_text = """
+IT Inventory System - Request for Quotation
+
+Hello {{ name }},
+
+You have been invited to submit a quote for the following request:
+
+{{ title }}
+==================
+{{ description }}
+{% if requirements %}
+Requirements: {{ requirements }}
+{% endif %}{% if due_date %}
+Please respond by: {{ due_date }}
+{% endif %}
+Log in to the vendor portal to submit your quote: {{ login_url }}
+
+Best regards,
+IT Inventory Management Team
+
+---
+This is an automated message. Please do not reply to this email.
+        """
+        
+        return Template(template_text).render(login_url=self.login_url, **invitation)
+
+    async def send_quote_invitation_emails(self, invitations: List[Dict[str, Any]]) -> int:
+        """
+        Send quote request invitations over a single SMTP connection.
+        
+        Args:
+            invitations: One dictionary per vendor (name, email, title, description, requirements, due_date)
+            
+        Returns:
+            int: Number of emails sent
+        """
+        if not self.enabled:
+            logger.warning("Email service disabled. Cannot send quote invitations.")
+            return 0
+        
+        sent = 0
+        try:
+            async with aiosmtplib.SMTP(
+                hostname=self.smtp_server,
+                port=self.smtp_port,
+                start_tls=True,
+                username=self.smtp_username,
+                password=self.smtp_password,
+            ) as smtp:
+                for invitation in invitations:
+                    message = MIMEText(self.generate_quote_invitation_email_text(invitation), "plain")
+                    message["Subject"] = f"Request for Quotation: {invitation.get('title', '')} - IT Inventory System"
+                    message["From"] = f"{self.sender_name} <{self.sender_email}>"
+                    message["To"] = invitation.get("email", "")
+                    try:
+                        await smtp.send_message(message)
+                        sent += 1
+                    except Exception as e:
+                        logger.error(f"Failed to send quote invitation to {invitation.get('email', 'Unknown')}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Failed to send quote invitations: {str(e)}")
+        
+        logger.info(f"Sent {sent} of {len(invitations)} quote invitation emails")
+        return sent
+
     def test_email_configuration(self) -> Dict[str, Any]:
         """
         Test email configuration without sending an actual email.
@@ -304,6 +372,10 @@ async def send_vendor_credentials(vendor_data: Dict[str, Any]) -> bool:
     """Send credentials email to a new vendor."""
     return await email_service.send_credentials_email("vendor", vendor_data)
 
+async def send_quote_invitations(invitations: List[Dict[str, Any]]) -> int:
+    """Send quote request invitations to a batch of vendors."""
+    return await email_service.send_quote_invitation_emails(invitations)
+
 def get_email_configuration_status() -> Dict[str, Any]:
     """Get email service configuration status."""
     return email_service.test_email_configuration() 
\ No newline at end of file
@@ -0,0 +1,235 @@
+"""
+Opt-in fast response path for the large list endpoints.
+
+When FAST_RESPONSES=true:
+- list endpoints serialize rows in one pass with precompiled Pydantic v2
+  TypeAdapters (validation and JSON encoding both run in pydantic-core)
+  instead of FastAPI's per-item validate / jsonable_encoder / json.dumps,
+- orjson becomes the default response class for every other endpoint,
+- responses above COMPRESSION_MINIMUM_SIZE bytes are compressed with Brotli
+  when the client accepts it, otherwise with gzip.
+
+orjson and brotli are optional; without them the JSON path falls back to
+the standard response class and compression falls back to gzip.
+"""
+
+import gzip
+import io
+import os
+from typing import Any, List, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import schemas
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+FAST_RESPONSES_ENABLED = os.getenv("FAST_RESPONSES", "false").lower() == "true"
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = 6
+# Quality 11 is meant for static assets; 4-5 is the usual choice for dynamic JSON
+BROTLI_QUALITY = 4
+
+# Only text-like payloads are worth compressing; images and archives served
+# from /uploads are already compressed.
+COMPRESSIBLE_CONTENT_TYPES = ("application/json", "text/")
+
+# Precompiled adapters for the list endpoints
+complaint_list_adapter = TypeAdapter(List[schemas.ComplaintResponse])
+asset_list_adapter = TypeAdapter(List[schemas.AssetResponse])
+employee_list_adapter = TypeAdapter(List[schemas.EmployeeResponse])
+quote_request_list_adapter = TypeAdapter(List[schemas.QuoteRequestDetailResponse])
+quote_request_summary_list_adapter = TypeAdapter(List[schemas.QuoteRequestSummaryResponse])
+
+
+def get_default_response_class():
+    """ORJSONResponse when the fast path is on and orjson is installed."""
+    if FAST_RESPONSES_ENABLED and orjson is not None:
+        from fastapi.responses import ORJSONResponse
+        return ORJSONResponse
+    return JSONResponse
+
+
+def serialize_list(adapter: TypeAdapter, rows: List[Any]) -> bytes:
+    """Validate ORM rows and encode them to JSON bytes in one pass."""
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def list_response(adapter: TypeAdapter, rows: List[Any], response: Optional[Response] = None):
+    """
+    Return the rows as a pre-serialized JSON response on the fast path.
+    Otherwise the rows are returned unchanged for FastAPI's response_model.
+    Headers already set on the endpoint's injected `response` are carried over.
+    """
+    if not FAST_RESPONSES_ENABLED:
+        return rows
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=serialize_list(adapter, rows), media_type="application/json", headers=headers)
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Encodings the Accept-Encoding header allows, i.e. without a q-value of 0"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """Pick the response encoding from the Accept-Encoding header."""
+    accepted = _accepted_encodings(accept_encoding)
+    if "br" in accepted and brotli is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+
+class CompressionMiddleware:
+    """
+    Brotli / gzip response compression with a minimum size threshold.
+    Mirrors Starlette's GZipMiddleware, adding Brotli and skipping payloads
+    that are not text-like.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+            if encoding:
+                responder = CompressionResponder(self.app, encoding, self.minimum_size)
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = unattached_send
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.buffer = io.BytesIO()
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    def _start_compressor(self):
+        if self.encoding == "br":
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self.compressor = gzip.GzipFile(mode="wb", fileobj=self.buffer, compresslevel=GZIP_LEVEL)
+
+    def _compress(self, body: bytes, finish: bool) -> bytes:
+        if self.encoding == "br":
+            data = self.compressor.process(body)
+            if finish:
+                data += self.compressor.finish()
+            return data
+
+        self.compressor.write(body)
+        if finish:
+            self.compressor.close()
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Don't send the initial message until we've determined how to
+            # modify the outgoing headers correctly.
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if len(body) < self.minimum_size and not more_body:
+                # Don't apply compression to small outgoing responses.
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self._start_compressor()
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                # Standard response.
+                message["body"] = self._compress(body, finish=True)
+                headers["Content-Length"] = str(len(message["body"]))
+            else:
+                # Initial body in streaming response.
+                del headers["Content-Length"]
+                message["body"] = self._compress(body, finish=False)
+
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if self.compressor is None:
+            # Small response already sent uncompressed
+            await self.send(message)
+            return
+
+        # Remaining body in streaming response.
+        message["body"] = self._compress(body, finish=not more_body)
+        await self.send(message)
+
+
+async def unattached_send(message: Message) -> None:
+    raise RuntimeError("send awaitable not set")  # pragma: no cover
@@ -0,0 +1,201 @@
+"""
+Single-statement update and upsert paths.
+
+update_complaint, update_asset, mark_notification_read and
+review_quote_response used to read the row, set its attributes, flush the
+UPDATE and read the row again after the commit expired it. With
+FAST_UPDATES=true (the default) they issue one
+UPDATE ... WHERE id = ? [AND version = ?] RETURNING <row> instead and
+commit without expiring the returned object. Backends without UPDATE ...
+RETURNING (MySQL) run the UPDATE and read the row back by primary key.
+
+The version column is bumped in the statement itself; when the expected
+version does not match, no row comes back and a single version lookup
+tells a missing row (None) from a VersionConflict.
+
+Quote responses and vendor selections are written with upsert_returning():
+one INSERT ... ON CONFLICT (the unique key) DO UPDATE ... RETURNING, or
+INSERT ... ON DUPLICATE KEY UPDATE plus a lookup on MySQL, so concurrent
+submissions never create duplicates and need no read beforehand.
+insert_ignoring_conflicts() inserts many rows in one statement, skipping
+those whose unique key already exists.
+
+Bulk statements bypass the flush, so the session listeners that keep
+derived tables in step look at the rows such a statement is about to
+change. affected_rows() reads them once per statement, whole, and shares
+them between the listeners; statements the fast paths issue also carry
+the primary key in the affected_ids execution option, so listeners that
+only need ids never query.
+"""
+
+import os
+from typing import List, Optional
+
+from sqlalchemy import and_, event, inspect, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql.elements import BindParameter, ClauseElement
+
+from versioning import VersionConflict
+
+FAST_UPDATES_ENABLED = os.getenv("FAST_UPDATES", "true").lower() == "true"
+
+
+def supports_returning(db: Session) -> bool:
+    return db.get_bind().dialect.update_returning
+
+
+def column_values(model, values: dict) -> Optional[dict]:
+    """`values` if every key is a column of `model`, else None (use the ORM path)"""
+    columns = model.__table__.c
+    if all(key in columns for key in values):
+        return values
+    return None
+
+
+def statement_values(statement) -> dict:
+    """Column name -> value set by an UPDATE; literals are unwrapped from their bind parameter"""
+    return {
+        getattr(column, "key", column): value.value if isinstance(value, BindParameter) else value
+        for column, value in (getattr(statement, "_values", None) or {}).items()
+    }
+
+
+def is_expression(value) -> bool:
+    """Whether an UPDATE value is computed by the database (e.g. version + 1)"""
+    return isinstance(value, ClauseElement)
+
+
+def affected_ids(orm_execute_state) -> Optional[List[str]]:
+    """Primary keys targeted by a statement from update_returning, else None"""
+    return orm_execute_state.execution_options.get("affected_ids")
+
+
+def affected_rows(orm_execute_state) -> List[dict]:
+    """Rows a bulk UPDATE or DELETE is about to change, as they are before it runs."""
+    session = orm_execute_state.session
+    cached = session.info.get("bulk_preimage")
+    if cached is not None and cached[0] is orm_execute_state:
+        return cached[1]
+    statement = orm_execute_state.statement
+    lookup = select(*statement.table.c)
+    if statement.whereclause is not None:
+        lookup = lookup.where(statement.whereclause)
+    rows = [dict(row._mapping) for row in session.execute(lookup)]
+    # Keyed by the execution state itself, which lives as long as the statement runs
+    session.info["bulk_preimage"] = (orm_execute_state, rows)
+    return rows
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _drop_preimage(session):
+    session.info.pop("bulk_preimage", None)
+
+
+def _load_returned(db: Session, model, row):
+    """The session's object for a row returned by an UPDATE or INSERT, holding the returned values"""
+    mapper = inspect(model)
+    row_id = tuple(row._mapping[column] for column in mapper.primary_key)
+    obj = db.identity_map.get(identity_key(model, row_id))
+    if obj is None:
+        obj = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        set_committed_value(obj, attr.key, row._mapping[attr.columns[0]])
+    if inspect(obj).key is None:
+        make_transient_to_detached(obj)
+        db.add(obj)
+    else:
+        # Relationships may follow a changed foreign key; they load again on access
+        db.expire(obj, [relationship.key for relationship in mapper.relationships])
+    return obj
+
+
+def update_returning(db: Session, model, row_id: str, values: dict, expected_version: Optional[int] = None, resource: Optional[str] = None):
+    """
+    Update one row by primary key and return it, loaded into the session.
+    Returns None when the row does not exist; raises VersionConflict when
+    expected_version is given and does not match. The caller commits.
+    """
+    statement = update(model).where(model.id == row_id)
+    if "version" in model.__table__.c:
+        if expected_version is not None:
+            statement = statement.where(model.version == expected_version)
+        values = {**values, "version": model.version + 1}
+    statement = statement.values(**values).execution_options(
+        synchronize_session=False, affected_ids=[row_id]
+    )
+
+    if supports_returning(db):
+        row = db.execute(statement.returning(*model.__table__.c)).first()
+        obj = _load_returned(db, model, row) if row is not None else None
+    else:
+        result = db.execute(statement)
+        obj = db.get(model, row_id, populate_existing=True) if result.rowcount else None
+
+    if obj is None and expected_version is not None:
+        current_version = db.scalar(select(model.version).where(model.id == row_id))
+        if current_version is not None:
+            raise VersionConflict(resource or model.__name__, expected_version, current_version)
+    return obj
+
+
+def commit(db: Session):
+    """Commit without expiring the session's objects, so rows returned by
+    update_returning need no refresh to be serialized."""
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+
+# Dialects with INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE
+UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql, "mysql": mysql, "mariadb": mysql}
+
+
+def upsert_returning(db: Session, model, values: dict, key_columns: List[str], update_values: Optional[dict] = None):
+    """
+    Insert a row, or update the row with the same key_columns (a unique key)
+    with update_values, and return it loaded into the session. Without
+    update_values an existing row is returned unchanged. The caller commits.
+    """
+    dialect = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    if not update_values:
+        # A no-op update, so the existing row is still returned
+        update_values = {key_columns[0]: getattr(model, key_columns[0])}
+    statement = dialect.insert(model).values(**values)
+    if dialect is not mysql:
+        statement = statement.on_conflict_do_update(index_elements=key_columns, set_=update_values)
+        row = db.execute(statement.returning(*model.__table__.c)).first()
+        return _load_returned(db, model, row)
+
+    # MySQL has no INSERT ... RETURNING; read the row back by its unique key
+    db.execute(statement.on_duplicate_key_update(**update_values))
+    return db.scalars(
+        select(model)
+        .where(and_(*(getattr(model, column) == values[column] for column in key_columns)))
+        .execution_options(populate_existing=True)
+    ).first()
+
+
+def insert_ignoring_conflicts(db: Session, model, rows: List[dict], key_columns: List[str], returning: List[str]) -> Optional[List[tuple]]:
+    """
+    Insert rows in one multi-row INSERT, skipping rows whose key_columns (a
+    unique key) already exist. Returns the `returning` columns of the rows
+    actually inserted, or None on MySQL, which cannot return them. The
+    caller commits.
+    """
+    if not rows:
+        return []
+    dialect = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    statement = dialect.insert(model).values(rows)
+    if dialect is mysql:
+        db.execute(statement.prefix_with("IGNORE"))
+        return None
+    statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+    columns = [getattr(model, column) for column in returning]
+    return [tuple(row) for row in db.execute(statement.returning(*columns))]
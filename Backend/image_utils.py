@@ -0,0 +1,97 @@
+"""
+Image metadata helpers for complaint images.
+
+Reads content hash, file size and pixel dimensions of stored images without
+any imaging dependency - dimensions come straight from the PNG, GIF, JPEG and
+WEBP headers.
+"""
+
+import hashlib
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+
+def read_image_dimensions(path: str) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from the image header, or None if unknown."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(32)
+
+            # PNG: dimensions are in the IHDR chunk
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+
+            # GIF87a / GIF89a: logical screen size
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+
+            # WEBP: lossy (VP8), lossless (VP8L) or extended (VP8X)
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                chunk = head[12:16]
+                if chunk == b"VP8 ":
+                    width, height = struct.unpack("<HH", head[26:30])
+                    return width & 0x3FFF, height & 0x3FFF
+                if chunk == b"VP8L":
+                    bits = struct.unpack("<I", head[21:25])[0]
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b"VP8X":
+                    width = int.from_bytes(head[24:27], "little") + 1
+                    height = int.from_bytes(head[27:30], "little") + 1
+                    return width, height
+                return None
+
+            # JPEG: walk the markers until a start-of-frame segment
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                while True:
+                    byte = f.read(1)
+                    while byte and byte != b"\xff":
+                        byte = f.read(1)
+                    while byte == b"\xff":
+                        byte = f.read(1)
+                    if not byte:
+                        return None
+                    marker = byte[0]
+                    if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                        continue
+                    length_bytes = f.read(2)
+                    if len(length_bytes) < 2:
+                        return None
+                    length = struct.unpack(">H", length_bytes)[0]
+                    if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                        frame = f.read(5)
+                        if len(frame) < 5:
+                            return None
+                        height, width = struct.unpack(">HH", frame[1:5])
+                        return width, height
+                    f.seek(length - 2, 1)
+    except (OSError, struct.error):
+        return None
+
+    return None
+
+
+def read_image_metadata(path: str) -> Dict[str, Optional[int]]:
+    """
+    Collect content hash, size and dimensions for a stored image.
+    Values are None when the path is not a readable local file.
+    """
+    metadata = {"content_hash": None, "size_bytes": None, "width": None, "height": None}
+
+    if not path or not os.path.isfile(path):
+        return metadata
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+    metadata["content_hash"] = digest.hexdigest()
+    metadata["size_bytes"] = os.path.getsize(path)
+
+    dimensions = read_image_dimensions(path)
+    if dimensions:
+        metadata["width"], metadata["height"] = dimensions
+
+    return metadata
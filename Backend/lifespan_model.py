@@ -0,0 +1,385 @@
+"""
+Local asset lifespan model, trained on the fleet's own history.
+
+Lifetimes follow a Weibull proportional hazards model. Each asset's baseline
+cumulative hazard is (age / expected_lifespan) ** WEIBULL_SHAPE, so an
+average asset reaches the end of its expected lifespan on schedule, and the
+asset's features scale that hazard by exp(coefficients . features):
+
+- complaints per year, and high / critical complaints per year,
+- complaints in the last RECENT_DAYS days,
+- repair cost as a share of the purchase cost,
+- condition (new = 0 ... unusable = 4).
+
+Retired assets are the observed failures, every other asset is censored at
+its current age. The coefficients are fitted by Newton's method on the
+equivalent Poisson likelihood, with one pseudo-failure per asset at its
+expected lifespan (PRIOR_WEIGHT) and a ridge penalty, so a fleet with few
+retirements stays close to the expected lifespans.
+
+Features for the whole fleet come from one aggregated query and every asset
+is scored at once. Predictions are persisted in asset_lifespan_predictions;
+changing an asset's complaints, maintenance records or repair costs marks
+its prediction stale in the same transaction, and stale predictions are
+rescored (with the stored model, without refitting) the next time they are
+read. Run
+
+    python lifespan_model.py
+
+to refit the model and rescore the whole fleet.
+"""
+
+import json
+import math
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+import fast_updates
+from models import Asset, AssetLifespanPrediction, Complaint, LifespanModel, MaintenanceRecord
+
+DEFAULT_LIFESPAN_YEARS = 5
+WEIBULL_SHAPE = 2.0
+PRIOR_WEIGHT = 1.0
+RIDGE_PENALTY = 1.0
+NEWTON_ITERATIONS = 25
+RECENT_DAYS = 90
+
+# Years of age below which complaint rates are not annualized further
+MIN_EXPOSURE_YEARS = 0.25
+
+CONDITION_SCORES = {"new": 0, "good": 1, "fair": 2, "poor": 3, "unusable": 4}
+SEVERE_PRIORITIES = ("high", "critical")
+RETIRED_STATUS = "retired"
+
+FEATURES = ("complaints_per_year", "severe_per_year", "recent_complaints", "repair_ratio", "condition")
+
+# Tables whose changes make an asset's prediction stale -> asset id attribute
+STALE_SOURCES = {
+    "complaints": "asset_id",
+    "maintenance_records": "asset_id",
+    "assets": "id",
+}
+
+# Complaint columns the features read
+COMPLAINT_FEATURE_COLUMNS = {"asset_id", "priority", "date_submitted"}
+
+
+def _pending_assets(session: Session) -> set:
+    return session.info.setdefault("stale_lifespan_assets", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_assets(session, flush_context):
+    pending = _pending_assets(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table_name = getattr(type(obj), "__tablename__", None)
+        attribute = STALE_SOURCES.get(table_name)
+        if attribute is None:
+            continue
+        if table_name == "assets" and obj in session.new:
+            continue
+        history = inspect(obj).attrs[attribute].history
+        for asset_id in (*history.added, *history.unchanged, *history.deleted):
+            if asset_id is not None:
+                pending.add(asset_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changed_assets(orm_execute_state):
+    """Bulk updates and deletes bypass the flush."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    statement = orm_execute_state.statement
+    table_name = statement.table.name
+    attribute = STALE_SOURCES.get(table_name)
+    if attribute is None:
+        return
+    values = fast_updates.statement_values(statement)
+    if table_name == "complaints" and orm_execute_state.is_update and not COMPLAINT_FEATURE_COLUMNS & set(values):
+        return
+
+    pending = _pending_assets(orm_execute_state.session)
+    asset_ids = fast_updates.affected_ids(orm_execute_state) if attribute == "id" else None
+    if asset_ids is None:
+        asset_ids = [row[attribute] for row in fast_updates.affected_rows(orm_execute_state)]
+    pending.update(asset_id for asset_id in asset_ids if asset_id is not None)
+    # A complaint or record moved to another asset changes that asset too
+    new_asset_id = values.get(attribute)
+    if isinstance(new_asset_id, str):
+        pending.add(new_asset_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _mark_predictions_stale(session):
+    session.flush()
+    asset_ids = session.info.pop("stale_lifespan_assets", None)
+    if asset_ids:
+        session.execute(
+            update(AssetLifespanPrediction)
+            .where(AssetLifespanPrediction.asset_id.in_(sorted(asset_ids)))
+            .values(stale=True)
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_assets(session):
+    session.info.pop("stale_lifespan_assets", None)
+
+
+class FleetFeatures:
+    """Feature matrix and survival data, one row per asset."""
+
+    def __init__(self, ids, features, age, lifespan, retired, complaints):
+        self.ids = ids
+        self.features = features
+        self.age = age
+        self.lifespan = lifespan
+        self.retired = retired
+        self.complaints = complaints
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def load_features(db: Session, asset_ids: Optional[Iterable[str]] = None, now: Optional[datetime] = None) -> FleetFeatures:
+    """Aggregate the model features of every asset (or of `asset_ids`) in one query."""
+    now = now or datetime.utcnow()
+    complaints = select(
+        Complaint.asset_id,
+        func.count(Complaint.id).label("complaints"),
+        func.sum(case((Complaint.priority.in_(SEVERE_PRIORITIES), 1), else_=0)).label("severe"),
+        func.sum(case((Complaint.date_submitted >= now - timedelta(days=RECENT_DAYS), 1), else_=0)).label("recent"),
+    ).where(Complaint.asset_id.isnot(None)).group_by(Complaint.asset_id)
+    maintenance = select(
+        MaintenanceRecord.asset_id,
+        func.sum(MaintenanceRecord.cost).label("cost"),
+    ).group_by(MaintenanceRecord.asset_id)
+    if asset_ids is not None:
+        asset_ids = list(asset_ids)
+        complaints = complaints.where(Complaint.asset_id.in_(asset_ids))
+        maintenance = maintenance.where(MaintenanceRecord.asset_id.in_(asset_ids))
+    complaints = complaints.subquery()
+    maintenance = maintenance.subquery()
+
+    condition_score = case(
+        *[(Asset.condition == condition, score) for condition, score in CONDITION_SCORES.items()],
+        else_=CONDITION_SCORES["good"],
+    )
+    query = select(
+        Asset.id,
+        Asset.purchase_date,
+        Asset.expected_lifespan,
+        Asset.purchase_cost,
+        Asset.total_repair_cost,
+        maintenance.c.cost,
+        condition_score,
+        Asset.status == RETIRED_STATUS,
+        complaints.c.complaints,
+        complaints.c.severe,
+        complaints.c.recent,
+    ).outerjoin(complaints, complaints.c.asset_id == Asset.id)\
+        .outerjoin(maintenance, maintenance.c.asset_id == Asset.id)
+    if asset_ids is not None:
+        query = query.where(Asset.id.in_(asset_ids))
+    rows = db.execute(query).all()
+
+    if not rows:
+        return FleetFeatures(
+            np.array([], dtype=object), np.zeros((0, len(FEATURES))), np.zeros(0), np.zeros(0),
+            np.zeros(0, dtype=bool), np.zeros(0, dtype=int),
+        )
+
+    (ids, purchase_date, lifespan, purchase_cost, repair_cost, maintenance_cost,
+     condition, retired, complaint_count, severe, recent) = zip(*rows)
+
+    elapsed = np.datetime64(now, "s") - np.asarray(purchase_date, dtype="datetime64[s]")
+    age = np.clip(np.where(np.isnat(elapsed), 0.0, elapsed.astype(float) / (365.25 * 24 * 3600)), 0, None)
+    lifespan = np.asarray(lifespan, dtype=float)
+    lifespan = np.where(lifespan > 0, lifespan, DEFAULT_LIFESPAN_YEARS)
+    purchase_cost = np.nan_to_num(np.asarray(purchase_cost, dtype=float))
+    repairs = np.maximum(
+        np.nan_to_num(np.asarray(repair_cost, dtype=float)),
+        np.nan_to_num(np.asarray(maintenance_cost, dtype=float)),
+    )
+    complaint_count = np.nan_to_num(np.asarray(complaint_count, dtype=float))
+    exposure = np.maximum(age, MIN_EXPOSURE_YEARS)
+
+    features = np.column_stack([
+        complaint_count / exposure,
+        np.nan_to_num(np.asarray(severe, dtype=float)) / exposure,
+        np.nan_to_num(np.asarray(recent, dtype=float)),
+        np.divide(repairs, purchase_cost, out=np.zeros_like(repairs), where=purchase_cost > 0),
+        np.asarray(condition, dtype=float),
+    ])
+    return FleetFeatures(
+        np.asarray(ids, dtype=object), features, age, lifespan,
+        np.asarray(retired, dtype=bool), complaint_count.astype(int),
+    )
+
+
+def _baseline_hazard(age: np.ndarray, lifespan: np.ndarray) -> np.ndarray:
+    return (age / lifespan) ** WEIBULL_SHAPE
+
+
+def fit(fleet: FleetFeatures) -> dict:
+    """Fit the hazard coefficients; returns the model as a JSON-ready dict."""
+    means = fleet.features.mean(axis=0) if len(fleet) else np.zeros(len(FEATURES))
+    scales = fleet.features.std(axis=0) if len(fleet) else np.ones(len(FEATURES))
+    scales = np.where(scales > 0, scales, 1.0)
+    design = np.column_stack([np.ones(len(fleet)), (fleet.features - means) / scales])
+
+    exposure = _baseline_hazard(fleet.age, fleet.lifespan)
+    events = fleet.retired.astype(float)
+    penalty = RIDGE_PENALTY * np.eye(design.shape[1])
+    penalty[0, 0] = 0.0  # the intercept is held by the prior alone
+
+    coefficients = np.zeros(design.shape[1])
+    for _ in range(NEWTON_ITERATIONS if len(fleet) else 0):
+        risk = np.exp(np.clip(design @ coefficients, -20, 20))
+        # Observed failures plus one pseudo-failure per asset at its expected lifespan
+        residual = (events - exposure * risk) + PRIOR_WEIGHT * (1.0 - risk)
+        weights = (exposure + PRIOR_WEIGHT) * risk
+        gradient = design.T @ residual - penalty @ coefficients
+        hessian = (design * weights[:, None]).T @ design + penalty
+        step = np.linalg.solve(hessian, gradient)
+        coefficients += step
+        if np.abs(step).max() < 1e-8:
+            break
+
+    return {
+        "features": list(FEATURES),
+        "intercept": float(coefficients[0]),
+        "coefficients": dict(zip(FEATURES, coefficients[1:].tolist())),
+        "means": means.tolist(),
+        "scales": scales.tolist(),
+        "shape": WEIBULL_SHAPE,
+    }
+
+
+def score(fleet: FleetFeatures, model: dict) -> Dict[str, np.ndarray]:
+    """Predicted remaining life and 12-month failure probability for every asset."""
+    weights = np.array([model["coefficients"][feature] for feature in FEATURES])
+    standardized = (fleet.features - np.array(model["means"])) / np.array(model["scales"])
+    risk = np.exp(np.clip(model["intercept"] + standardized @ weights, -20, 20))
+
+    shape = model["shape"]
+    hazard_now = (fleet.age / fleet.lifespan) ** shape
+    # Median residual life: the age at which another ln 2 of hazard has accumulated
+    median_age = fleet.lifespan * (hazard_now + math.log(2) / risk) ** (1.0 / shape)
+    hazard_next_year = ((fleet.age + 1.0) / fleet.lifespan) ** shape
+    return {
+        "risk_multiplier": risk,
+        "remaining_months": (median_age - fleet.age) * 12.0,
+        "failure_probability_12m": 1.0 - np.exp(-risk * (hazard_next_year - hazard_now)),
+    }
+
+
+def get_model(db: Session) -> Optional[LifespanModel]:
+    return db.query(LifespanModel).order_by(LifespanModel.id.desc()).first()
+
+
+def _write_predictions(db: Session, fleet: FleetFeatures, model: LifespanModel, replace_all: bool):
+    """Replace the stored predictions of the scored assets (without committing)."""
+    active = ~fleet.retired
+    scores = score(fleet, json.loads(model.coefficients))
+    now = datetime.utcnow()
+
+    if replace_all:
+        db.execute(delete(AssetLifespanPrediction))
+    else:
+        db.execute(delete(AssetLifespanPrediction).where(AssetLifespanPrediction.asset_id.in_(fleet.ids.tolist())))
+
+    rows = [
+        {
+            "asset_id": asset_id,
+            "remaining_months": round(remaining_months, 1),
+            "failure_probability_12m": round(failure_probability, 4),
+            "risk_multiplier": round(risk, 4),
+            "complaint_count": complaint_count,
+            "model_id": model.id,
+            "generated_at": now,
+            "stale": False,
+        }
+        for asset_id, remaining_months, failure_probability, risk, complaint_count in zip(
+            fleet.ids[active].tolist(),
+            scores["remaining_months"][active].tolist(),
+            scores["failure_probability_12m"][active].tolist(),
+            scores["risk_multiplier"][active].tolist(),
+            fleet.complaints[active].tolist(),
+        )
+    ]
+    if rows:
+        db.execute(insert(AssetLifespanPrediction), rows)
+
+
+def train(db: Session) -> LifespanModel:
+    """Refit the model on the whole fleet and rescore every asset."""
+    fleet = load_features(db)
+    model = LifespanModel(
+        coefficients=json.dumps(fit(fleet)),
+        assets=len(fleet),
+        failures=int(fleet.retired.sum()),
+        trained_at=datetime.utcnow(),
+    )
+    db.add(model)
+    db.flush()
+    _write_predictions(db, fleet, model, replace_all=True)
+    db.commit()
+    return model
+
+
+def refresh_stale(db: Session, asset_ids: Optional[List[str]] = None):
+    """
+    Rescore stale predictions and assets without one (all of them, or only
+    those in `asset_ids`) with the stored model. Trains the first model if
+    none exists yet.
+    """
+    model = get_model(db)
+    if model is None:
+        train(db)
+        return
+
+    scored = select(AssetLifespanPrediction.asset_id).where(AssetLifespanPrediction.stale.is_(False))
+    pending = db.query(Asset.id).filter(Asset.status != RETIRED_STATUS, Asset.id.notin_(scored))
+    if asset_ids is not None:
+        pending = pending.filter(Asset.id.in_(asset_ids))
+    pending_ids = [asset_id for asset_id, in pending.all()]
+    if pending_ids:
+        _write_predictions(db, load_features(db, pending_ids), model, replace_all=False)
+        db.commit()
+
+
+def get_predictions(db: Session, asset_ids: Optional[List[str]] = None) -> "OrderedDict[str, AssetLifespanPrediction]":
+    """Up-to-date predictions keyed by asset id, riskiest first."""
+    refresh_stale(db, asset_ids)
+    query = db.query(AssetLifespanPrediction)
+    if asset_ids is not None:
+        query = query.filter(AssetLifespanPrediction.asset_id.in_(asset_ids))
+    predictions = query.order_by(AssetLifespanPrediction.failure_probability_12m.desc()).all()
+    return OrderedDict((prediction.asset_id, prediction) for prediction in predictions)
+
+
+def get_prediction(db: Session, asset_id: str) -> Optional[AssetLifespanPrediction]:
+    return get_predictions(db, [asset_id]).get(asset_id)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, engine
+
+    LifespanModel.__table__.create(bind=engine, checkfirst=True)
+    AssetLifespanPrediction.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        print("🧮 Fitting the asset lifespan model...")
+        model = train(db)
+        print(f"✅ Trained on {model.assets} assets ({model.failures} retired)")
+        for feature, weight in json.loads(model.coefficients)["coefficients"].items():
+            print(f"   {feature}: hazard x{math.exp(weight):.2f} per standard deviation")
+    finally:
+        db.close()
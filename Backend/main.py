@@ -1,10 +1,13 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, Request, Response
 from fastapi.security import HTTPBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy import func, desc, and_, or_
-from typing import List, Optional
+from typing import List, Optional, Union
 import crud, models, schemas, auth
 from database import SessionLocal, engine
 from auth import get_current_active_user
@@ -12,11 +15,11 @@ from models import User
 import os
 import uuid
 import json
+import asyncio
 from datetime import datetime, timedelta
 import base64
 from pathlib import Path
 from fastapi import BackgroundTasks
-import requests
 
 # Import local modules
 import crud
@@ -37,16 +40,117 @@ from models import (
     QuoteRequestStatus, QuoteResponseStatus, Notification
 )
 # Import email service and password utilities
-from email_service import send_employee_credentials, send_vendor_credentials, get_email_configuration_status
+from email_service import send_employee_credentials, send_vendor_credentials, send_quote_invitations, get_email_configuration_status
 from password_utils import generate_employee_password, generate_vendor_password
+import upload_service
+import fast_responses
+import change_tracking
+import sparse_fields
+import batch_requests
+import portal_bootstrap
+import stat_counters
+import complaint_events
+import asset_analytics
+import tco_engine
+import lifespan_model
+import ai_client
+import ai_predictions
+import work_queue
+import auto_assign
+import bulk_transitions
+import vendor_invitations
+import versioning
+import unit_of_work
+import add_version_columns_migration
+import migrate_complaint_images
+import add_quote_unique_constraints_migration
 
 # Initialize FastAPI app
-app = FastAPI(title="IT Inventory Management System", version="1.0.0")
+app = FastAPI(
+    title="IT Inventory Management System",
+    version="1.0.0",
+    default_response_class=fast_responses.get_default_response_class()
+)
 
 # Configure image upload directory
 UPLOAD_DIR = Path("uploads/complaint_images")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Quote submissions and vendor selections upsert on unique (quote request, vendor)
+# keys. Adding them deletes duplicate rows, so it is left to the operator;
+# checked before any schema change so a refused start leaves the database as it was
+_missing_quote_keys = add_quote_unique_constraints_migration.missing_unique_keys(engine)
+if _missing_quote_keys:
+    raise RuntimeError(
+        f"Missing unique (quote_request_id, vendor_id) keys on {', '.join(_missing_quote_keys)}; "
+        "run add_quote_unique_constraints_migration.py before starting the application"
+    )
+
+# Resumable upload sessions for complaint attachments
+models.UploadSession.__table__.create(bind=engine, checkfirst=True)
+
+# Version columns for optimistic concurrency on complaints, assets and quote responses
+add_version_columns_migration.migrate_database(engine)
+
+# Change counters backing the ETag / Last-Modified headers of list endpoints,
+# and the change log behind ?updated_since= delta sync
+models.TableVersion.__table__.create(bind=engine, checkfirst=True)
+models.ChangeLog.__table__.create(bind=engine, checkfirst=True)
+
+# Append-only complaint workflow log
+models.ComplaintEvent.__table__.create(bind=engine, checkfirst=True)
+
+# ATS work queue, filled from the ATS inbox on first start
+models.ATSQueueItem.__table__.create(bind=engine, checkfirst=True)
+with SessionLocal() as _db:
+    work_queue.ensure_queue(_db)
+
+# Audit trail of automatic complaint assignments
+models.ComplaintAssignment.__table__.create(bind=engine, checkfirst=True)
+
+# Precomputed dashboard statistics, built from full scans on first start
+models.StatCounter.__table__.create(bind=engine, checkfirst=True)
+with SessionLocal() as _db:
+    stat_counters.ensure_counters(_db)
+
+# Local lifespan model and its persisted predictions
+models.LifespanModel.__table__.create(bind=engine, checkfirst=True)
+models.AssetLifespanPrediction.__table__.create(bind=engine, checkfirst=True)
+
+# Stored AI predictions, refreshed by the background job
+models.AssetAIPrediction.__table__.create(bind=engine, checkfirst=True)
+
+# Complaint images, backfilled once from the legacy complaints.images column.
+# Runs last: its commits go through the listeners writing the tables above.
+# Only a committed backfill is marked done, so later runs retry a failed one
+# but never bring back images removed after it
+if not migrate_complaint_images.is_migrated():
+    if not migrate_complaint_images.migrate_complaint_images():
+        raise RuntimeError("Backfilling complaint_images from complaints.images failed; see the error above")
+
+@app.on_event("startup")
+async def schedule_ai_predictions():
+    if ai_predictions.AI_PREDICTION_JOB_INTERVAL_SECONDS > 0:
+        app.state.ai_prediction_schedule = asyncio.create_task(ai_predictions.run_schedule())
+
+@app.on_event("startup")
+async def schedule_upload_sweep():
+    if upload_service.UPLOAD_SWEEP_INTERVAL_SECONDS > 0:
+        app.state.upload_sweep = asyncio.create_task(upload_service.run_sweeper())
+
+@app.on_event("shutdown")
+async def stop_upload_sweep():
+    sweep = getattr(app.state, "upload_sweep", None)
+    if sweep is not None:
+        sweep.cancel()
+
+@app.on_event("shutdown")
+async def close_ai_client():
+    schedule = getattr(app.state, "ai_prediction_schedule", None)
+    if schedule is not None:
+        schedule.cancel()
+    await ai_client.ai_client.close()
+
 # Mount static files for serving uploaded images
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
@@ -57,8 +161,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Sync-Cursor", "Upload-Offset", "X-Query-Count", "ETag"],
 )
 
+# Writes based on a stale version, or that lost a race to another writer
+@app.exception_handler(versioning.VersionConflict)
+async def version_conflict_handler(request: Request, exc: versioning.VersionConflict):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": f"{exc.resource} was modified by another request", "current_version": exc.current_version},
+        headers={"ETag": versioning.etag(exc.current_version)},
+    )
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "The record was modified by another request; reload it and try again"},
+    )
+
+# Compress large responses when the fast response path is enabled
+if fast_responses.FAST_RESPONSES_ENABLED:
+    app.add_middleware(fast_responses.CompressionMiddleware, minimum_size=fast_responses.COMPRESSION_MINIMUM_SIZE)
+
 # Database session dependency
 def get_db():
     db = SessionLocal()
@@ -117,6 +242,37 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
+@app.get("/portal/bootstrap", response_model=dict)
+async def get_portal_bootstrap(
+    response: Response,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Everything the caller's portal shows on its landing screen: the user,
+    notifications, the role's inbox with counts, and role-specific extras
+    (assets for employees, quote requests for vendors, totals for admins).
+    """
+    payload, query_count = await portal_bootstrap.build_bootstrap(current_user)
+    response.headers["X-Query-Count"] = str(query_count)
+    budget = portal_bootstrap.QUERY_BUDGETS.get(current_user.role)
+    if budget is not None:
+        response.headers["X-Query-Budget"] = str(budget)
+    return payload
+
+@app.post("/batch", response_model=schemas.BatchResponse)
+async def execute_batch(
+    request: Request,
+    batch: schemas.BatchRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Run several GET requests against the API in one call. Sub-requests run in
+    order as the authenticated user, each with its own DB session.
+    """
+    batch_requests.validate_batch(batch.requests)
+    responses = await batch_requests.run_batch(request, batch.requests, current_user)
+    return {"responses": responses}
+
 # Add a new endpoint to get employee by email
 @app.get("/employees/by-email/{email}", response_model=schemas.EmployeeResponse)
 async def get_employee_by_email(
@@ -133,9 +289,11 @@ async def get_employee_by_email(
 async def get_all_employees(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    field_set = sparse_fields.parse_fields(fields, schemas.EmployeeResponse)
     # Debug info
     print(f"Fetching all employees")
     print(f"Current user: ID={current_user.id}, email={current_user.email}, role={current_user.role}")
@@ -148,9 +306,11 @@ async def get_all_employees(
             detail="Not authorized to view all employees"
         )
     
-    employees = crud.get_employees(db, skip=skip, limit=limit)
+    employees = crud.get_employees(db, skip=skip, limit=limit, options=sparse_fields.load_options(Employee, schemas.EmployeeResponse, field_set))
     print(f"Found {len(employees)} employees")
-    return employees
+    if field_set:
+        return sparse_fields.sparse_response(schemas.EmployeeResponse, employees, field_set)
+    return fast_responses.list_response(fast_responses.employee_list_adapter, employees)
 
 # Create a new model that extends EmployeeResponse for just the creation response
 class EmployeeCreateResponse(schemas.EmployeeResponse):
@@ -158,6 +318,7 @@ class EmployeeCreateResponse(schemas.EmployeeResponse):
     username: Optional[str] = None
 
 @app.post("/employees/", response_model=EmployeeCreateResponse)
+@unit_of_work.atomic
 async def create_employee(
     employee_data: schemas.EmployeeCreate,
     background_tasks: BackgroundTasks,
@@ -267,6 +428,7 @@ async def update_employee(
     return updated_employee
 
 @app.delete("/employees/{employee_id}")
+@unit_of_work.atomic
 async def delete_employee(
     employee_id: str,
     db: Session = Depends(get_db),
@@ -305,18 +467,72 @@ async def delete_employee(
     print(f"Successfully deleted employee: {employee_id}")
     return {"message": "Employee deleted successfully"}
 
+# Batch fetch-by-ids: resolve many related entities in one IN query
+MAX_BATCH_IDS = 200
+
+def parse_batch_ids(ids: str) -> List[str]:
+    """Split ?ids=a,b,c into unique ids, keeping their order."""
+    batch_ids = list(dict.fromkeys(entity_id.strip() for entity_id in ids.split(",") if entity_id.strip()))
+    if not batch_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No ids given")
+    if len(batch_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} ids can be fetched per request"
+        )
+    return batch_ids
+
+def batch_result(batch_ids: List[str], rows, is_authorized=None) -> dict:
+    """
+    Key the loaded rows by id. Ids that do not exist or that the caller may
+    not view map to null, with the reason in `errors`.
+    """
+    found = {row.id: row for row in rows}
+    items, errors = {}, {}
+    for entity_id in batch_ids:
+        row = found.get(entity_id)
+        if row is None:
+            errors[entity_id] = "not_found"
+        elif is_authorized is not None and not is_authorized(row):
+            errors[entity_id] = "forbidden"
+        else:
+            items[entity_id] = row
+            continue
+        items[entity_id] = None
+    return {"items": items, "errors": errors}
+
+def can_view_employee(current_user: User, employee: Employee) -> bool:
+    # Users can access their own records, or admins/managers can access any employee
+    return (
+        current_user.role in ["admin", "manager", "assistant_manager"] or 
+        current_user.email == employee.email
+    )
+
+@app.get("/employees/batch", response_model=schemas.EmployeeBatchResponse)
+async def get_employees_batch(
+    ids: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get several employees by ID (?ids=a,b,c)"""
+    batch_ids = parse_batch_ids(ids)
+    employees = crud.get_employees_by_ids(db, batch_ids)
+    return batch_result(batch_ids, employees, lambda employee: can_view_employee(current_user, employee))
+
 @app.get("/employees/{employee_id}", response_model=schemas.EmployeeResponse)
 async def get_employee_by_id(
     employee_id: str,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    field_set = sparse_fields.parse_fields(fields, schemas.EmployeeResponse)
     # Debug info
     print(f"Fetching employee with ID: {employee_id}")
     print(f"Current user: ID={current_user.id}, email={current_user.email}, role={current_user.role}")
     
     # Get the employee from the database
-    employee = crud.get_employee(db, employee_id)
+    employee = crud.get_employee(db, employee_id, options=sparse_fields.load_options(Employee, schemas.EmployeeResponse, field_set))
     if not employee:
         print(f"Employee not found with ID: {employee_id}")
         raise HTTPException(status_code=404, detail="Employee not found")
@@ -324,16 +540,12 @@ async def get_employee_by_id(
     print(f"Found employee: {employee.id}, {employee.name}, {employee.email}")
     
     # Verify access permissions
-    # Users can access their own records, or admins/managers can access any employee
-    authorized = (
-        current_user.role in ["admin", "manager", "assistant_manager"] or 
-        current_user.email == employee.email
-    )
-    
-    if not authorized:
+    if not can_view_employee(current_user, employee):
         print(f"Authorization failed: User {current_user.email} tried to access employee {employee.email}")
         raise HTTPException(status_code=403, detail="Not authorized to view this employee's details")
     
+    if field_set:
+        return sparse_fields.sparse_response(schemas.EmployeeResponse, employee, field_set, many=False)
     return employee
 
 @app.get("/employees/{employee_id}/user", response_model=schemas.UserResponse)
@@ -369,6 +581,7 @@ async def get_user_by_employee_id(
 
 # Complaint management endpoints - Employee Portal
 @app.post("/complaints/", response_model=schemas.ComplaintResponse)
+@unit_of_work.atomic
 async def create_new_complaint(
     complaint: schemas.ComplaintCreate,
     db: Session = Depends(get_db),
@@ -406,9 +619,17 @@ async def create_new_complaint(
         
         if not complaint.description or len(complaint.description.strip()) < 10:
             raise HTTPException(status_code=422, detail="Description must be at least 10 characters")
+        
+        # Resolve completed resumable uploads into attachments
+        uploads = resolve_complaint_uploads(db, complaint.upload_ids, current_user)
+        complaint.images = (complaint.images or []) + [
+            u.file_path for u in uploads if upload_service.is_image(u.filename)
+        ]
             
         # Create the complaint
         new_complaint = crud.create_complaint(db, complaint)
+        attach_complaint_uploads(db, uploads, new_complaint.id, current_user)
+        auto_assign.assign_new_complaint(db, new_complaint)
         print(f"Successfully created complaint with ID: {new_complaint.id}")
         return new_complaint
     except HTTPException:
@@ -423,12 +644,14 @@ async def create_new_complaint(
 
 # New endpoint for creating complaints with image uploads
 @app.post("/complaints/with-images/", response_model=schemas.ComplaintResponse)
+@unit_of_work.atomic
 async def create_complaint_with_images(
     title: str = Form(...),
     description: str = Form(...),
     priority: str = Form(...),
     employee_id: str = Form(...),
     asset_id: str = Form(None),
+    upload_ids: str = Form(None),
     images: List[UploadFile] = File(default=[]),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -490,8 +713,17 @@ async def create_complaint_with_images(
         if len(description.strip()) < 10:
             raise HTTPException(status_code=422, detail="Description must be at least 10 characters")
         
+        # Resolve completed resumable uploads (comma-separated session IDs)
+        upload_id_list = [u.strip() for u in upload_ids.split(",") if u.strip()] if upload_ids else []
+        uploads = resolve_complaint_uploads(db, upload_id_list, current_user)
+        complaint_data.images = complaint_data.images + [
+            u.file_path for u in uploads if upload_service.is_image(u.filename)
+        ]
+        
         # Create complaint
         new_complaint = crud.create_complaint(db, complaint_data)
+        attach_complaint_uploads(db, uploads, new_complaint.id, current_user)
+        auto_assign.assign_new_complaint(db, new_complaint)
         return new_complaint
         
     except HTTPException:
@@ -504,12 +736,17 @@ async def create_complaint_with_images(
 
 @app.get("/employees/{employee_id}/complaints", response_model=List[schemas.ComplaintResponse])
 async def get_employee_complaints(
+    request: Request,
+    response: Response,
     employee_id: str,
     skip: int = 0,
     limit: int = 100,
+    updated_since: Optional[int] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    field_set = sparse_fields.parse_fields(fields, schemas.ComplaintResponse)
     # Debug info
     print(f"Fetching complaints for employee_id: {employee_id}")
     print(f"Current user: ID={current_user.id}, email={current_user.email}, role={current_user.role}")
@@ -534,7 +771,19 @@ async def get_employee_complaints(
         print(f"Authorization failed: User {current_user.email} tried to access {employee.email}'s complaints")
         raise HTTPException(status_code=403, detail="Not authorized to view this employee's complaints")
     
-    return crud.get_employee_complaints(db, employee_id, skip, limit)
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.COMPLAINT_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    if updated_since is not None:
+        return sync_response(db, response, schemas.ComplaintSyncResponse, Complaint, crud.get_employee_complaints_query(db, employee_id, options=sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set)), "complaints", updated_since, limit, owner_id=employee_id, fields=field_set)
+    change_tracking.set_sync_cursor(db, response)
+    
+    complaints = crud.get_employee_complaints(db, employee_id, skip, limit, options=sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.ComplaintResponse, complaints, field_set, response)
+    return complaints
 
 # Add the DELETE endpoint
 @app.delete("/complaints/{complaint_id}")
@@ -579,15 +828,59 @@ async def delete_complaint_record(
     print(f"Successfully deleted complaint with ID: {complaint_id}")
     return {"message": "Complaint deleted successfully"}
 
+# Delta sync helper for ?updated_since=<cursor> on list endpoints
+def sync_response(db: Session, response: Response, schema, model, query, table_name: str,
+                  updated_since: int, limit: int, owner_id: Optional[str] = None,
+                  fields: Optional[tuple] = None):
+    """
+    Return the records changed since the cursor that still match `query`, and
+    tombstones for changed records that were deleted or no longer match.
+    With a sparse fieldset only those fields of each item are returned.
+    """
+    try:
+        changed_ids, cursor, has_more = change_tracking.get_changes(
+            db, table_name, updated_since, limit=limit, owner_id=owner_id
+        )
+    except change_tracking.SyncCursorExpired:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync cursor has expired, reload the full list"
+        )
+    
+    items = query.filter(model.id.in_(changed_ids)).all() if changed_ids else []
+    found_ids = {item.id for item in items}
+    deleted = [row_id for row_id in changed_ids if row_id not in found_ids]
+    if fields:
+        item_schema = schema.model_fields["items"].annotation.__args__[0]
+        content = json.dumps({
+            "items": sparse_fields.dump(item_schema, items, fields),
+            "deleted": deleted,
+            "cursor": cursor,
+            "has_more": has_more,
+        })
+    else:
+        content = schema.model_validate({
+            "items": items,
+            "deleted": deleted,
+            "cursor": cursor,
+            "has_more": has_more,
+        }).model_dump_json()
+    return Response(content=content, media_type="application/json", headers=dict(response.headers))
+
 # Get all complaints
 @app.get("/complaints/all", response_model=List[schemas.ComplaintResponse])
 async def get_all_complaints(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    updated_since: Optional[int] = None,
     status: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    field_set = sparse_fields.parse_fields(fields, schemas.ComplaintResponse)
     # Only users with appropriate roles can see all complaints
     if current_user.role not in ["ats", "assistant_manager", "manager", "admin"]:
         raise HTTPException(
@@ -595,11 +888,25 @@ async def get_all_complaints(
             detail="Not authorized to view all complaints"
         )
     
-    return crud.get_complaints(db, skip=skip, limit=limit, status=status)
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.COMPLAINT_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    if updated_since is not None:
+        return sync_response(db, response, schemas.ComplaintSyncResponse, Complaint, crud.get_complaints_query(db, status=status, options=sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set)), "complaints", updated_since, limit, fields=field_set)
+    change_tracking.set_sync_cursor(db, response)
+    
+    complaints = crud.get_complaints(db, skip=skip, limit=limit, status=status, options=sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.ComplaintResponse, complaints, field_set, response)
+    return fast_responses.list_response(fast_responses.complaint_list_adapter, complaints, response)
 
 # Add PATCH endpoint for updating complaints
 @app.patch("/complaints/{complaint_id}", response_model=schemas.ComplaintResponse)
 async def update_complaint_patch(
+    request: Request,
+    response: Response,
     complaint_id: str,
     complaint_update: schemas.ComplaintUpdate,
     db: Session = Depends(get_db),
@@ -624,19 +931,23 @@ async def update_complaint_patch(
             print(f"Authorization failed: User {current_user.email} tried to update complaint by {employee.email if employee else 'unknown'}")
             raise HTTPException(status_code=403, detail="Not authorized to update this complaint")
     
-    # Update the complaint
+    # Update the complaint, if it is still at the version the client read
     update_data = complaint_update.dict(exclude_unset=True)
-    updated_complaint = crud.update_complaint(db, complaint_id, **update_data)
+    expected_version = versioning.expected_version(request, update_data.pop("version", None))
+    updated_complaint = crud.update_complaint(db, complaint_id, expected_version=expected_version, **update_data)
     
     if not updated_complaint:
         raise HTTPException(status_code=500, detail="Failed to update complaint")
     
     print(f"Successfully updated complaint with ID: {updated_complaint.id}")
+    versioning.set_etag(response, updated_complaint)
     return updated_complaint
 
 # Also add PUT endpoint for full updates
 @app.put("/complaints/{complaint_id}", response_model=schemas.ComplaintResponse)
 async def update_complaint_put(
+    request: Request,
+    response: Response,
     complaint_id: str,
     complaint_update: schemas.ComplaintUpdate,
     db: Session = Depends(get_db),
@@ -661,46 +972,240 @@ async def update_complaint_put(
             print(f"Authorization failed: User {current_user.email} tried to update complaint by {employee.email if employee else 'unknown'}")
             raise HTTPException(status_code=403, detail="Not authorized to update this complaint")
     
-    # Update the complaint
+    # Update the complaint, if it is still at the version the client read
     update_data = complaint_update.dict(exclude_unset=True)
-    updated_complaint = crud.update_complaint(db, complaint_id, **update_data)
+    expected_version = versioning.expected_version(request, update_data.pop("version", None))
+    updated_complaint = crud.update_complaint(db, complaint_id, expected_version=expected_version, **update_data)
     
     if not updated_complaint:
         raise HTTPException(status_code=500, detail="Failed to update complaint")
     
     print(f"Successfully updated complaint with ID: {updated_complaint.id}")
+    versioning.set_etag(response, updated_complaint)
     return updated_complaint
 
 # Asset Management Endpoints
 @app.get("/assets/", response_model=List[schemas.AssetResponse])
 async def get_all_assets(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    field_set = sparse_fields.parse_fields(fields, schemas.AssetResponse)
     # Check permission - any authenticated user can view assets
-    assets = crud.get_assets(db, skip=skip, limit=limit, status=status)
-    return assets
+    
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.ASSET_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    assets = crud.get_assets(db, skip=skip, limit=limit, status=status, options=sparse_fields.load_options(Asset, schemas.AssetResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.AssetResponse, assets, field_set, response)
+    return fast_responses.list_response(fast_responses.asset_list_adapter, assets, response)
+
+# Declared before /assets/{asset_id} so "statistics" is not taken for an asset id
+@app.get("/assets/statistics", response_model=dict)
+async def get_asset_statistics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get statistics about assets in the system.
+    Returns counts by status, type, and condition.
+    """
+    # Precomputed counters, read in one query
+    counters = stat_counters.get_counters(db, ["assets", "asset_status", "asset_type", "asset_condition"])
+    
+    return {
+        "total": stat_counters.get_total(counters, "assets"),
+        "by_status": counters.get("asset_status", {}),
+        "by_type": counters.get("asset_type", {}),
+        "by_condition": counters.get("asset_condition", {})
+    }
+
+@app.get("/assets/analytics", response_model=dict)
+async def get_asset_analytics(
+    request: Request,
+    response: Response,
+    group_by: str = "status",
+    bucket: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Asset analytics aggregated in SQL: counts and purchase / repair costs per
+    group (?group_by=status|type|condition|vendor|assigned_to), age and
+    warranty expiry buckets, and with ?bucket=month|quarter|year purchases
+    over time.
+    """
+    asset_analytics.validate_params(group_by, bucket)
+    # The result is the same for every user, so the validators are not user-scoped
+    # and the ETag doubles as the cache key across users. The date is part of
+    # it because age and warranty buckets move with time, not just with writes.
+    etag, last_modified = change_tracking.get_validators(
+        db, ("assets",), request.url.path, group_by, bucket, datetime.utcnow().date()
+    )
+    if change_tracking.is_not_modified(request, etag, last_modified):
+        return change_tracking.not_modified_response(etag, last_modified)
+    change_tracking.set_validators(response, etag, last_modified)
+    
+    return asset_analytics.get_analytics(db, etag, group_by, bucket)
+
+@app.get("/assets/tco", response_model=dict)
+async def get_assets_tco(
+    request: Request,
+    response: Response,
+    method: str = "straight_line",
+    recommendation: Optional[str] = None,
+    sort_by: Optional[str] = "repair_to_value",
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Fleet total cost of ownership and depreciation: fleet totals, then one
+    entry per asset with book value, TCO, repair-to-value ratio and a
+    keep / review / replace recommendation. Filter with ?recommendation=,
+    order with ?sort_by= (descending).
+    """
+    tco_engine.validate_params(method, sort_by, recommendation)
+    # Shared across users like /assets/analytics; the date rolls the ages forward
+    etag, last_modified = change_tracking.get_validators(
+        db, tco_engine.TCO_TABLES, "/assets/tco", method, datetime.utcnow().date()
+    )
+    if change_tracking.is_not_modified(request, etag, last_modified):
+        return change_tracking.not_modified_response(etag, last_modified)
+    change_tracking.set_validators(response, etag, last_modified)
+    snapshot = tco_engine.get_snapshot(db, etag, method)
+
+    positions = tco_engine.select_positions(snapshot, recommendation, sort_by)
+    return {
+        "summary": snapshot.summary(),
+        "total": len(positions),
+        "items": snapshot.rows(positions[skip:skip + limit]),
+    }
+
+@app.get("/assets/tco/batch", response_model=dict)
+async def get_assets_tco_batch(
+    request: Request,
+    response: Response,
+    ids: str,
+    method: str = "straight_line",
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the TCO entries of several assets by ID (?ids=a,b,c)"""
+    batch_ids = parse_batch_ids(ids)
+    tco_engine.validate_params(method)
+    # Shared across users like /assets/analytics; the date rolls the ages forward
+    etag, last_modified = change_tracking.get_validators(
+        db, tco_engine.TCO_TABLES, "/assets/tco", method, datetime.utcnow().date()
+    )
+    if change_tracking.is_not_modified(request, etag, last_modified):
+        return change_tracking.not_modified_response(etag, last_modified)
+    change_tracking.set_validators(response, etag, last_modified)
+    snapshot = tco_engine.get_snapshot(db, etag, method)
+
+    positions = {asset_id: snapshot.position(asset_id) for asset_id in batch_ids}
+    found = [position for position in positions.values() if position is not None]
+    rows = {row["asset_id"]: row for row in snapshot.rows(found)}
+    return {
+        "items": {asset_id: rows.get(asset_id) for asset_id in batch_ids},
+        "errors": {asset_id: "not_found" for asset_id, position in positions.items() if position is None},
+    }
+
+@app.get("/assets/lifespan-predictions", response_model=List[schemas.AssetLifespanPredictionResponse])
+async def get_asset_lifespan_predictions(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Lifespan predictions of the local model for the whole fleet, highest 12-month failure risk first"""
+    if current_user.role not in ["admin", "manager", "assistant_manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access lifespan predictions"
+        )
+    
+    predictions = list(lifespan_model.get_predictions(db).values())
+    return predictions[skip:skip + limit]
+
+@app.post("/assets/lifespan-predictions/train", response_model=schemas.LifespanModelResponse)
+async def train_lifespan_model(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Refit the lifespan model on the current fleet and rescore every asset (admin only)"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can retrain the lifespan model"
+        )
+    
+    model = lifespan_model.train(db)
+    return {
+        "id": model.id,
+        "assets": model.assets,
+        "failures": model.failures,
+        "trained_at": model.trained_at,
+        **json.loads(model.coefficients)
+    }
+
+@app.get("/assets/batch", response_model=schemas.AssetBatchResponse)
+async def get_assets_batch(
+    request: Request,
+    response: Response,
+    ids: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get several assets by ID (?ids=a,b,c)"""
+    batch_ids = parse_batch_ids(ids)
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.ASSET_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    assets = crud.get_assets_by_ids(db, batch_ids)
+    return batch_result(batch_ids, assets)
 
 @app.get("/assets/{asset_id}", response_model=schemas.AssetResponse)
 async def get_asset_by_id(
+    request: Request,
+    response: Response,
     asset_id: str,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    asset = crud.get_asset(db, asset_id)
+    field_set = sparse_fields.parse_fields(fields, schemas.AssetResponse)
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.ASSET_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    asset = crud.get_asset(db, asset_id, options=sparse_fields.load_options(Asset, schemas.AssetResponse, field_set))
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
+    if field_set:
+        return sparse_fields.sparse_response(schemas.AssetResponse, asset, field_set, response, many=False)
     return asset
 
 @app.get("/employees/{employee_id}/assets", response_model=List[schemas.AssetResponse])
 async def get_employee_assets(
     employee_id: str,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    field_set = sparse_fields.parse_fields(fields, schemas.AssetResponse)
     # Verify user can access this employee's assets
     # Users can access their own assets, or managers/admins can access any employee's assets
     employee = crud.get_employee(db, employee_id)
@@ -715,7 +1220,9 @@ async def get_employee_assets(
     if not authorized:
         raise HTTPException(status_code=403, detail="Not authorized to view this employee's assets")
     
-    assets = crud.get_employee_assets(db, employee_id)
+    assets = crud.get_employee_assets(db, employee_id, options=sparse_fields.load_options(Asset, schemas.AssetResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.AssetResponse, assets, field_set)
     return assets
 
 @app.post("/assets/", response_model=schemas.AssetResponse)
@@ -741,6 +1248,8 @@ async def create_asset(
 
 @app.put("/assets/{asset_id}", response_model=schemas.AssetResponse)
 async def update_asset(
+    request: Request,
+    response: Response,
     asset_id: str,
     asset_data: schemas.AssetUpdate,
     db: Session = Depends(get_db),
@@ -758,13 +1267,15 @@ async def update_asset(
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
     
-    # Update the asset
+    # Update the asset, if it is still at the version the client read
     update_data = asset_data.dict(exclude_unset=True)
-    updated_asset = crud.update_asset(db, asset_id, **update_data)
+    expected_version = versioning.expected_version(request, update_data.pop("version", None))
+    updated_asset = crud.update_asset(db, asset_id, expected_version=expected_version, **update_data)
     
     if not updated_asset:
         raise HTTPException(status_code=500, detail="Failed to update asset")
     
+    versioning.set_etag(response, updated_asset)
     return updated_asset
 
 @app.delete("/assets/{asset_id}")
@@ -793,6 +1304,8 @@ async def delete_asset(
 
 @app.post("/assets/{asset_id}/assign", response_model=schemas.AssetResponse)
 async def assign_asset_to_employee(
+    request: Request,
+    response: Response,
     asset_id: str,
     assign_data: schemas.AssetAssign,
     db: Session = Depends(get_db),
@@ -816,14 +1329,18 @@ async def assign_asset_to_employee(
         raise HTTPException(status_code=404, detail="Employee not found")
     
     # Assign the asset
-    updated_asset = crud.assign_asset(db, asset_id, assign_data.employee_id)
+    expected_version = versioning.expected_version(request, assign_data.version)
+    updated_asset = crud.assign_asset(db, asset_id, assign_data.employee_id, expected_version=expected_version)
     if not updated_asset:
         raise HTTPException(status_code=500, detail="Failed to assign asset")
     
+    versioning.set_etag(response, updated_asset)
     return updated_asset
 
 @app.put("/assets/{asset_id}/unassign", response_model=schemas.AssetResponse)
 async def unassign_asset(
+    request: Request,
+    response: Response,
     asset_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -841,10 +1358,11 @@ async def unassign_asset(
         raise HTTPException(status_code=404, detail="Asset not found")
     
     # Unassign the asset
-    updated_asset = crud.unassign_asset(db, asset_id)
+    updated_asset = crud.unassign_asset(db, asset_id, expected_version=versioning.expected_version(request))
     if not updated_asset:
         raise HTTPException(status_code=500, detail="Failed to unassign asset")
     
+    versioning.set_etag(response, updated_asset)
     return updated_asset
 
 @app.get("/assets/{asset_id}/maintenance-history", response_model=List[schemas.MaintenanceRecordResponse])
@@ -862,59 +1380,19 @@ async def get_asset_maintenance_history(
     maintenance_records = crud.get_asset_maintenance_records(db, asset_id)
     return maintenance_records
 
-@app.get("/assets/statistics", response_model=dict)
-async def get_asset_statistics(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """
-    Get statistics about assets in the system.
-    Returns counts by status, type, and condition.
-    """
-    # Get all assets
-    assets = db.query(Asset).all()
-    
-    # Calculate statistics
-    total_count = len(assets)
-    status_counts = {}
-    type_counts = {}
-    condition_counts = {}
-    
-    for asset in assets:
-        # Count by status
-        if asset.status in status_counts:
-            status_counts[asset.status] += 1
-        else:
-            status_counts[asset.status] = 1
-            
-        # Count by type
-        if asset.type in type_counts:
-            type_counts[asset.type] += 1
-        else:
-            type_counts[asset.type] = 1
-            
-        # Count by condition
-        if asset.condition in condition_counts:
-            condition_counts[asset.condition] += 1
-        else:
-            condition_counts[asset.condition] = 1
-    
-    return {
-        "total": total_count,
-        "by_status": status_counts,
-        "by_type": type_counts,
-        "by_condition": condition_counts
-    }
-
 # Vendor endpoints
 @app.get("/vendor/", response_model=List[schemas.VendorResponse])
 async def get_all_vendors(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all vendors"""
+    field_set = sparse_fields.parse_fields(fields, schemas.VendorResponse)
     # Check if user has appropriate role to view vendors
     if current_user.role not in ["admin", "manager", "assistant_manager"]:
         raise HTTPException(
@@ -922,23 +1400,59 @@ async def get_all_vendors(
             detail="Not authorized to view vendors"
         )
     
-    vendors = crud.get_vendors(db, skip=skip, limit=limit)
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.VENDOR_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    vendors = crud.get_vendors(db, skip=skip, limit=limit, options=sparse_fields.load_options(Vendor, schemas.VendorResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.VendorResponse, vendors, field_set, response)
     return vendors
 
+@app.get("/vendor/batch", response_model=schemas.VendorBatchResponse)
+async def get_vendors_batch(
+    request: Request,
+    response: Response,
+    ids: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get several vendors by ID (?ids=a,b,c)"""
+    batch_ids = parse_batch_ids(ids)
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.VENDOR_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    vendors = crud.get_vendors_by_ids(db, batch_ids)
+    return batch_result(batch_ids, vendors)
+
 @app.get("/vendor/{vendor_id}", response_model=schemas.VendorResponse)
 async def get_vendor_by_id(
+    request: Request,
+    response: Response,
     vendor_id: str,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a vendor by ID"""
-    vendor = crud.get_vendor(db, vendor_id)
+    field_set = sparse_fields.parse_fields(fields, schemas.VendorResponse)
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.VENDOR_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    vendor = crud.get_vendor(db, vendor_id, options=sparse_fields.load_options(Vendor, schemas.VendorResponse, field_set))
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
+    if field_set:
+        return sparse_fields.sparse_response(schemas.VendorResponse, vendor, field_set, response, many=False)
     return vendor
 
 @app.post("/vendor/", response_model=schemas.VendorCreateResponse)
+@unit_of_work.atomic
 async def create_vendor(
     vendor_data: schemas.VendorCreate,
     background_tasks: BackgroundTasks,
@@ -1004,12 +1518,7 @@ async def create_vendor(
             "username": vendor.email
         }
     except Exception as e:
-        # Clean up if something went wrong
-        if 'user' in locals():
-            try:
-                crud.delete_user(db, user.id)
-            except:
-                pass
+        # The unit of work rolls back the user account along with the vendor
         raise HTTPException(status_code=500, detail=f"Failed to create vendor: {str(e)}")
 
 @app.put("/vendor/{vendor_id}", response_model=schemas.VendorResponse)
@@ -1069,15 +1578,34 @@ async def delete_vendor(
     return {"message": "Vendor deleted successfully"}
 
 # Quote Request endpoints - Manager Portal
-@app.get("/quote-requests/", response_model=List[schemas.QuoteRequestDetailResponse])
+# ?view= of the quote request lists: nested detail, or one row of response stats per request
+QUOTE_REQUEST_VIEWS = ("detail", "list")
+
+def is_quote_request_list_view(view: str, fields: Optional[str]) -> bool:
+    if view not in QUOTE_REQUEST_VIEWS:
+        raise HTTPException(status_code=400, detail=f"view must be one of: {', '.join(QUOTE_REQUEST_VIEWS)}")
+    if view == "list" and fields:
+        raise HTTPException(status_code=400, detail="fields cannot be combined with view=list")
+    return view == "list"
+
+@app.get("/quote-requests/", response_model=Union[List[schemas.QuoteRequestSummaryResponse], List[schemas.QuoteRequestDetailResponse]])
 async def get_all_quote_requests(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: str = "detail",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all quote requests (for admin and manager roles)"""
+    """
+    Get all quote requests (for admin and manager roles). With view=list,
+    each request carries its invited and responded counts, lowest and
+    average quote and latest submission instead of the nested vendor
+    selections and responses, which load only for a single request.
+    """
+    list_view = is_quote_request_list_view(view, fields)
+    field_set = sparse_fields.parse_fields(fields, schemas.QuoteRequestDetailResponse)
     # Only managers and admins can view all quote requests
     if current_user.role not in ["admin", "manager"]:
         raise HTTPException(
@@ -1085,29 +1613,45 @@ async def get_all_quote_requests(
             detail="Not authorized to view all quote requests"
         )
     
-    quote_requests = crud.get_quote_requests(db, skip=skip, limit=limit, status=status)
-    return quote_requests
+    if list_view:
+        summaries = crud.get_quote_request_summaries(db, skip=skip, limit=limit, status=status)
+        return fast_responses.list_response(fast_responses.quote_request_summary_list_adapter, summaries)
+    
+    quote_requests = crud.get_quote_requests(db, skip=skip, limit=limit, status=status, options=sparse_fields.load_options(QuoteRequest, schemas.QuoteRequestDetailResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.QuoteRequestDetailResponse, quote_requests, field_set)
+    return fast_responses.list_response(fast_responses.quote_request_list_adapter, quote_requests)
 
-@app.get("/quote-requests/my-requests", response_model=List[schemas.QuoteRequestDetailResponse])
+@app.get("/quote-requests/my-requests", response_model=Union[List[schemas.QuoteRequestSummaryResponse], List[schemas.QuoteRequestDetailResponse]])
 async def get_my_quote_requests(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: str = "detail",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get quote requests created by the current user"""
-    quote_requests = crud.get_user_quote_requests(db, current_user.id, skip=skip, limit=limit, status=status)
+    """Get quote requests created by the current user (view=list as for /quote-requests/)"""
+    if is_quote_request_list_view(view, fields):
+        summaries = crud.get_quote_request_summaries(db, skip=skip, limit=limit, status=status, created_by_id=current_user.id)
+        return fast_responses.list_response(fast_responses.quote_request_summary_list_adapter, summaries)
+    field_set = sparse_fields.parse_fields(fields, schemas.QuoteRequestDetailResponse)
+    quote_requests = crud.get_user_quote_requests(db, current_user.id, skip=skip, limit=limit, status=status, options=sparse_fields.load_options(QuoteRequest, schemas.QuoteRequestDetailResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.QuoteRequestDetailResponse, quote_requests, field_set)
     return quote_requests
 
 @app.get("/quote-requests/{quote_request_id}", response_model=schemas.QuoteRequestDetailResponse)
 async def get_quote_request_by_id(
     quote_request_id: str,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a specific quote request by ID"""
-    quote_request = crud.get_quote_request(db, quote_request_id)
+    field_set = sparse_fields.parse_fields(fields, schemas.QuoteRequestDetailResponse)
+    quote_request = crud.get_quote_request(db, quote_request_id, options=sparse_fields.load_options(QuoteRequest, schemas.QuoteRequestDetailResponse, field_set))
     if not quote_request:
         raise HTTPException(status_code=404, detail="Quote request not found")
     
@@ -1124,6 +1668,8 @@ async def get_quote_request_by_id(
             detail="Not authorized to view this quote request"
         )
     
+    if field_set:
+        return sparse_fields.sparse_response(schemas.QuoteRequestDetailResponse, quote_request, field_set, many=False)
     return quote_request
 
 @app.post("/quote-requests/", response_model=schemas.QuoteRequestDetailResponse)
@@ -1206,6 +1752,7 @@ async def delete_quote_request(
 
 # Quote Request Vendor endpoints
 @app.post("/quote-requests/{quote_request_id}/vendors", response_model=schemas.QuoteRequestVendorResponse)
+@unit_of_work.atomic
 async def add_vendor_to_quote_request(
     quote_request_id: str,
     vendor_data: schemas.QuoteRequestVendorBase,
@@ -1256,6 +1803,32 @@ async def add_vendor_to_quote_request(
     
     return vendor_selection
 
+@app.post("/quote-requests/{quote_request_id}/vendors/bulk", response_model=schemas.BulkVendorInvitationResponse)
+@unit_of_work.atomic
+async def invite_vendors_to_quote_request(
+    quote_request_id: str,
+    invitation_data: schemas.BulkVendorInvitation,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Invite many vendors to a quote request at once, by id and/or service
+    type. Vendors already invited are skipped; the new selections and the
+    vendors' notifications are committed in one transaction and the
+    invitation emails are sent as one batch afterwards.
+    """
+    # The selections are not loaded; the invitation resolves what it needs in one query
+    quote_request = db.get(QuoteRequest, quote_request_id)
+    if not quote_request:
+        raise HTTPException(status_code=404, detail="Quote request not found")
+    
+    report, emails = vendor_invitations.invite(db, quote_request, invitation_data, current_user)
+    if emails:
+        background_tasks.add_task(send_quote_invitations, emails)
+    print(f"✅ Invited {report['invited']} vendors to quote request {quote_request_id} ({report['already_invited']} already invited)")
+    return report
+
 @app.delete("/quote-requests/vendors/{vendor_selection_id}")
 async def remove_vendor_from_quote_request(
     vendor_selection_id: str,
@@ -1296,6 +1869,27 @@ async def remove_vendor_from_quote_request(
     return {"message": "Vendor removed from quote request successfully"}
 
 # Quote Response endpoints
+def can_view_quote_response(current_user: User, quote_response: QuoteResponse) -> bool:
+    return (
+        current_user.role in ["admin", "manager"] or
+        quote_response.quote_request.created_by_id == current_user.id or
+        quote_response.vendor_id == current_user.id
+    )
+
+@app.get("/quote-responses/batch", response_model=schemas.QuoteResponseBatchResponse)
+async def get_quote_responses_batch(
+    ids: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get several quote responses by ID (?ids=a,b,c)"""
+    batch_ids = parse_batch_ids(ids)
+    quote_responses = crud.get_quote_responses_by_ids(db, batch_ids)
+    return batch_result(
+        batch_ids, quote_responses,
+        lambda quote_response: can_view_quote_response(current_user, quote_response)
+    )
+
 @app.get("/quote-responses/{quote_response_id}", response_model=schemas.QuoteResponseResponse)
 async def get_quote_response_by_id(
     quote_response_id: str,
@@ -1308,13 +1902,7 @@ async def get_quote_response_by_id(
         raise HTTPException(status_code=404, detail="Quote response not found")
     
     # Check if user has permission to view this quote response
-    is_authorized = (
-        current_user.role in ["admin", "manager"] or
-        quote_response.quote_request.created_by_id == current_user.id or
-        quote_response.vendor_id == current_user.id
-    )
-    
-    if not is_authorized:
+    if not can_view_quote_response(current_user, quote_response):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this quote response"
@@ -1392,10 +1980,12 @@ async def get_vendor_quote_requests(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get quote requests assigned to a specific vendor"""
+    field_set = sparse_fields.parse_fields(fields, schemas.QuoteRequestDetailResponse)
     # Check if vendor exists
     vendor = crud.get_vendor(db, vendor_id)
     if not vendor:
@@ -1414,7 +2004,9 @@ async def get_vendor_quote_requests(
         )
     
     # Get quote requests where this vendor is selected
-    quote_requests = crud.get_vendor_quote_requests(db, vendor_id, skip=skip, limit=limit, status=status)
+    quote_requests = crud.get_vendor_quote_requests(db, vendor_id, skip=skip, limit=limit, status=status, options=sparse_fields.load_options(QuoteRequest, schemas.QuoteRequestDetailResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.QuoteRequestDetailResponse, quote_requests, field_set)
     return quote_requests
 
 # Add vendor purchase requests endpoint (legacy support)
@@ -1464,6 +2056,7 @@ async def get_vendor_purchase_requests(
 
 # Add the missing quotes respond endpoint
 @app.post("/quotes/{request_id}/respond", response_model=schemas.QuoteResponseResponse)
+@unit_of_work.atomic
 async def submit_quote_response_legacy(
     request_id: str,
     response_data: schemas.QuoteResponseCreate,
@@ -1525,6 +2118,7 @@ async def submit_quote_response_legacy(
 
 # Add purchase request quote endpoints (legacy support)
 @app.post("/purchase-requests/{request_id}/quotes")
+@unit_of_work.atomic
 async def submit_purchase_request_quote(
     request_id: str,
     quote_data: dict,
@@ -1611,6 +2205,7 @@ async def get_purchase_request_quotes(
     return quotes
 
 @app.post("/purchase-requests/{request_id}/quotes/{vendor_id}/accept")
+@unit_of_work.atomic
 async def accept_purchase_request_quote(
     request_id: str,
     vendor_id: str,
@@ -1771,7 +2366,9 @@ async def reject_purchase_request_quote(
 # Modern Quote Response Management Endpoints
 
 @app.post("/quote-responses/{quote_response_id}/accept")
+@unit_of_work.atomic
 async def accept_quote_response(
+    request: Request,
     quote_response_id: str,
     acceptance_data: dict = {},
     db: Session = Depends(get_db),
@@ -1802,7 +2399,8 @@ async def accept_quote_response(
         quote_response_id,
         "accepted",
         acceptance_notes,
-        current_user.id
+        current_user.id,
+        expected_version=versioning.expected_version(request, acceptance_data.get("version"))
     )
     
     # Find related complaint based on quote request details
@@ -1881,6 +2479,7 @@ async def accept_quote_response(
 
 @app.post("/quote-responses/{quote_response_id}/reject")
 async def reject_quote_response(
+    request: Request,
     quote_response_id: str,
     rejection_data: dict,
     db: Session = Depends(get_db),
@@ -1912,7 +2511,8 @@ async def reject_quote_response(
         quote_response_id,
         "rejected",
         rejection_reason,
-        current_user.id
+        current_user.id,
+        expected_version=versioning.expected_version(request, rejection_data.get("version"))
     )
     
     print(f"✅ Quote response rejection completed")
@@ -1927,7 +2527,9 @@ async def reject_quote_response(
 
 # General review endpoint that the frontend expects
 @app.put("/quote-responses/{quote_response_id}/review")
+@unit_of_work.atomic
 async def review_quote_response_general(
+    request: Request,
     quote_response_id: str,
     review_data: dict,
     db: Session = Depends(get_db),
@@ -1966,7 +2568,8 @@ async def review_quote_response_general(
         quote_response_id,
         status,
         notes,
-        current_user.id
+        current_user.id,
+        expected_version=versioning.expected_version(request, review_data.get("version"))
     )
     
     # If accepting the quote, trigger notification system
@@ -2058,6 +2661,7 @@ async def review_quote_response_general(
 
 # Helper endpoint to create quote request from complaint
 @app.post("/complaints/{complaint_id}/create-quote-request", response_model=schemas.QuoteRequestDetailResponse)
+@unit_of_work.atomic
 async def create_quote_request_from_complaint(
     complaint_id: str,
     quote_request_data: schemas.QuoteRequestCreate,
@@ -2205,40 +2809,24 @@ async def get_admin_statistics(
             detail="Not authorized to view admin statistics"
         )
     
-    # Get counts from various tables
-    employee_count = db.query(Employee).count()
-    asset_count = db.query(Asset).count()
-    complaint_count = db.query(Complaint).count()
-    vendor_count = db.query(Vendor).count()
+    # Get precomputed counts and groupings in one query
+    counters = stat_counters.get_counters(db)
+    employee_count = stat_counters.get_total(counters, "employees")
+    asset_count = stat_counters.get_total(counters, "assets")
+    complaint_count = stat_counters.get_total(counters, "complaints")
+    vendor_count = stat_counters.get_total(counters, "vendors")
     
-    # Get asset statistics by status
-    asset_status_counts = {}
-    asset_statuses = db.query(Asset.status, func.count(Asset.id)).group_by(Asset.status).all()
-    for status, count in asset_statuses:
-        asset_status_counts[status] = count
+    asset_status_counts = counters.get("asset_status", {})
+    complaint_status_counts = counters.get("complaint_status", {})
     
-    # Get complaint statistics by status
-    complaint_status_counts = {}
-    complaint_statuses = db.query(Complaint.status, func.count(Complaint.id)).group_by(Complaint.status).all()
-    for status, count in complaint_statuses:
-        complaint_status_counts[status] = count
+    def count_complaints(statuses):
+        return sum(complaint_status_counts.get(complaint_status, 0) for complaint_status in statuses)
     
     # Get specific complaint counts for different portals
-    ats_complaints = db.query(Complaint).filter(
-        Complaint.status.in_(['open', 'submitted'])
-    ).count()
-    
-    assistant_manager_complaints = db.query(Complaint).filter(
-        Complaint.status == 'forwarded'
-    ).count()
-    
-    manager_complaints = db.query(Complaint).filter(
-        Complaint.status.in_(['in_progress', 'pending_approval'])
-    ).count()
-    
-    active_complaints = db.query(Complaint).filter(
-        Complaint.status.in_(['open', 'submitted', 'forwarded', 'in_progress', 'pending_approval'])
-    ).count()
+    ats_complaints = count_complaints(['open', 'submitted'])
+    assistant_manager_complaints = count_complaints(['forwarded'])
+    manager_complaints = count_complaints(['in_progress', 'pending_approval'])
+    active_complaints = count_complaints(['open', 'submitted', 'forwarded', 'in_progress', 'pending_approval'])
     
     # Get recent complaints
     recent_complaints = db.query(Complaint)\
@@ -2258,10 +2846,7 @@ async def get_admin_statistics(
         })
     
     # Get user statistics by role
-    user_role_counts = {}
-    user_roles = db.query(User.role, func.count(User.id)).group_by(User.role).all()
-    for role, count in user_roles:
-        user_role_counts[role] = count
+    user_role_counts = counters.get("user_roles", {})
     
     return {
         "counts": {
@@ -2306,12 +2891,28 @@ async def admin_create_user(
 # Notification endpoints
 @app.get("/notifications", response_model=List[schemas.NotificationResponse])
 async def get_user_notifications(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    updated_since: Optional[int] = None,
     unread_only: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.NOTIFICATION_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    if updated_since is not None:
+        return sync_response(
+            db, response, schemas.NotificationSyncResponse, Notification,
+            crud.get_user_notifications_query(db, current_user.id, unread_only=unread_only),
+            "notifications", updated_since, limit, owner_id=current_user.id
+        )
+    change_tracking.set_sync_cursor(db, response)
+    
     notifications = crud.get_user_notifications(
         db, 
         current_user.id, 
@@ -2463,6 +3064,9 @@ async def forward_complaint_with_components(
         print(f"Complaint not found with ID: {complaint_id}")
         raise HTTPException(status_code=404, detail="Complaint not found")
     
+    # Complaints claimed from the work queue belong to the claiming agent
+    work_queue.check_not_claimed_by_other(db, complaint_id, current_user.id)
+    
     # Validate component purchase reason
     if not forward_data.component_purchase_reason or len(forward_data.component_purchase_reason.strip()) < 10:
         raise HTTPException(
@@ -2477,6 +3081,7 @@ async def forward_complaint_with_components(
         "assigned_to": forward_data.assigned_to
     }
     
+    complaint_events.annotate(db, complaint_id, "forwarded", update_data["component_purchase_reason"])
     updated_complaint = crud.update_complaint(db, complaint_id, **update_data)
     
     if not updated_complaint:
@@ -2488,13 +3093,18 @@ async def forward_complaint_with_components(
 # ATS Portal - Get complaints assigned to ATS
 @app.get("/ats/complaints", response_model=List[schemas.ComplaintResponse])
 async def get_ats_complaints(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    updated_since: Optional[int] = None,
     status: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all complaints visible to ATS users"""
+    field_set = sparse_fields.parse_fields(fields, schemas.ComplaintResponse)
     # Only ATS users can access this endpoint
     if current_user.role != "ats":
         raise HTTPException(
@@ -2502,20 +3112,138 @@ async def get_ats_complaints(
             detail="Only ATS users can access ATS complaints"
         )
     
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.COMPLAINT_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
     # ATS can see all complaints
-    complaints = crud.get_complaints(db, skip=skip, limit=limit, status=status)
+    if updated_since is not None:
+        return sync_response(db, response, schemas.ComplaintSyncResponse, Complaint, crud.get_complaints_query(db, status=status, options=sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set)), "complaints", updated_since, limit, fields=field_set)
+    change_tracking.set_sync_cursor(db, response)
+    
+    complaints = crud.get_complaints(db, skip=skip, limit=limit, status=status, options=sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set))
+    if field_set:
+        return sparse_fields.sparse_response(schemas.ComplaintResponse, complaints, field_set, response)
     return complaints
 
+def require_ats(current_user: User):
+    if current_user.role != "ats":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ATS users can use the work queue"
+        )
+
+# ATS Portal - Claim the next complaints from the work queue
+@app.post("/ats/queue/claim", response_model=schemas.ATSQueueClaimResponse)
+async def claim_ats_complaints(
+    claim_data: schemas.ATSQueueClaimRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Claim up to `count` unclaimed complaints, most urgent and oldest first.
+    Concurrent agents never receive the same complaint. Claims expire after
+    the lease unless renewed with /ats/queue/heartbeat.
+    """
+    require_ats(current_user)
+    count = min(claim_data.count, work_queue.MAX_CLAIM_COUNT)
+    lease_seconds = claim_data.lease_seconds or work_queue.ATS_CLAIM_LEASE_SECONDS
+    
+    claimed, lease_expires_at = work_queue.claim(db, current_user.id, count, lease_seconds)
+    complaints = {complaint.id: complaint for complaint in crud.get_complaints_by_ids(db, claimed)} if claimed else {}
+    return {
+        "complaints": [complaints[complaint_id] for complaint_id in claimed if complaint_id in complaints],
+        "lease_expires_at": lease_expires_at,
+    }
+
+# ATS Portal - Renew the leases on claimed complaints
+@app.post("/ats/queue/heartbeat", response_model=schemas.ATSQueueLeaseResponse)
+async def renew_ats_claims(
+    lease_data: schemas.ATSQueueLeaseRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Extend the caller's live claims; expired or foreign claims are left out of the response."""
+    require_ats(current_user)
+    lease_seconds = lease_data.lease_seconds or work_queue.ATS_CLAIM_LEASE_SECONDS
+    renewed, lease_expires_at = work_queue.heartbeat(db, current_user.id, lease_data.complaint_ids, lease_seconds)
+    return {"complaint_ids": renewed, "lease_expires_at": lease_expires_at}
+
+# ATS Portal - Return claimed complaints to the queue
+@app.post("/ats/queue/release", response_model=schemas.ATSQueueLeaseResponse)
+async def release_ats_claims(
+    lease_data: schemas.ATSQueueLeaseRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Give claimed complaints back so other agents can take them"""
+    require_ats(current_user)
+    released = work_queue.release(db, current_user.id, lease_data.complaint_ids)
+    return {"complaint_ids": released}
+
+# ATS Portal - Complaints currently claimed by the caller
+@app.get("/ats/queue/mine", response_model=List[schemas.ComplaintResponse])
+async def get_my_ats_claims(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    require_ats(current_user)
+    claimed = [item.complaint_id for item in work_queue.get_claims(db, current_user.id)]
+    if not claimed:
+        return []
+    complaints = {complaint.id: complaint for complaint in crud.get_complaints_by_ids(db, claimed)}
+    return [complaints[complaint_id] for complaint_id in claimed if complaint_id in complaints]
+
+# Current ATS workload, as used by automatic assignment
+@app.get("/ats/workload", response_model=List[schemas.AgentWorkloadResponse])
+async def get_ats_workload(
+    reconcile: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Priority-weighted load of every active ATS agent; ?reconcile=true recounts it from the database"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and managers can view ATS workload"
+        )
+    if reconcile:
+        auto_assign.get_balancer(db, reconcile=True)
+    return auto_assign.get_workload(db)
+
+# Audit of automatic complaint assignments
+@app.get("/complaint-assignments", response_model=List[schemas.ComplaintAssignmentResponse])
+async def get_complaint_assignments(
+    complaint_id: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and managers can view assignment decisions"
+        )
+    return auto_assign.get_assignments(db, complaint_id, agent_id, skip, limit)
+
 # Assistant Manager Portal - Get forwarded complaints with component details
 @app.get("/assistant-manager/complaints", response_model=List[schemas.ComplaintResponse])
 async def get_assistant_manager_complaints(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    updated_since: Optional[int] = None,
     status: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get complaints for assistant manager review (forwarded complaints with component details)"""
+    field_set = sparse_fields.parse_fields(fields, schemas.ComplaintResponse)
     # Only assistant managers can access this endpoint
     if current_user.role != "assistant_manager":
         raise HTTPException(
@@ -2523,40 +3251,47 @@ async def get_assistant_manager_complaints(
             detail="Only assistant managers can access this endpoint"
         )
     
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.COMPLAINT_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
     # Assistant managers can see forwarded complaints and those assigned to them
     query = db.query(Complaint)\
-        .options(joinedload(Complaint.employee), joinedload(Complaint.replies))
+        .options(*(sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set) or [
+            joinedload(Complaint.employee), joinedload(Complaint.replies)
+        ]))
     
     # Filter for forwarded complaints or those assigned to assistant managers
-    query = query.filter(
-        (Complaint.status == "forwarded") | 
-        (Complaint.assigned_to == current_user.id)
-    )
+    query = query.filter(crud.assistant_manager_inbox_filter(current_user.id))
     
     if status:
         query = query.filter(Complaint.status == status)
     
-    complaints = query.order_by(desc(Complaint.date_submitted)).offset(skip).limit(limit).all()
+    if updated_since is not None:
+        return sync_response(db, response, schemas.ComplaintSyncResponse, Complaint, query, "complaints", updated_since, limit, fields=field_set)
+    change_tracking.set_sync_cursor(db, response)
     
-    # Parse images from JSON string to list for each complaint
-    for complaint in complaints:
-        if isinstance(complaint.images, str):
-            try:
-                complaint.images = json.loads(complaint.images)
-            except:
-                complaint.images = []
+    complaints = query.order_by(desc(Complaint.date_submitted)).offset(skip).limit(limit).all()
     
+    if field_set:
+        return sparse_fields.sparse_response(schemas.ComplaintResponse, complaints, field_set, response)
     return complaints
 
 # Assistant Manager Portal - Get approval history
 @app.get("/assistant-manager/approval-history", response_model=List[schemas.ComplaintResponse])
 async def get_assistant_manager_approval_history(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    updated_since: Optional[int] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get approval history for assistant manager (complaints they have approved or rejected)"""
+    field_set = sparse_fields.parse_fields(fields, schemas.ComplaintResponse)
     # Only assistant managers can access this endpoint
     if current_user.role != "assistant_manager":
         raise HTTPException(
@@ -2564,43 +3299,44 @@ async def get_assistant_manager_approval_history(
             detail="Only assistant managers can access this endpoint"
         )
     
-    # Get complaints that have been handled by the assistant manager
-    # Look for complaints where the resolution_notes contains "assistant_manager" approval/rejection
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.COMPLAINT_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    # Complaints this assistant manager acted on, from the indexed workflow event log
+    history = complaint_events.actor_history_query(db, current_user.id)
     query = db.query(Complaint)\
-        .options(joinedload(Complaint.employee), joinedload(Complaint.replies))\
-        .filter(
-            and_(
-                Complaint.resolution_notes.isnot(None),
-                or_(
-                    Complaint.resolution_notes.contains("Approved by assistant_manager"),
-                    Complaint.resolution_notes.contains("Rejected by assistant_manager"),
-                    Complaint.status.in_(["in_progress", "closed", "resolved", "pending_manager_approval"])
-                )
-            )
-        )
+        .options(*(sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set) or [
+            joinedload(Complaint.employee), joinedload(Complaint.replies)
+        ]))\
+        .join(history, history.c.complaint_id == Complaint.id)
     
-    complaints = query.order_by(desc(Complaint.last_updated)).offset(skip).limit(limit).all()
+    if updated_since is not None:
+        return sync_response(db, response, schemas.ComplaintSyncResponse, Complaint, query, "complaints", updated_since, limit, fields=field_set)
+    change_tracking.set_sync_cursor(db, response)
     
-    # Parse images from JSON string to list for each complaint
-    for complaint in complaints:
-        if isinstance(complaint.images, str):
-            try:
-                complaint.images = json.loads(complaint.images)
-            except:
-                complaint.images = []
+    complaints = query.order_by(desc(history.c.last_event_at)).offset(skip).limit(limit).all()
     
+    if field_set:
+        return sparse_fields.sparse_response(schemas.ComplaintResponse, complaints, field_set, response)
     return complaints
 
 # Manager Portal - Get complaints approved by assistant manager
 @app.get("/manager/complaints", response_model=List[schemas.ComplaintResponse])
 async def get_manager_complaints(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    updated_since: Optional[int] = None,
     status: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get complaints for manager review (approved by assistant manager with component details)"""
+    field_set = sparse_fields.parse_fields(fields, schemas.ComplaintResponse)
     # Only managers can access this endpoint
     if current_user.role != "manager":
         raise HTTPException(
@@ -2608,9 +3344,16 @@ async def get_manager_complaints(
             detail="Only managers can access this endpoint"
         )
     
+    # Answer conditional GETs from the change counters before running the query
+    not_modified = change_tracking.conditional_get(db, request, response, change_tracking.COMPLAINT_TABLES, current_user.id)
+    if not_modified:
+        return not_modified
+    
     # Managers should see complaints that need their approval (forwarded by assistant managers)
     query = db.query(Complaint)\
-        .options(joinedload(Complaint.employee), joinedload(Complaint.replies))
+        .options(*(sparse_fields.load_options(Complaint, schemas.ComplaintResponse, field_set) or [
+            joinedload(Complaint.employee), joinedload(Complaint.replies)
+        ]))
     
     # Filter for complaints that need manager approval
     if status:
@@ -2618,26 +3361,16 @@ async def get_manager_complaints(
     else:
         # Default filter: show only complaints forwarded to manager for approval by Assistant Manager
         # Removed 'forwarded' status so complaints forwarded by ATS only appear on Assistant Manager dashboard
-        query = query.filter(
-            Complaint.status.in_([
-                'pending_manager_approval',
-                'in_progress',
-                'pending_approval'
-            ])
-        )
+        query = query.filter(Complaint.status.in_(crud.MANAGER_INBOX_STATUSES))
     
-    complaints = query.order_by(desc(Complaint.date_submitted)).offset(skip).limit(limit).all()
+    if updated_since is not None:
+        return sync_response(db, response, schemas.ComplaintSyncResponse, Complaint, query, "complaints", updated_since, limit, fields=field_set)
+    change_tracking.set_sync_cursor(db, response)
     
-    # Parse images from JSON string to list for each complaint
-    for complaint in complaints:
-        if isinstance(complaint.images, str):
-            try:
-                complaint.images = json.loads(complaint.images)
-            except:
-                complaint.images = []
-        elif complaint.images is None:
-            complaint.images = []
+    complaints = query.order_by(desc(Complaint.date_submitted)).offset(skip).limit(limit).all()
     
+    if field_set:
+        return sparse_fields.sparse_response(schemas.ComplaintResponse, complaints, field_set, response)
     return complaints
 
 # Get complaint with component details by ID (accessible by ATS, Assistant Manager, Manager)
@@ -2714,6 +3447,7 @@ async def forward_complaint_to_manager(
     if forward_data.priority:
         update_data["priority"] = forward_data.priority
     
+    complaint_events.annotate(db, complaint_id, "forwarded_to_manager", update_data["resolution_notes"])
     updated_complaint = crud.update_complaint(db, complaint_id, **update_data)
     
     if not updated_complaint:
@@ -2722,7 +3456,25 @@ async def forward_complaint_to_manager(
     print(f"Successfully forwarded complaint {complaint_id} to manager with status pending_manager_approval")
     return updated_complaint
 
+@app.post("/complaints/bulk-transition", response_model=schemas.BulkTransitionResponse)
+async def bulk_transition_complaints(
+    transition_data: schemas.BulkComplaintTransition,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Resolve, forward, forward to manager or reject many complaints at once.
+    Every complaint is validated, the valid ones are changed in one
+    transaction, and the response reports the outcome of each complaint.
+    With all_or_nothing, nothing is changed unless every complaint is valid.
+    """
+    print(f"📦 {current_user.email} applying {transition_data.action.value} to {len(transition_data.complaint_ids)} complaints")
+    report = bulk_transitions.apply(db, transition_data, current_user)
+    print(f"✅ Bulk {report['action']}: {report['applied']} applied, {report['failed']} failed")
+    return report
+
 @app.patch("/complaints/{complaint_id}/reject", response_model=schemas.ComplaintResponse)
+@unit_of_work.atomic
 async def reject_complaint_with_notification(
     complaint_id: str,
     rejection_data: dict,
@@ -2756,6 +3508,7 @@ async def reject_complaint_with_notification(
     # Update complaint status to in_progress (not closed) with rejection notes
     rejection_notes = f"Rejected by {current_user.role.replace('_', ' ').title()}: {rejection_reason}"
     
+    complaint_events.annotate(db, complaint_id, "rejected", rejection_reason)
     updated_complaint = crud.update_complaint(
         db,
         complaint_id,
@@ -2774,16 +3527,18 @@ async def reject_complaint_with_notification(
         
         notification_message = f"Complaint {complaint_id} has been rejected by {current_user.role.replace('_', ' ').title()}. Reason: {rejection_reason}"
         
-        for ats_user in ats_users:
-            notification_data = schemas.NotificationCreate(
-                user_id=ats_user.id,
-                message=notification_message,
-                type="Complaint Rejection",
-                related_id=complaint_id
-            )
-            
-            crud.create_notification(db, notification_data)
-            print(f"📧 Notification sent to ATS user: {ats_user.email}")
+        # A failed notification undoes only the notifications, not the rejection
+        with unit_of_work.savepoint(db):
+            for ats_user in ats_users:
+                notification_data = schemas.NotificationCreate(
+                    user_id=ats_user.id,
+                    message=notification_message,
+                    type="Complaint Rejection",
+                    related_id=complaint_id
+                )
+                
+                crud.create_notification(db, notification_data)
+                print(f"📧 Notification sent to ATS user: {ats_user.email}")
         
         print(f"✅ Rejection notifications sent to {len(ats_users)} ATS users")
         
@@ -2935,10 +3690,268 @@ async def upload_complaint_images(
     
     return {"uploaded_files": uploaded_files}
 
+def resolve_complaint_uploads(db: Session, upload_ids: Optional[List[str]], current_user: User):
+    """Look up completed upload sessions to attach to a new complaint"""
+    upload_ids = list(dict.fromkeys(upload_ids or []))
+    if not upload_ids:
+        return []
+    
+    uploads = crud.get_attachable_uploads(db, upload_ids, current_user.id)
+    if len(uploads) != len(upload_ids):
+        found = {u.id for u in uploads}
+        missing = [u for u in upload_ids if u not in found]
+        raise HTTPException(
+            status_code=400,
+            detail=f"Uploads not found, not completed, or already attached: {', '.join(missing)}"
+        )
+    
+    # Keep the order the client listed the uploads in
+    uploads.sort(key=lambda u: upload_ids.index(u.id))
+    return uploads
+
+def attach_complaint_uploads(db: Session, uploads, complaint_id: str, current_user: User):
+    """Attach resolved uploads to a new complaint; fails if another complaint claimed one first"""
+    attached = crud.attach_uploads_to_complaint(db, [u.id for u in uploads], complaint_id, current_user.id)
+    if attached != len(uploads):
+        # The endpoint runs as one unit of work, so the complaint is rolled back too
+        raise HTTPException(
+            status_code=409,
+            detail="Uploads were attached to another complaint while this one was created"
+        )
+
+def get_owned_upload_session(db: Session, session_id: str, current_user: User):
+    upload_session = crud.get_upload_session(db, session_id)
+    if not upload_session or upload_session.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return upload_session
+
+# Resumable upload endpoints
+@app.post("/upload-sessions", response_model=schemas.UploadSessionResponse)
+async def create_upload_session(
+    session_data: schemas.UploadSessionCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Start a resumable upload for a large complaint attachment"""
+    if not upload_service.is_allowed_attachment(session_data.filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file: {session_data.filename}. Allowed types: {', '.join(sorted(upload_service.ALLOWED_ATTACHMENT_EXTENSIONS))}"
+        )
+    
+    if session_data.total_size > upload_service.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds the maximum size of {upload_service.MAX_UPLOAD_SIZE} bytes"
+        )
+    
+    upload_session = crud.create_upload_session(db, session_data, current_user.id)
+    upload_service.create_partial_file(upload_session.id)
+    
+    response.headers["Upload-Offset"] = "0"
+    response.headers["Upload-Chunk-Size"] = str(upload_service.RECOMMENDED_CHUNK_SIZE)
+    return upload_session
+
+@app.get("/upload-sessions/{session_id}", response_model=schemas.UploadSessionResponse)
+async def get_upload_session_status(
+    session_id: str,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the committed offset of an upload so the client can resume from there"""
+    upload_session = get_owned_upload_session(db, session_id, current_user)
+    response.headers["Upload-Offset"] = str(upload_session.received_bytes)
+    return upload_session
+
+@app.put("/upload-sessions/{session_id}/chunks", response_model=schemas.UploadSessionResponse)
+async def upload_session_chunk(
+    session_id: str,
+    offset: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Append a chunk of raw bytes to an upload, starting at `offset`.
+    Re-sending a chunk that was already received is a no-op, so clients can
+    safely retry any chunk whose response they did not see.
+    """
+    upload_session = get_owned_upload_session(db, session_id, current_user)
+    
+    async with upload_service.get_session_lock(session_id):
+        db.refresh(upload_session)
+        if upload_session.status != "in_progress":
+            raise HTTPException(status_code=409, detail=f"Upload is {upload_session.status}")
+        
+        try:
+            new_offset = await upload_service.write_chunk(
+                session_id,
+                request.stream(),
+                offset,
+                upload_session.received_bytes,
+                upload_session.total_size
+            )
+        except upload_service.ChunkOffsetMismatch as e:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Chunk offset {offset} is ahead of the received data",
+                headers={"Upload-Offset": str(e.expected_offset)}
+            )
+        except upload_service.UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        
+        if new_offset != upload_session.received_bytes:
+            upload_session = crud.update_upload_session(db, session_id, received_bytes=new_offset)
+    
+    response.headers["Upload-Offset"] = str(upload_session.received_bytes)
+    return upload_session
+
+@app.post("/upload-sessions/{session_id}/complete", response_model=schemas.UploadSessionResponse)
+async def complete_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Assemble a fully received upload into its final attachment file"""
+    upload_session = get_owned_upload_session(db, session_id, current_user)
+    
+    async with upload_service.get_session_lock(session_id):
+        db.refresh(upload_session)
+        # Completing twice returns the same result
+        if upload_session.status == "completed":
+            return upload_session
+        if upload_session.status != "in_progress":
+            raise HTTPException(status_code=409, detail=f"Upload is {upload_session.status}")
+        
+        if upload_session.received_bytes != upload_session.total_size:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete: received {upload_session.received_bytes} of {upload_session.total_size} bytes",
+                headers={"Upload-Offset": str(upload_session.received_bytes)}
+            )
+        
+        file_path, checksum = await run_in_threadpool(upload_service.assemble_upload, session_id, upload_session.filename)
+        upload_session = crud.update_upload_session(
+            db,
+            session_id,
+            status="completed",
+            file_path=file_path,
+            checksum=checksum,
+            completed_at=datetime.utcnow()
+        )
+    
+    upload_service.release_session_lock(session_id)
+    return upload_session
+
+@app.delete("/upload-sessions/{session_id}")
+async def abort_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Abort an in-progress upload and discard the received data"""
+    upload_session = get_owned_upload_session(db, session_id, current_user)
+    
+    async with upload_service.get_session_lock(session_id):
+        db.refresh(upload_session)
+        if upload_session.status != "in_progress":
+            raise HTTPException(status_code=409, detail=f"Upload is {upload_session.status}")
+        
+        await run_in_threadpool(upload_service.discard_partial_file, session_id)
+        crud.update_upload_session(db, session_id, status="aborted")
+    
+    upload_service.release_session_lock(session_id)
+    return {"message": "Upload aborted successfully"}
+
+@app.get("/complaints/{complaint_id}/attachments", response_model=List[schemas.UploadSessionResponse])
+async def get_complaint_attachments(
+    complaint_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the uploaded attachments of a complaint"""
+    complaint = crud.get_complaint(db, complaint_id)
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    
+    authorized = (
+        current_user.role in ["admin", "ats", "assistant_manager", "manager"] or
+        (complaint.employee and current_user.email == complaint.employee.email)
+    )
+    if not authorized:
+        raise HTTPException(status_code=403, detail="Not authorized to view this complaint's attachments")
+    
+    return crud.get_complaint_uploads(db, complaint_id)
+
+@app.get("/complaints/{complaint_id}/images", response_model=List[schemas.ComplaintImageResponse])
+async def get_complaint_image_details(
+    complaint_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the images of a complaint with their stored metadata (hash, size, dimensions)"""
+    complaint = crud.get_complaint(db, complaint_id)
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    
+    authorized = (
+        current_user.role in ["admin", "ats", "assistant_manager", "manager"] or
+        (complaint.employee and current_user.email == complaint.employee.email)
+    )
+    if not authorized:
+        raise HTTPException(status_code=403, detail="Not authorized to view this complaint's images")
+    
+    return complaint.image_records
+
+@app.get("/complaints/{complaint_id}/events", response_model=List[schemas.ComplaintEventResponse])
+async def get_complaint_timeline(
+    complaint_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the workflow timeline of a complaint (who changed what, oldest first)"""
+    complaint = crud.get_complaint(db, complaint_id)
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    
+    authorized = (
+        current_user.role in ["admin", "ats", "assistant_manager", "manager"] or
+        (complaint.employee and current_user.email == complaint.employee.email)
+    )
+    if not authorized:
+        raise HTTPException(status_code=403, detail="Not authorized to view this complaint's history")
+    
+    return complaint_events.get_timeline(db, complaint_id)
+
+@app.get("/complaint-events", response_model=List[schemas.ComplaintEventResponse])
+async def search_complaint_events(
+    actor_id: Optional[str] = None,
+    complaint_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Audit complaint workflow events, newest first (admins and managers)"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to audit complaint events"
+        )
+    
+    return complaint_events.search_events(db, actor_id, complaint_id, action, since, until, skip, limit)
+
 # Authentication and middleware
 oauth2_scheme = auth.oauth2_scheme
 
 @app.post("/complaints/{complaint_id}/resolve", response_model=schemas.ComplaintResponse)
+@unit_of_work.atomic
 async def resolve_complaint_with_notification(
     complaint_id: str,
     resolution_data: dict,
@@ -2970,6 +3983,8 @@ async def resolve_complaint_with_notification(
         print(f"❌ Complaint not found: {complaint_id}")
         raise HTTPException(status_code=404, detail="Complaint not found")
     
+    work_queue.check_not_claimed_by_other(db, complaint_id, current_user.id)
+    
     print(f"📋 Found complaint: {complaint.title}")
     print(f"👤 Employee: {complaint.employee.name} ({complaint.employee.email})")
     
@@ -2978,6 +3993,7 @@ async def resolve_complaint_with_notification(
     
     try:
         # Update complaint fields directly
+        complaint_events.annotate(db, complaint_id, "resolved", resolution_notes)
         complaint.status = "resolved"
         complaint.resolution_notes = resolution_notes
         complaint.resolution_date = datetime.utcnow()
@@ -3013,7 +4029,8 @@ async def resolve_complaint_with_notification(
             related_id=complaint_id
         )
         
-        notification = crud.create_notification(db, notification_data)
+        with unit_of_work.savepoint(db):
+            notification = crud.create_notification(db, notification_data)
         print(f"📧 Notification created successfully: {notification.id}")
         
     except Exception as e:
@@ -3021,16 +4038,6 @@ async def resolve_complaint_with_notification(
         # Don't fail the complaint resolution if notification fails
         pass
     
-    # Handle images field conversion before returning
-    if hasattr(complaint, 'images') and isinstance(complaint.images, str):
-        try:
-            import json
-            complaint.images = json.loads(complaint.images)
-        except:
-            complaint.images = []
-    elif not hasattr(complaint, 'images') or complaint.images is None:
-        complaint.images = []
-    
     print(f"🎉 Complaint {complaint_id} resolved successfully with notification")
     return complaint
 
@@ -3055,25 +4062,56 @@ async def get_asset_complaints(
         .order_by(Complaint.date_submitted.desc())\
         .all()
     
-    # Process images for each complaint
-    for complaint in complaints:
-        if hasattr(complaint, 'images') and isinstance(complaint.images, str):
-            try:
-                complaint.images = json.loads(complaint.images)
-            except:
-                complaint.images = []
-        elif not hasattr(complaint, 'images') or complaint.images is None:
-            complaint.images = []
-    
     return complaints
 
+@app.get("/assets/{asset_id}/lifespan-prediction", response_model=schemas.AssetLifespanPredictionResponse)
+async def get_asset_lifespan_prediction(
+    asset_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Lifespan prediction of the local model for one asset"""
+    if current_user.role not in ["admin", "manager", "assistant_manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access lifespan predictions"
+        )
+    
+    prediction = lifespan_model.get_prediction(db, asset_id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="No prediction for this asset (unknown or retired)")
+    return prediction
+
+@app.post("/assets/ai-predictions/refresh", status_code=status.HTTP_202_ACCEPTED)
+async def refresh_ai_predictions(
+    background_tasks: BackgroundTasks,
+    force: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Regenerate, in the background, the stored AI predictions of assets whose complaint history changed"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to refresh AI predictions"
+        )
+    
+    pending = db.query(Asset.id).count() if force else len(ai_predictions.find_changed_assets(db))
+    background_tasks.add_task(ai_predictions.run_job, force)
+    return {"message": "AI prediction refresh started", "assets_to_check": pending}
+
 @app.post("/assets/{asset_id}/ai-prediction")
 async def get_asset_ai_prediction(
     asset_id: str,
+    refresh: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get AI-powered prediction for asset lifespan based on complaint history"""
+    """
+    Get AI-powered prediction for asset lifespan based on complaint history.
+    Serves the stored prediction when there is one; ?refresh=true generates
+    a new one.
+    """
     
     # Only managers, assistant managers, and admins can access AI predictions
     if current_user.role not in ["admin", "manager", "assistant_manager"]:
@@ -3082,236 +4120,31 @@ async def get_asset_ai_prediction(
             detail="Not authorized to access AI predictions"
         )
     
+    if not refresh:
+        stored = ai_predictions.get_stored_prediction(db, asset_id)
+        if stored:
+            return stored
+    
     # Get asset details
     asset = db.query(Asset).filter(Asset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
     
-    # Get all complaints for this asset
-    complaints = db.query(Complaint)\
-        .options(joinedload(Complaint.employee))\
-        .filter(Complaint.asset_id == asset_id)\
-        .order_by(Complaint.date_submitted.desc())\
-        .all()
-    
-    # If no complaints, return early without calling AI
-    if not complaints:
-        return {
-            "asset_id": asset_id,
-            "asset_name": asset.name,
-            "prediction": generate_no_complaints_prediction(asset),
-            "complaint_count": 0,
-            "generated_at": datetime.utcnow().isoformat(),
-            "confidence": "high",
-            "note": "No complaint history - prediction based on asset age and condition"
-        }
-    
-    # Prepare complaint history summary for AI analysis
-    complaint_summary = []
-    for complaint in complaints:
-        complaint_summary.append({
-            "title": complaint.title,
-            "description": complaint.description,
-            "priority": complaint.priority,
-            "status": complaint.status,
-            "date_submitted": complaint.date_submitted.strftime("%Y-%m-%d"),
-            "resolution_notes": complaint.resolution_notes or "Not resolved"
-        })
-    
-    # Prepare asset information
-    asset_info = {
-        "name": asset.name,
-        "type": asset.type,
-        "condition": asset.condition,
-        "purchase_date": asset.purchase_date.strftime("%Y-%m-%d") if asset.purchase_date else "Unknown",
-        "purchase_cost": float(asset.purchase_cost) if asset.purchase_cost else 0,
-        "expected_lifespan": asset.expected_lifespan if hasattr(asset, 'expected_lifespan') else 5,
-        "total_repair_cost": float(asset.total_repair_cost) if hasattr(asset, 'total_repair_cost') and asset.total_repair_cost else 0,
-        "complaint_count": len(complaint_summary)
-    }
-    
-    # Prepare the prompt for Perplexity AI
-    prompt = f"""
-    You are an IT asset management expert. Analyze this asset's complaint history and provide a CONCISE prediction.
-
-    Asset: {asset_info['name']} ({asset_info['type']})
-    Condition: {asset_info['condition']} | Purchase Date: {asset_info['purchase_date']}
-    Complaints: {asset_info['complaint_count']}
-
-    Recent Issues:
-    {chr(10).join([f"- {c['date_submitted']}: {c['title']} ({c['priority']} priority)" for c in complaint_summary[:5]])}
-
-    Provide a brief analysis with:
-    1. Predicted remaining lifespan (in months)
-    2. Top risk factors
-    3. Key maintenance recommendations
-    4. Replacement recommendation (yes/no with reason)
-
-    Keep response under 200 words, focus on actionable insights.
-    """
+    complaints = ai_predictions.load_complaints(db, [asset_id])[asset_id]
+    # Local model prediction for the fallback; None for retired assets
+    lifespan_prediction = lifespan_model.get_prediction(db, asset_id)
     
     try:
-        # Call Perplexity AI API
-        PERPLEXITY_API_KEY = "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"
-        
-        headers = {
-            "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": "llama-3.1-sonar-small-128k-online",
-            "messages": [
-                {
-                    "role": "system", 
-                    "content": "You are an IT asset management expert. Provide concise, actionable predictions under 200 words."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            "max_tokens": 300,
-            "temperature": 0.2,
-            "top_p": 0.9
-        }
-        
-        response = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            ai_response = response.json()
-            prediction_text = ai_response["choices"][0]["message"]["content"]
-            
-            return {
-                "asset_id": asset_id,
-                "asset_name": asset.name,
-                "prediction": prediction_text,
-                "complaint_count": len(complaint_summary),
-                "generated_at": datetime.utcnow().isoformat(),
-                "confidence": "high" if len(complaint_summary) >= 3 else "medium" if len(complaint_summary) >= 1 else "low"
-            }
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=f"AI service error: {response.status_code} - {response.text}"
-            )
-            
-    except requests.exceptions.RequestException as e:
-        # Fallback to basic analysis if AI service is unavailable
-        fallback_prediction = generate_fallback_prediction(asset_info, complaint_summary)
-        return {
-            "asset_id": asset_id,
-            "asset_name": asset.name,
-            "prediction": fallback_prediction,
-            "complaint_count": len(complaint_summary),
-            "generated_at": datetime.utcnow().isoformat(),
-            "confidence": "low",
-            "note": "AI service unavailable, using fallback analysis"
-        }
-    except Exception as e:
+        result = await ai_predictions.generate_prediction(asset, complaints, lifespan_prediction, refresh=refresh)
+    except ai_client.AIServiceError as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error generating AI prediction: {str(e)}"
+            detail=f"AI service error: {e.status_code} - {e.detail}"
         )
-
-def generate_no_complaints_prediction(asset):
-    """Generate prediction for assets with no complaint history"""
-    from datetime import datetime
-    
-    # Calculate age
-    if asset.purchase_date:
-        # Convert both to date objects to ensure compatible types
-        purchase_date = asset.purchase_date.date() if hasattr(asset.purchase_date, 'date') else asset.purchase_date
-        current_date = datetime.now().date()
-        age_years = (current_date - purchase_date).days / 365.25
-    else:
-        age_years = 0
-    
-    # Expected lifespan based on asset type and condition
-    expected_lifespan = asset.expected_lifespan if hasattr(asset, 'expected_lifespan') else 5
-    remaining_years = max(0.5, expected_lifespan - age_years)
-    
-    # Adjust based on condition
-    condition_multiplier = {
-        'new': 1.2,
-        'good': 1.0,
-        'fair': 0.8,
-        'poor': 0.6
-    }.get(asset.condition, 1.0)
-    
-    predicted_months = int(remaining_years * 12 * condition_multiplier)
-    
-    return f"""**ASSET PREDICTION - No Complaint History**
-
-**Predicted Remaining Lifespan: {predicted_months} months**
-
-**Analysis:**
-- Current age: {age_years:.1f} years
-- Condition: {asset.condition}
-- Asset type: {asset.type}
-
-**Key Points:**
-✅ No recorded complaints - excellent reliability indicator
-✅ Regular maintenance appears effective
-✅ Asset performing within expected parameters
-
-**Recommendations:**
-- Continue current maintenance schedule
-- Monitor for early signs of wear
-- Plan replacement in {predicted_months // 12} year(s)
-- Consider this asset as a reliability benchmark
-
-**Risk Level: LOW** - Clean complaint history suggests reliable operation."""
-
-def generate_fallback_prediction(asset_info, complaint_summary):
-    """Generate a basic prediction when AI service is unavailable"""
-    from datetime import datetime
-    
-    # Calculate basic metrics
-    complaint_count = len(complaint_summary)
-    high_priority_complaints = len([c for c in complaint_summary if c.get('priority') == 'high'])
-    recent_complaints = len([c for c in complaint_summary if 
-                           datetime.strptime(c['date_submitted'], '%Y-%m-%d') > datetime.now() - timedelta(days=90)])
-    
-    # Basic scoring algorithm
-    base_score = 36  # 36 months base lifespan
-    
-    # Reduce based on complaints
-    score_reduction = complaint_count * 2 + high_priority_complaints * 4 + recent_complaints * 3
     
-    # Adjust based on condition
-    condition_multiplier = {
-        'new': 1.2,
-        'good': 1.0,
-        'fair': 0.8,
-        'poor': 0.5
-    }.get(asset_info['condition'], 1.0)
-    
-    predicted_months = max(1, int((base_score - score_reduction) * condition_multiplier))
-    
-    return f"""**FALLBACK ANALYSIS - AI Service Unavailable**
-
-**Predicted Remaining Lifespan: {predicted_months} months**
-
-**Analysis Summary:**
-- Total complaints: {complaint_count}
-- High priority issues: {high_priority_complaints}
-- Recent complaints (90 days): {recent_complaints}
-- Current condition: {asset_info['condition']}
-
-**Recommendations:**
-- Monitor closely due to complaint history
-- Regular maintenance checks recommended
-- Budget for replacement in {predicted_months // 12} year(s)
-
-**Risk Assessment:** {"HIGH" if predicted_months < 6 else "MEDIUM" if predicted_months < 18 else "LOW"}
-
-Note: Basic analysis only. Try again when AI service is available."""
+    stored = ai_predictions.store_prediction(db, result)
+    db.commit()
+    return ai_predictions.prediction_response(stored, asset.name)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Database migration script to move complaint images out of the complaints.images
+JSON text column into the complaint_images table.
+
+Each image path becomes one row with its position, content hash, file size and
+pixel dimensions. Complaints that already have complaint_images rows are
+skipped, so the script can safely be run more than once. The legacy column is
+left in place; it is no longer read or written by the application.
+
+The final commit of a successful run records a marker in table_versions. The
+application runs the backfill on startup until that marker exists, and never
+again afterwards, so images removed later are not brought back.
+"""
+
+import os
+import sys
+import json
+from datetime import datetime
+from sqlalchemy import inspect, select, text
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(__file__))
+
+from database import engine, SessionLocal
+from models import ChangeLog, ComplaintImage, TableVersion
+import crud
+
+BATCH_SIZE = 500
+
+# table_versions row recording that a backfill has committed
+MIGRATED_MARKER = "complaint_images_backfill"
+
+def is_migrated(bind=engine):
+    """Whether a backfill has already committed"""
+    if not inspect(bind).has_table(TableVersion.__tablename__):
+        return False
+    with bind.connect() as connection:
+        marker = connection.execute(
+            select(TableVersion.table_name).where(TableVersion.table_name == MIGRATED_MARKER)
+        ).first()
+    return marker is not None
+
+def _mark_migrated(db):
+    if db.get(TableVersion, MIGRATED_MARKER) is None:
+        db.add(TableVersion(table_name=MIGRATED_MARKER, version=1, updated_at=datetime.utcnow()))
+
+def migrate_complaint_images():
+    """Copy complaints.images JSON into complaint_images rows"""
+
+    # Create the complaint_images table if it doesn't exist yet, and the
+    # change tracking tables every commit below writes to
+    for table in (ComplaintImage.__table__, TableVersion.__table__, ChangeLog.__table__):
+        table.create(bind=engine, checkfirst=True)
+    print("✅ complaint_images table is present")
+
+    inspector = inspect(engine)
+    db = SessionLocal()
+    migrated_complaints = 0
+    migrated_images = 0
+
+    try:
+        if not inspector.has_table("complaints"):
+            # Fresh database: complaints is created by create_all without the column
+            print("ℹ️  complaints table not found - nothing to migrate")
+            _mark_migrated(db)
+            db.commit()
+            return True
+
+        columns = [column["name"] for column in inspector.get_columns("complaints")]
+        if "images" not in columns:
+            print("ℹ️  complaints.images column not found - nothing to migrate")
+            _mark_migrated(db)
+            db.commit()
+            return True
+
+        already_migrated = {
+            row[0] for row in db.execute(text("SELECT DISTINCT complaint_id FROM complaint_images"))
+        }
+
+        rows = db.execute(text(
+            "SELECT id, images FROM complaints WHERE images IS NOT NULL AND images != '' AND images != '[]'"
+        )).fetchall()
+        print(f"📋 Found {len(rows)} complaints with legacy images")
+
+        pending = 0
+        for complaint_id, images_json in rows:
+            if complaint_id in already_migrated:
+                continue
+
+            try:
+                image_paths = json.loads(images_json)
+            except (TypeError, ValueError):
+                print(f"⚠️  Skipping complaint {complaint_id}: invalid images JSON")
+                continue
+
+            if not isinstance(image_paths, list):
+                print(f"⚠️  Skipping complaint {complaint_id}: images is not a list")
+                continue
+
+            image_paths = [path for path in image_paths if isinstance(path, str) and path]
+            for image in crud.build_complaint_images(image_paths):
+                image.complaint_id = complaint_id
+                db.add(image)
+                migrated_images += 1
+                pending += 1
+            migrated_complaints += 1
+
+            if pending >= BATCH_SIZE:
+                db.commit()
+                pending = 0
+
+        _mark_migrated(db)
+        db.commit()
+        print(f"✅ Migrated {migrated_images} images from {migrated_complaints} complaints")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("Starting complaint images migration...")
+    success = migrate_complaint_images()
+
+    if success:
+        print("\n🎉 Migration completed successfully!")
+    else:
+        print("\n💥 Migration failed!")
+        exit(1)
@@ -1,11 +1,9 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Integer, Text, Boolean, Enum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Integer, BigInteger, Text, Boolean, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.hybrid import hybrid_property
 from database import Base
 import uuid
 from datetime import datetime
 import enum
-import json
 from typing import List
 
 class UserRole(enum.Enum):
@@ -58,6 +56,11 @@ class QuoteRequestStatus(enum.Enum):
     FULFILLED = "fulfilled"
     CANCELLED = "cancelled"
 
+class UploadSessionStatus(enum.Enum):
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+
 class QuoteResponseStatus(enum.Enum):
     PENDING_REVIEW = "pending_review"
     ACCEPTED = "accepted"
@@ -103,26 +106,46 @@ class Complaint(Base):
     status = Column(String(50), default="open")
     date_submitted = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    images = Column(Text)  # JSON string of base64 image data
     assigned_to = Column(String(36), ForeignKey("users.id"), nullable=True)
     resolution_notes = Column(Text, nullable=True)
     resolution_date = Column(DateTime, nullable=True)
     component_purchase_reason = Column(Text, nullable=True)  # Component purchase details for ATS forwarding
+    # Optimistic concurrency: ORM updates require the version that was read (see versioning.py)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     employee = relationship("Employee", back_populates="complaints")
     asset = relationship("Asset")
     replies = relationship("Reply", back_populates="complaint", cascade="all, delete-orphan")
     handler = relationship("User", foreign_keys=[assigned_to])
+    # Selectin loading fetches the images of a whole page of complaints in one query
+    image_records = relationship(
+        "ComplaintImage",
+        back_populates="complaint",
+        cascade="all, delete-orphan",
+        order_by="ComplaintImage.position",
+        lazy="selectin"
+    )
+    
+    __mapper_args__ = {"version_id_col": version}
     
-    @hybrid_property
-    def images_list(self) -> List[str]:
-        """Convert images JSON string to list."""
-        if not self.images:
-            return []
-        try:
-            return json.loads(self.images)
-        except:
-            return []
+    @property
+    def images(self) -> List[str]:
+        """Image paths in display order."""
+        return [image.path for image in self.image_records]
+
+class ComplaintImage(Base):
+    __tablename__ = "complaint_images"
+    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    complaint_id = Column(String(36), ForeignKey("complaints.id"), nullable=False, index=True)
+    path = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the file
+    size_bytes = Column(Integer, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    position = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    complaint = relationship("Complaint", back_populates="image_records")
 
 class Reply(Base):
     __tablename__ = "replies"
@@ -154,10 +177,14 @@ class Asset(Base):
     assigned_date = Column(DateTime, nullable=True)
     vendor_id = Column(String(36), ForeignKey("vendors.id"), nullable=True)
     warranty_expiry = Column(DateTime, nullable=True)
+    # Optimistic concurrency: ORM updates require the version that was read (see versioning.py)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     assigned_to = relationship("Employee", back_populates="assigned_assets")
     vendor = relationship("Vendor", back_populates="supplied_assets")
     maintenance_history = relationship("MaintenanceRecord", back_populates="asset")
+    
+    __mapper_args__ = {"version_id_col": version}
 
 class Vendor(Base):
     __tablename__ = "vendors"
@@ -250,9 +277,8 @@ class QuoteRequestVendor(Base):
     vendor = relationship("Vendor")
     
     __table_args__ = (
-        # Add UniqueConstraint to ensure a vendor can only be added once to a quote request
-        # Import UniqueConstraint above if using this constraint
-        # UniqueConstraint('quote_request_id', 'vendor_id', name='uq_quote_request_vendor'),
+        # A vendor can only be added once to a quote request (upserted on this key)
+        UniqueConstraint('quote_request_id', 'vendor_id', name='uq_quote_request_vendor'),
     )
 
 class QuoteResponse(Base):
@@ -268,7 +294,153 @@ class QuoteResponse(Base):
     reviewed_at = Column(DateTime, nullable=True)
     reviewed_by_id = Column(String(36), ForeignKey("users.id"), nullable=True)
     notes = Column(Text, nullable=True)
+    # Optimistic concurrency: ORM updates require the version that was read (see versioning.py)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     quote_request = relationship("QuoteRequest", back_populates="responses")
     vendor = relationship("Vendor", back_populates="quote_responses")
-    reviewed_by = relationship("User", back_populates="quote_responses_reviewed")
\ No newline at end of file
+    reviewed_by = relationship("User", back_populates="quote_responses_reviewed")
+    
+    __table_args__ = (
+        # One response per vendor and quote request; resubmissions update it in place
+        UniqueConstraint('quote_request_id', 'vendor_id', name='uq_quote_response_vendor'),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=True)
+    total_size = Column(BigInteger, nullable=False)
+    received_bytes = Column(BigInteger, default=0)  # Current upload offset
+    status = Column(String(20), nullable=False, default="in_progress")
+    file_path = Column(String(500), nullable=True)  # Set once the upload is assembled
+    checksum = Column(String(64), nullable=True)  # SHA-256 of the assembled file
+    complaint_id = Column(String(36), ForeignKey("complaints.id"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    
+    user = relationship("User")
+    complaint = relationship("Complaint")
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every committed change
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+    metric = Column(String(64), primary_key=True)  # e.g. asset_status
+    key = Column(String(100), primary_key=True)  # e.g. available, or "total"
+    value = Column(Integer, nullable=False, default=0)
+
+class LifespanModel(Base):
+    __tablename__ = "lifespan_models"
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Latest id is the current model
+    coefficients = Column(Text, nullable=False)  # JSON: intercept, weights, feature means / scales
+    assets = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)  # Retired assets seen in training
+    trained_at = Column(DateTime, default=datetime.utcnow)
+
+class AssetLifespanPrediction(Base):
+    __tablename__ = "asset_lifespan_predictions"
+    asset_id = Column(String(36), ForeignKey("assets.id"), primary_key=True)
+    remaining_months = Column(Float, nullable=False)
+    failure_probability_12m = Column(Float, nullable=False, index=True)
+    risk_multiplier = Column(Float, nullable=False)
+    complaint_count = Column(Integer, nullable=False, default=0)
+    model_id = Column(Integer, ForeignKey("lifespan_models.id"), nullable=True)
+    generated_at = Column(DateTime, default=datetime.utcnow)
+    stale = Column(Boolean, nullable=False, default=False, index=True)  # Inputs changed since generated_at
+
+class AssetAIPrediction(Base):
+    __tablename__ = "asset_ai_predictions"
+    asset_id = Column(String(36), ForeignKey("assets.id"), primary_key=True)
+    prediction = Column(Text, nullable=False)
+    confidence = Column(String(20), nullable=False)
+    note = Column(String(255), nullable=True)  # e.g. fallback analysis used
+    complaint_count = Column(Integer, nullable=False, default=0)
+    input_hash = Column(String(64), nullable=False)  # Hash of the asset fields and complaint history used
+    generated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class ComplaintEvent(Base):
+    __tablename__ = "complaint_events"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # No foreign keys: the log outlives deleted complaints and users
+    complaint_id = Column(String(36), nullable=False)
+    actor_id = Column(String(36), nullable=True)  # None for changes made outside a request
+    role = Column(String(50), nullable=True)
+    action = Column(String(50), nullable=False)  # created, forwarded, approved, rejected, resolved, ...
+    from_status = Column(String(50), nullable=True)
+    to_status = Column(String(50), nullable=True)
+    notes = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_complaint_events_complaint_time", "complaint_id", "created_at"),
+        Index("ix_complaint_events_actor_time", "actor_id", "created_at"),
+    )
+
+class ATSQueueItem(Base):
+    __tablename__ = "ats_queue"
+    # One row per complaint in the ATS inbox, kept in step by work_queue
+    complaint_id = Column(String(36), primary_key=True)
+    priority_rank = Column(Integer, nullable=False)  # 0 = critical ... 4 = unknown
+    submitted_at = Column(DateTime, nullable=False)
+    claimed_by = Column(String(36), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=False)  # In the past when nobody holds the row
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_ats_queue_order", "priority_rank", "submitted_at"),
+        Index("ix_ats_queue_claimed", "claimed_by", "lease_expires_at"),
+    )
+
+class ComplaintAssignment(Base):
+    __tablename__ = "complaint_assignments"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Audit record of an automatic assignment; no foreign keys, like complaint_events
+    complaint_id = Column(String(36), nullable=False, index=True)
+    agent_id = Column(String(36), nullable=False)
+    priority = Column(String(20), nullable=True)
+    asset_type = Column(String(100), nullable=True)
+    agent_load = Column(Float, nullable=False)  # Priority-weighted load before this complaint
+    affinity = Column(Float, nullable=False, default=0.0)  # 0..1 experience with the asset type
+    reason = Column(String(50), nullable=False)  # least_loaded or asset_type_affinity
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_complaint_assignments_agent_time", "agent_id", "created_at"),
+    )
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Doubles as the sync cursor (assigned in commit order)
+    table_name = Column(String(64), nullable=False)
+    row_id = Column(String(36), nullable=False)
+    owner_id = Column(String(36), nullable=True)  # Employee of a complaint, user of a notification
+    operation = Column(String(10), nullable=False)  # upsert or delete
+    changed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index("ix_change_log_table_cursor", "table_name", "id"),
+        Index("ix_change_log_table_owner_cursor", "table_name", "owner_id", "id"),
+        # Never reuse ids after pruning, or old cursors would skip new changes
+        {"sqlite_autoincrement": True},
+    )
+
+# Session listeners that keep the derived tables (table versions and the change
+# log, statistics counters, the complaint event log, the ATS queue, stale
+# lifespan predictions) and the agent workload balancer in step with writes.
+# They are registered here, with the models, so every writer gets them - not
+# only the API, but also scripts that use the models without importing crud.
+import change_tracking
+import stat_counters
+import complaint_events
+import work_queue
+import lifespan_model
+import auto_assign
@@ -0,0 +1,210 @@
+"""
+Per-role portal bootstrap: everything a portal's landing screen needs in one call.
+
+Instead of /users/me, the role's inbox, the notification count, assets and
+statistics as separate requests, GET /portal/bootstrap composes them for the
+caller's role. Each section is a handful of aggregated queries (GROUP BY
+counts, precomputed statistics counters, eager-loaded lists) and independent
+sections run concurrently in the threadpool, each on its own session.
+
+Every bootstrap counts the SQL statements it issues. QUERY_BUDGETS holds the
+allowed number per role. The count and the role's budget are returned in
+X-Query-Count and X-Query-Budget; the server only logs a bootstrap over its
+budget, and test_portal_bootstrap.py is what fails when a change adds queries.
+"""
+
+import asyncio
+import contextvars
+import logging
+from contextvars import ContextVar
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import desc, event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+import crud
+import schemas
+import stat_counters
+from database import SessionLocal
+from models import Asset, Complaint, Notification, QuoteRequest, QuoteResponse, User
+
+logger = logging.getLogger(__name__)
+
+# Items in each landing-screen list
+INBOX_SIZE = 20
+RECENT_NOTIFICATIONS = 5
+
+# Maximum SQL statements per bootstrap, by role
+QUERY_BUDGETS = {
+    "employee": 8,
+    "ats": 6,
+    "assistant_manager": 6,
+    "manager": 6,
+    "vendor": 5,
+    "admin": 7,
+}
+
+# Statements issued by the current bootstrap; list.append is safe across section threads
+_executed_queries: ContextVar[Optional[List[str]]] = ContextVar("bootstrap_executed_queries", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    executed = _executed_queries.get()
+    if executed is not None:
+        executed.append(statement)
+
+
+class PortalUser:
+    """Plain copy of the caller, safe to hand to section threads."""
+
+    def __init__(self, user: User):
+        self.id = user.id
+        self.email = user.email
+        self.role = user.role
+
+
+# Complaint list sections serialize the full ComplaintResponse; load it in three queries
+COMPLAINT_LOAD_OPTIONS = [
+    joinedload(Complaint.employee),
+    joinedload(Complaint.asset).joinedload(Asset.assigned_to),
+    joinedload(Complaint.asset).joinedload(Asset.vendor),
+    selectinload(Complaint.replies),
+    selectinload(Complaint.image_records),
+]
+
+
+def _complaint_inbox(db: Session, criteria=None) -> dict:
+    """Counts by status for the view, and its most recent complaints."""
+    counts = db.query(Complaint.status, func.count(Complaint.id))
+    complaints = db.query(Complaint).options(*COMPLAINT_LOAD_OPTIONS)
+    if criteria is not None:
+        counts = counts.filter(criteria)
+        complaints = complaints.filter(criteria)
+
+    counts = counts.group_by(Complaint.status).all()
+    complaints = complaints.order_by(desc(Complaint.date_submitted)).limit(INBOX_SIZE).all()
+    return {
+        "complaint_counts": {complaint_status: count for complaint_status, count in counts},
+        "complaints": [schemas.ComplaintResponse.model_validate(complaint) for complaint in complaints],
+    }
+
+
+def notifications_section(db: Session, user: PortalUser) -> dict:
+    unread_count = crud.get_user_notifications_query(db, user.id, unread_only=True)\
+        .with_entities(func.count(Notification.id))\
+        .scalar()
+    recent = crud.get_user_notifications(db, user.id, limit=RECENT_NOTIFICATIONS)
+    return {
+        "unread_notifications": unread_count,
+        "notifications": [schemas.NotificationResponse.model_validate(notification) for notification in recent],
+    }
+
+
+def employee_section(db: Session, user: PortalUser) -> dict:
+    employee = crud.get_employee_by_email(db, user.email)
+    if employee is None:
+        return {"employee": None, "complaint_counts": {}, "complaints": [], "assets": []}
+
+    assets = db.query(Asset)\
+        .options(joinedload(Asset.assigned_to), joinedload(Asset.vendor))\
+        .filter(Asset.assigned_to_id == employee.id)\
+        .all()
+    return {
+        "employee": schemas.EmployeeResponse.model_validate(employee),
+        **_complaint_inbox(db, Complaint.employee_id == employee.id),
+        "assets": [schemas.AssetResponse.model_validate(asset) for asset in assets],
+    }
+
+
+def ats_section(db: Session, user: PortalUser) -> dict:
+    return _complaint_inbox(db, Complaint.status.in_(crud.ATS_INBOX_STATUSES))
+
+
+def assistant_manager_section(db: Session, user: PortalUser) -> dict:
+    return _complaint_inbox(db, crud.assistant_manager_inbox_filter(user.id))
+
+
+def manager_section(db: Session, user: PortalUser) -> dict:
+    return _complaint_inbox(db, Complaint.status.in_(crud.MANAGER_INBOX_STATUSES))
+
+
+def vendor_section(db: Session, user: PortalUser) -> dict:
+    vendor = crud.get_vendor_by_email(db, user.email)
+    if vendor is None:
+        return {"vendor": None, "quote_requests": []}
+
+    quote_requests = crud.get_vendor_quote_requests(
+        db, vendor.id, limit=INBOX_SIZE,
+        options=[selectinload(QuoteRequest.responses).joinedload(QuoteResponse.vendor)]
+    )
+    return {
+        "vendor": schemas.VendorResponse.model_validate(vendor),
+        "quote_requests": [
+            schemas.QuoteRequestDetailResponse.model_validate(quote_request) for quote_request in quote_requests
+        ],
+    }
+
+
+def admin_section(db: Session, user: PortalUser) -> dict:
+    counters = stat_counters.get_counters(db, ["employees", "assets", "complaints", "vendors", "asset_status"])
+    return {
+        "totals": {
+            metric: stat_counters.get_total(counters, metric)
+            for metric in ("employees", "assets", "complaints", "vendors")
+        },
+        "asset_counts": counters.get("asset_status", {}),
+        **_complaint_inbox(db),
+    }
+
+
+# Sections composed for each role; each runs on its own session
+PORTAL_SECTIONS: Dict[str, List[Callable[[Session, PortalUser], dict]]] = {
+    "employee": [notifications_section, employee_section],
+    "ats": [notifications_section, ats_section],
+    "assistant_manager": [notifications_section, assistant_manager_section],
+    "manager": [notifications_section, manager_section],
+    "vendor": [notifications_section, vendor_section],
+    "admin": [notifications_section, admin_section],
+}
+
+
+def _run_section(section: Callable[[Session, PortalUser], dict], user: PortalUser) -> dict:
+    db = SessionLocal()
+    try:
+        return section(db, user)
+    finally:
+        db.close()
+
+
+async def build_bootstrap(user: User) -> Tuple[dict, int]:
+    """
+    Return the landing-screen payload for the user's role and the number of
+    SQL statements it took.
+    """
+    portal_user = PortalUser(user)
+    sections = PORTAL_SECTIONS.get(portal_user.role, [notifications_section])
+
+    executed = []
+    token = _executed_queries.set(executed)
+    try:
+        loop = asyncio.get_running_loop()
+        # Each thread runs in a copy of this context, so they all record into `executed`
+        results = await asyncio.gather(*[
+            loop.run_in_executor(None, partial(contextvars.copy_context().run, _run_section, section, portal_user))
+            for section in sections
+        ])
+    finally:
+        _executed_queries.reset(token)
+
+    payload = {"role": portal_user.role, "user": schemas.UserResponse.model_validate(user)}
+    for result in results:
+        payload.update(result)
+
+    query_count = len(executed)
+    budget = QUERY_BUDGETS.get(portal_user.role)
+    if budget is not None and query_count > budget:
+        logger.warning(f"Portal bootstrap for {portal_user.role} used {query_count} queries (budget {budget})")
+    return payload, query_count
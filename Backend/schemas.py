@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, EmailStr, validator
 from datetime import datetime
-from typing import List, Optional, Union, Any
+from typing import Dict, List, Optional, Union, Any
 import json
 from enum import Enum
 
@@ -55,6 +55,11 @@ class QuoteRequestStatusEnum(str, Enum):
     FULFILLED = "fulfilled"
     CANCELLED = "cancelled"
 
+class UploadSessionStatusEnum(str, Enum):
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+
 class QuoteResponseStatusEnum(str, Enum):
     PENDING_REVIEW = "pending_review"
     ACCEPTED = "accepted"
@@ -138,6 +143,7 @@ class ComplaintCreate(ComplaintBase):
     employee_id: str
     asset_id: Optional[str] = None
     images: Optional[List[str]] = []
+    upload_ids: Optional[List[str]] = []  # Completed resumable upload sessions to attach
 
 class ComplaintUpdate(BaseModel):
     title: Optional[str] = None
@@ -147,6 +153,7 @@ class ComplaintUpdate(BaseModel):
     assigned_to: Optional[str] = None
     resolution_notes: Optional[str] = None
     component_purchase_reason: Optional[str] = None
+    version: Optional[int] = None  # Version the change is based on; 409 if it is stale
 
 class ComplaintResponse(ComplaintBase):
     id: str
@@ -160,29 +167,31 @@ class ComplaintResponse(ComplaintBase):
     resolution_notes: Optional[str] = None
     resolution_date: Optional[datetime] = None
     component_purchase_reason: Optional[str] = None
+    version: int = 1
     employee: EmployeeResponse
     asset: Optional["AssetResponse"] = None
     replies: List[ReplyResponse] = []
     
-    @validator('images', pre=True)
-    def parse_images(cls, v):
-        """Convert images from JSON string to list"""
-        if isinstance(v, str):
-            try:
-                return json.loads(v) if v else []
-            except:
-                return []
-        elif isinstance(v, list):
-            return v
-        else:
-            return []
-    
     class Config:
         from_attributes = True
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
 
+class ComplaintImageResponse(BaseModel):
+    id: str
+    complaint_id: str
+    path: str
+    content_hash: Optional[str] = None
+    size_bytes: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    position: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
 class AssetBase(BaseModel):
     name: str
     type: str
@@ -207,9 +216,11 @@ class AssetUpdate(BaseModel):
     next_maintenance_due: Optional[datetime] = None
     assigned_to_id: Optional[str] = None
     assigned_date: Optional[datetime] = None
+    version: Optional[int] = None  # Version the change is based on; 409 if it is stale
 
 class AssetAssign(BaseModel):
     employee_id: str
+    version: Optional[int] = None
 
 class AssetResponse(AssetBase):
     id: str
@@ -219,6 +230,7 @@ class AssetResponse(AssetBase):
     assigned_date: Optional[datetime] = None
     vendor_id: Optional[str] = None
     warranty_expiry: Optional[datetime] = None
+    version: int = 1
     assigned_to: Optional["EmployeeResponse"] = None
     vendor: Optional["VendorResponse"] = None
     
@@ -398,6 +410,7 @@ class QuoteResponseResponse(QuoteResponseBase):
     reviewed_at: Optional[datetime] = None
     reviewed_by_id: Optional[str] = None
     notes: Optional[str] = None
+    version: int = 1
     vendor: VendorResponse
     
     class Config:
@@ -415,6 +428,126 @@ class QuoteRequestDetailResponse(QuoteRequestBase):
     class Config:
         from_attributes = True
 
+class QuoteRequestSummaryResponse(QuoteRequestBase):
+    # List mode of the quote request lists: response stats instead of nested rows
+    id: str
+    status: QuoteRequestStatusEnum
+    created_by_id: str
+    created_at: datetime
+    completed_date: Optional[datetime] = None
+    invited_count: int
+    responded_count: int
+    min_quote_amount: Optional[float]
+    avg_quote_amount: Optional[float]
+    latest_submission: Optional[datetime]
+
+# Resumable upload schemas
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int = Field(..., gt=0)
+    content_type: Optional[str] = None
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    content_type: Optional[str] = None
+    total_size: int
+    received_bytes: int
+    status: UploadSessionStatusEnum
+    file_path: Optional[str] = None
+    checksum: Optional[str] = None
+    complaint_id: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+# Delta sync schemas (?updated_since=<cursor>)
+class ComplaintSyncResponse(BaseModel):
+    items: List[ComplaintResponse]  # Changed complaints still in the requested view
+    deleted: List[str]  # Deleted complaints, or ones that left the view
+    cursor: int  # Pass back as updated_since on the next poll
+    has_more: bool
+
+class NotificationSyncResponse(BaseModel):
+    items: List[NotificationResponse]
+    deleted: List[str]
+    cursor: int
+    has_more: bool
+
+# Batch fetch-by-ids schemas
+class EmployeeBatchResponse(BaseModel):
+    items: Dict[str, Optional[EmployeeResponse]]  # Every requested id; null when missing or forbidden
+    errors: Dict[str, str]  # id -> "not_found" / "forbidden"
+
+class AssetBatchResponse(BaseModel):
+    items: Dict[str, Optional[AssetResponse]]
+    errors: Dict[str, str]
+
+class ComplaintEventResponse(BaseModel):
+    id: int
+    complaint_id: str
+    actor_id: Optional[str] = None
+    role: Optional[str] = None
+    action: str
+    from_status: Optional[str] = None
+    to_status: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AssetLifespanPredictionResponse(BaseModel):
+    asset_id: str
+    remaining_months: float  # Median remaining life
+    failure_probability_12m: float
+    risk_multiplier: float  # Hazard relative to an average asset of the same age and lifespan
+    complaint_count: int
+    model_id: Optional[int] = None
+    generated_at: datetime
+
+    class Config:
+        from_attributes = True
+        protected_namespaces = ()
+
+class LifespanModelResponse(BaseModel):
+    id: int
+    assets: int
+    failures: int
+    trained_at: datetime
+    features: List[str]
+    intercept: float
+    coefficients: Dict[str, float]
+
+class VendorBatchResponse(BaseModel):
+    items: Dict[str, Optional[VendorResponse]]
+    errors: Dict[str, str]
+
+class QuoteResponseBatchResponse(BaseModel):
+    items: Dict[str, Optional[QuoteResponseResponse]]
+    errors: Dict[str, str]
+
+# Multiplexed /batch schemas
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None  # Echoed back to match responses to requests
+    method: str = "GET"
+    path: str  # Path and query string, e.g. /assets/?limit=10
+    headers: Optional[Dict[str, str]] = None  # Accept / If-None-Match / If-Modified-Since
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+class BatchSubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str]
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -432,6 +565,85 @@ class ATSComplaintForward(BaseModel):
     status: Optional[str] = "forwarded"
     assigned_to: Optional[str] = None
 
+# ATS work queue
+class ATSQueueClaimRequest(BaseModel):
+    count: int = Field(1, ge=1)
+    lease_seconds: Optional[int] = Field(None, gt=0)
+
+class ATSQueueLeaseRequest(BaseModel):
+    complaint_ids: List[str]
+    lease_seconds: Optional[int] = Field(None, gt=0)
+
+class ATSQueueClaimResponse(BaseModel):
+    complaints: List[ComplaintResponse]
+    lease_expires_at: datetime
+
+class ATSQueueLeaseResponse(BaseModel):
+    complaint_ids: List[str]
+    lease_expires_at: Optional[datetime] = None
+
+# Automatic complaint assignment
+class ComplaintAssignmentResponse(BaseModel):
+    id: int
+    complaint_id: str
+    agent_id: str
+    priority: Optional[str] = None
+    asset_type: Optional[str] = None
+    agent_load: float
+    affinity: float
+    reason: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AgentWorkloadResponse(BaseModel):
+    agent_id: str
+    load: float
+    active_complaints: int
+
+# Bulk complaint transitions
+class BulkTransitionActionEnum(str, Enum):
+    RESOLVE = "resolve"
+    FORWARD = "forward"
+    FORWARD_TO_MANAGER = "forward_to_manager"
+    REJECT = "reject"
+
+class BulkComplaintTransition(BaseModel):
+    action: BulkTransitionActionEnum
+    complaint_ids: List[str]
+    # Resolution notes, component purchase reason, forwarding notes or rejection reason
+    notes: Optional[str] = None
+    assigned_to: Optional[str] = None
+    # Apply nothing unless every complaint can make the transition
+    all_or_nothing: bool = False
+
+class BulkTransitionResult(BaseModel):
+    complaint_id: str
+    success: bool
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkTransitionResponse(BaseModel):
+    action: str
+    applied: int
+    failed: int
+    results: List[BulkTransitionResult]
+
+class BulkVendorInvitation(BaseModel):
+    # Vendors to invite by id, and/or every vendor offering a service type
+    vendor_ids: List[str] = []
+    service_type: Optional[str] = None
+    send_email: bool = True
+
+class BulkVendorInvitationResponse(BaseModel):
+    quote_request_id: str
+    invited: int
+    already_invited: int
+    invited_vendor_ids: List[str]
+    not_found: List[str]
+
 # Update forward references
 ComplaintResponse.model_rebuild()
-AssetResponse.model_rebuild()
\ No newline at end of file
+AssetResponse.model_rebuild()
+ComplaintSyncResponse.model_rebuild()
\ No newline at end of file
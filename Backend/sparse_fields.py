@@ -0,0 +1,136 @@
+"""
+Sparse fieldsets for read endpoints: ?fields=id,name,serial_number
+
+The requested fields decide both what is loaded and what is serialized.
+Columns are restricted with load_only, requested relationships are
+selectin-loaded (together with the relationships their nested schema needs)
+and every other relationship is left unloaded. Rows are then serialized
+through a cached model that holds only the requested fields, so nothing
+outside the selection is ever touched.
+"""
+
+import typing
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import lazyload, load_only, selectinload
+
+# Schema fields served by a model property rather than a mapped attribute,
+# mapped to the relationships the property reads
+DERIVED_FIELDS = {
+    "images": ("image_records",),
+}
+
+# How deep nested relationships of a requested relationship are preloaded
+MAX_NESTED_DEPTH = 2
+
+
+def parse_fields(fields: Optional[str], schema) -> Optional[Tuple[str, ...]]:
+    """Split and validate ?fields= against the response schema."""
+    if not fields:
+        return None
+
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in schema.model_fields]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(schema.model_fields)}"
+        )
+    return requested
+
+
+def _nested_schema(annotation) -> Optional[type]:
+    """The BaseModel inside Optional[...] / List[...], if any."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        nested = _nested_schema(arg)
+        if nested is not None:
+            return nested
+    return None
+
+
+def _mapped_names(mapper, schema, names) -> Tuple[set, set]:
+    """Split schema field names into (column attributes, relationships)."""
+    columns, relationships = set(), set()
+    for name in names:
+        for attr in DERIVED_FIELDS.get(name, (name,)):
+            if attr in mapper.relationships:
+                relationships.add(attr)
+            elif attr in mapper.column_attrs:
+                columns.add(attr)
+    return columns, relationships
+
+
+def _relationship_loaders(model, schema, relationships, depth: int) -> list:
+    mapper = inspect(model)
+    loaders = []
+    for name in sorted(relationships):
+        loader = selectinload(getattr(model, name))
+        field = schema.model_fields.get(name)
+        nested_schema = _nested_schema(field.annotation) if field is not None else None
+        if nested_schema is not None and depth < MAX_NESTED_DEPTH:
+            target = mapper.relationships[name].mapper.class_
+            _, nested_relationships = _mapped_names(inspect(target), nested_schema, nested_schema.model_fields)
+            if nested_relationships:
+                loader = loader.options(*_relationship_loaders(target, nested_schema, nested_relationships, depth + 1))
+        loaders.append(loader)
+    return loaders
+
+
+def load_options(model, schema, fields: Optional[Tuple[str, ...]]) -> Optional[list]:
+    """
+    Loader options for a query returning `model` rows serialized with only
+    `fields`. Returns None when no fieldset was requested, so callers fall
+    back to their usual eager loading.
+    """
+    if fields is None:
+        return None
+
+    mapper = inspect(model)
+    columns, relationships = _mapped_names(mapper, schema, fields)
+
+    # Primary key and the foreign keys the requested relationships join on
+    column_keys = {mapper.get_property_by_column(column).key for column in mapper.primary_key}
+    column_keys |= columns
+    for name in relationships:
+        for column in mapper.relationships[name].local_columns:
+            prop = mapper.get_property_by_column(column)
+            if prop is not None:
+                column_keys.add(prop.key)
+
+    options = [load_only(*[getattr(model, key) for key in sorted(column_keys)])]
+    options += _relationship_loaders(model, schema, relationships, depth=1)
+    options += [lazyload(getattr(model, name)) for name in mapper.relationships.keys() if name not in relationships]
+    return options
+
+
+@lru_cache(maxsize=256)
+def _partial_adapter(schema, fields: Tuple[str, ...], many: bool) -> TypeAdapter:
+    partial = create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    )
+    return TypeAdapter(List[partial] if many else partial)
+
+
+def dump(schema, rows: Any, fields: Tuple[str, ...], many: bool = True):
+    """JSON-compatible data holding only `fields` of each row."""
+    adapter = _partial_adapter(schema, fields, many)
+    return adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+
+
+def sparse_response(schema, rows: Any, fields: Tuple[str, ...], response: Optional[Response] = None, many: bool = True) -> Response:
+    """
+    Serialize only `fields` of the rows. Headers already set on the endpoint's
+    injected `response` are carried over.
+    """
+    adapter = _partial_adapter(schema, fields, many)
+    content = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,307 @@
+"""
+Precomputed dashboard statistics.
+
+stat_counters holds one row per (metric, key): table totals and row counts
+per status / type / condition / role. Counters are maintained in the same
+transaction as the writes that change them:
+
+- ORM inserts, deletes and column changes are turned into +1 / -1 deltas
+  after each flush and applied with `value = value + delta` before commit,
+- bulk query.update() / query.delete() statements (which bypass the flush)
+  turn the rows they are about to change into deltas the same way; only
+  bulk inserts and updates that set a counted column to a SQL expression
+  mark the metric for recomputation with one GROUP BY before commit.
+
+The statistics endpoints read every counter in one query. Run
+
+    python stat_counters.py          # report counters that drifted
+    python stat_counters.py --fix    # and rewrite them from full scans
+
+to reconcile the counters against full table scans, e.g. after raw SQL
+maintenance or migrations.
+"""
+
+import enum
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+import fast_updates
+from models import Asset, Complaint, Employee, StatCounter, User, Vendor
+
+TOTAL_KEY = "total"
+
+# Counted tables -> (model, [(metric, column)]); a column of None counts every row
+COUNTED_TABLES = {
+    "employees": (Employee, [("employees", None)]),
+    "vendors": (Vendor, [("vendors", None)]),
+    "users": (User, [("user_roles", "role")]),
+    "assets": (Asset, [
+        ("assets", None),
+        ("asset_status", "status"),
+        ("asset_type", "type"),
+        ("asset_condition", "condition"),
+    ]),
+    "complaints": (Complaint, [
+        ("complaints", None),
+        ("complaint_status", "status"),
+    ]),
+}
+
+METRIC_COLUMNS = {
+    metric: (model, column)
+    for model, metrics in COUNTED_TABLES.values()
+    for metric, column in metrics
+}
+
+
+def _pending_deltas(session: Session) -> defaultdict:
+    return session.info.setdefault("stat_deltas", defaultdict(int))
+
+
+def _pending_recounts(session: Session) -> set:
+    return session.info.setdefault("stat_recounts", set())
+
+
+def _counter_key(value) -> str:
+    """Counter key for a column value; enum members are stored by value."""
+    return str(value.value if isinstance(value, enum.Enum) else value)
+
+
+def _committed_value(obj, column: str):
+    """Value of `column` as stored in the database before this flush."""
+    history = inspect(obj).attrs[column].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, column)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_counter_deltas(session, flush_context):
+    deltas = _pending_deltas(session)
+    recounts = _pending_recounts(session)
+
+    for obj in session.new:
+        table_name = getattr(type(obj), "__tablename__", None)
+        for metric, column in COUNTED_TABLES.get(table_name, (None, []))[1]:
+            key = TOTAL_KEY if column is None else getattr(obj, column)
+            if key is not None:
+                deltas[(metric, _counter_key(key))] += 1
+
+    for obj in session.deleted:
+        table_name = getattr(type(obj), "__tablename__", None)
+        for metric, column in COUNTED_TABLES.get(table_name, (None, []))[1]:
+            key = TOTAL_KEY if column is None else _committed_value(obj, column)
+            if key is not None:
+                deltas[(metric, _counter_key(key))] -= 1
+
+    for obj in session.dirty:
+        table_name = getattr(type(obj), "__tablename__", None)
+        if table_name not in COUNTED_TABLES or not session.is_modified(obj):
+            continue
+        for metric, column in COUNTED_TABLES[table_name][1]:
+            if column is None:
+                continue
+            history = inspect(obj).attrs[column].history
+            if not history.added:
+                continue
+            if not history.deleted:
+                # The old value was never loaded, so the delta is unknown
+                recounts.add(metric)
+                continue
+            if history.deleted[0] is not None:
+                deltas[(metric, _counter_key(history.deleted[0]))] -= 1
+            if history.added[0] is not None:
+                deltas[(metric, _counter_key(history.added[0]))] += 1
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_deltas(orm_execute_state):
+    """Bulk statements bypass the flush; count the rows they are about to change."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    statement = orm_execute_state.statement
+    table_name = statement.table.name
+    if table_name not in COUNTED_TABLES:
+        return
+    session = orm_execute_state.session
+    metrics = COUNTED_TABLES[table_name][1]
+    if orm_execute_state.is_insert:
+        _pending_recounts(session).update(metric for metric, _ in metrics)
+        return
+
+    values = fast_updates.statement_values(statement)
+    if orm_execute_state.is_update:
+        metrics = [(metric, column) for metric, column in metrics if column in values]
+        computed = [metric for metric, column in metrics if fast_updates.is_expression(values[column])]
+        if computed:
+            _pending_recounts(session).update(computed)
+            metrics = [(metric, column) for metric, column in metrics if metric not in computed]
+        if not metrics:
+            return
+
+    deltas = _pending_deltas(session)
+    for row in fast_updates.affected_rows(orm_execute_state):
+        for metric, column in metrics:
+            old = TOTAL_KEY if column is None else row[column]
+            # Deletes set nothing, so every row only leaves its counters
+            new = values.get(column)
+            if new is not None and old is not None and _counter_key(new) == _counter_key(old):
+                continue
+            if old is not None:
+                deltas[(metric, _counter_key(old))] -= 1
+            if new is not None:
+                deltas[(metric, _counter_key(new))] += 1
+
+
+def _apply_delta(session: Session, metric: str, key: str, delta: int):
+    result = session.execute(
+        update(StatCounter)
+        .where(StatCounter.metric == metric, StatCounter.key == key)
+        .values(value=StatCounter.value + delta)
+    )
+    if result.rowcount == 0:
+        # First row with this key, tolerating a concurrent writer creating it
+        session.execute(
+            insert(StatCounter)
+            .prefix_with("OR IGNORE", dialect="sqlite")
+            .prefix_with("IGNORE", dialect="mysql")
+            .values(metric=metric, key=key, value=0)
+        )
+        session.execute(
+            update(StatCounter)
+            .where(StatCounter.metric == metric, StatCounter.key == key)
+            .values(value=StatCounter.value + delta)
+        )
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_counter_changes(session):
+    session.flush()
+    deltas = session.info.pop("stat_deltas", None) or {}
+    recounts = session.info.pop("stat_recounts", None) or set()
+
+    for (metric, key), delta in sorted(deltas.items()):
+        if delta and metric not in recounts:
+            _apply_delta(session, metric, key, delta)
+    if recounts:
+        write_counters(session, scan_counters(session, recounts), recounts)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_counter_changes(session):
+    session.info.pop("stat_deltas", None)
+    session.info.pop("stat_recounts", None)
+
+
+def scan_counters(db: Session, metrics: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+    """Compute counters from full table scans (COUNT / GROUP BY)."""
+    counters = {}
+    for metric in (metrics or METRIC_COLUMNS):
+        model, column = METRIC_COLUMNS[metric]
+        if column is None:
+            counters[metric] = {TOTAL_KEY: db.execute(select(func.count()).select_from(model)).scalar()}
+        else:
+            attribute = getattr(model, column)
+            rows = db.execute(
+                select(attribute, func.count()).where(attribute.isnot(None)).group_by(attribute)
+            ).all()
+            counters[metric] = {_counter_key(key): count for key, count in rows}
+    return counters
+
+
+def write_counters(db: Session, counters: Dict[str, Dict[str, int]], metrics: Iterable[str]):
+    """
+    Bring the stored counters of `metrics` to the scanned `counters` (without
+    committing). The difference from the stored values is applied as a delta
+    instead of rewriting the rows, so deltas that concurrent writers commit
+    after the scan - whose changes the scan could not see - are kept. The scan
+    and this call must run in one transaction, which reads one snapshot on
+    MySQL; SQLite serializes the writers.
+    """
+    metrics = list(metrics)
+    stored = get_counters(db, metrics)
+    for metric in metrics:
+        scanned = counters.get(metric, {})
+        current = stored.get(metric, {})
+        for key in sorted(set(scanned) | set(current)):
+            delta = scanned.get(key, 0) - current.get(key, 0)
+            if delta:
+                _apply_delta(db, metric, key, delta)
+
+
+def get_counters(db: Session, metrics: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+    """Read the stored counters in one query, as {metric: {key: value}}."""
+    query = select(StatCounter.metric, StatCounter.key, StatCounter.value)
+    if metrics is not None:
+        query = query.where(StatCounter.metric.in_(list(metrics)))
+    counters = defaultdict(dict)
+    for metric, key, value in db.execute(query):
+        if value:
+            counters[metric][key] = value
+    return counters
+
+
+def get_total(counters: Dict[str, Dict[str, int]], metric: str) -> int:
+    return counters.get(metric, {}).get(TOTAL_KEY, 0)
+
+
+def ensure_counters(db: Session):
+    """Build the counters from full scans if they have never been computed."""
+    bind = inspect(db.get_bind())
+    if not all(bind.has_table(table_name) for table_name in COUNTED_TABLES):
+        # Fresh database: the tables start empty, so the deltas alone are exact
+        return
+    if db.query(StatCounter.metric).first() is None:
+        write_counters(db, scan_counters(db), METRIC_COLUMNS)
+        db.commit()
+
+
+def reconcile(db: Session, fix: bool = False) -> Dict[str, Dict[str, tuple]]:
+    """
+    Compare stored counters with full scans. Returns
+    {metric: {key: (stored, actual)}} for every counter that differs and,
+    with fix=True, rewrites the drifted metrics.
+    """
+    actual = scan_counters(db)
+    stored = get_counters(db)
+    drift = {}
+    for metric in METRIC_COLUMNS:
+        keys = set(actual.get(metric, {})) | set(stored.get(metric, {}))
+        differences = {
+            key: (stored.get(metric, {}).get(key, 0), actual.get(metric, {}).get(key, 0))
+            for key in keys
+            if stored.get(metric, {}).get(key, 0) != actual.get(metric, {}).get(key, 0)
+        }
+        if differences:
+            drift[metric] = differences
+
+    if fix and drift:
+        write_counters(db, actual, drift.keys())
+        db.commit()
+    return drift
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    fix = "--fix" in sys.argv
+    db = SessionLocal()
+    try:
+        StatCounter.__table__.create(bind=db.get_bind(), checkfirst=True)
+        print("🔍 Reconciling statistics counters against full table scans...")
+        drift = reconcile(db, fix=fix)
+        if not drift:
+            print("✅ All counters match")
+        for metric, differences in drift.items():
+            for key, (stored_value, actual_value) in sorted(differences.items()):
+                print(f"❌ {metric}[{key}]: stored {stored_value}, actual {actual_value}")
+        if drift:
+            print("🔧 Counters rewritten from full scans" if fix else "ℹ️  Run with --fix to rewrite them")
+    finally:
+        db.close()
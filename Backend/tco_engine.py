@@ -0,0 +1,295 @@
+"""
+Fleet-wide total cost of ownership and depreciation.
+
+The whole fleet is loaded in one query (asset columns joined with the summed
+maintenance record costs) into NumPy column arrays, and every metric is
+computed on the arrays at once:
+
+- book value by straight-line or double-declining-balance depreciation down
+  to a salvage value of SALVAGE_FRACTION of the purchase cost,
+- total cost of ownership (purchase + repairs) and cost per year owned,
+- repair-to-value ratio (repairs / current book value),
+- a keep / review / replace recommendation from the repair ratio and the
+  share of the expected lifespan already used.
+
+Scored fleets are cached as snapshots keyed by the assets and
+maintenance_records table versions, so repeated reads and batch lookups do
+not reload or rescore anything until an asset or maintenance record changes.
+
+    python tco_engine.py --benchmark 100000
+
+scores a synthetic fleet of that size and prints the timing.
+"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models import Asset, MaintenanceRecord
+
+DEFAULT_LIFESPAN_YEARS = 5
+SALVAGE_FRACTION = float(os.getenv("TCO_SALVAGE_FRACTION", "0.1"))
+
+# Repairs at or above this share of the book value make replacing cheaper
+REPLACE_REPAIR_RATIO = float(os.getenv("TCO_REPLACE_REPAIR_RATIO", "0.5"))
+REVIEW_REPAIR_RATIO = float(os.getenv("TCO_REVIEW_REPAIR_RATIO", "0.25"))
+
+DEPRECIATION_METHODS = ("straight_line", "declining_balance")
+RECOMMENDATIONS = np.array(["keep", "review", "replace"])
+SORT_FIELDS = ("repair_to_value", "tco", "annual_cost", "book_value", "age_years", "life_used")
+
+# Tables whose versions key the cached snapshots
+TCO_TABLES = ("assets", "maintenance_records")
+
+TCO_SNAPSHOT_SECONDS = int(os.getenv("TCO_SNAPSHOT_SECONDS", "300"))
+TCO_SNAPSHOT_SIZE = 8
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+# Per-asset output columns, in response order
+SCORE_FIELDS = (
+    "purchase_cost", "repair_cost", "maintenance_events", "age_years", "lifespan_years",
+    "life_used", "book_value", "depreciation", "tco", "annual_cost", "repair_to_value",
+)
+
+_snapshots: "OrderedDict[tuple, FleetScores]" = OrderedDict()
+
+
+class FleetColumns:
+    """Raw fleet columns, one array element per asset."""
+
+    def __init__(self, ids, purchase_cost, purchase_date, lifespan, repair_cost, maintenance_cost, maintenance_events):
+        self.ids = np.asarray(ids, dtype=object)
+        self.purchase_cost = np.asarray(purchase_cost, dtype=float)
+        self.purchase_date = np.asarray(purchase_date, dtype="datetime64[s]")
+        self.lifespan = np.asarray(lifespan, dtype=float)
+        self.repair_cost = np.asarray(repair_cost, dtype=float)
+        self.maintenance_cost = np.asarray(maintenance_cost, dtype=float)
+        self.maintenance_events = np.asarray(maintenance_events, dtype=float)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class FleetScores:
+    """Scored fleet: one array per SCORE_FIELDS entry plus the recommendation codes."""
+
+    def __init__(self, ids, method: str, as_of: datetime, columns: Dict[str, np.ndarray], recommendation: np.ndarray):
+        self.ids = ids
+        self.method = method
+        self.as_of = as_of
+        self.columns = columns
+        self.recommendation = recommendation
+        self._index: Optional[Dict[str, int]] = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, asset_id: str) -> Optional[int]:
+        if self._index is None:
+            self._index = {asset_id: position for position, asset_id in enumerate(self.ids.tolist())}
+        return self._index.get(asset_id)
+
+    def rows(self, positions) -> List[dict]:
+        """Per-asset dicts for the given array positions."""
+        positions = np.asarray(positions, dtype=int)
+        values = {field: self.columns[field][positions].tolist() for field in SCORE_FIELDS}
+        ids = self.ids[positions].tolist()
+        recommendations = RECOMMENDATIONS[self.recommendation[positions]].tolist()
+        rows = []
+        for offset, asset_id in enumerate(ids):
+            row = {"asset_id": asset_id}
+            for field in SCORE_FIELDS:
+                value = values[field][offset]
+                # NaN (e.g. a ratio against a zero book value) is not valid JSON
+                row[field] = None if value != value else round(value, 4)
+            row["maintenance_events"] = int(row["maintenance_events"] or 0)
+            row["recommendation"] = recommendations[offset]
+            rows.append(row)
+        return rows
+
+    def summary(self) -> dict:
+        columns = self.columns
+        counts = np.bincount(self.recommendation, minlength=len(RECOMMENDATIONS))
+        return {
+            "assets": len(self),
+            "method": self.method,
+            "as_of": self.as_of.isoformat(),
+            "total_purchase_cost": float(columns["purchase_cost"].sum()),
+            "total_repair_cost": float(columns["repair_cost"].sum()),
+            "total_book_value": float(columns["book_value"].sum()),
+            "total_depreciation": float(columns["depreciation"].sum()),
+            "total_tco": float(columns["tco"].sum()),
+            "annual_cost": float(columns["annual_cost"].sum()),
+            "recommendations": {label: int(count) for label, count in zip(RECOMMENDATIONS.tolist(), counts)},
+        }
+
+
+def validate_params(method: str, sort_by: Optional[str] = None, recommendation: Optional[str] = None):
+    if method not in DEPRECIATION_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"method must be one of: {', '.join(DEPRECIATION_METHODS)}"
+        )
+    if sort_by is not None and sort_by not in SORT_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort_by must be one of: {', '.join(SORT_FIELDS)}"
+        )
+    if recommendation is not None and recommendation not in RECOMMENDATIONS.tolist():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"recommendation must be one of: {', '.join(RECOMMENDATIONS.tolist())}"
+        )
+
+
+def load_fleet(db: Session) -> FleetColumns:
+    """Load the cost columns of every asset in one query."""
+    maintenance = select(
+        MaintenanceRecord.asset_id,
+        func.sum(MaintenanceRecord.cost).label("cost"),
+        func.count(MaintenanceRecord.id).label("events"),
+    ).group_by(MaintenanceRecord.asset_id).subquery()
+
+    rows = db.execute(
+        select(
+            Asset.id,
+            Asset.purchase_cost,
+            Asset.purchase_date,
+            Asset.expected_lifespan,
+            Asset.total_repair_cost,
+            maintenance.c.cost,
+            maintenance.c.events,
+        ).outerjoin(maintenance, maintenance.c.asset_id == Asset.id)
+    ).all()
+
+    if not rows:
+        return FleetColumns([], [], [], [], [], [], [])
+    return FleetColumns(*zip(*rows))
+
+
+def score_fleet(fleet: FleetColumns, method: str = "straight_line", as_of: Optional[datetime] = None) -> FleetScores:
+    """Score every asset of the fleet at once."""
+    as_of = as_of or datetime.utcnow()
+
+    purchase_cost = np.nan_to_num(fleet.purchase_cost)
+    elapsed = np.datetime64(as_of, "s") - fleet.purchase_date
+    age_years = np.clip(np.where(np.isnat(elapsed), 0.0, elapsed.astype(float) / SECONDS_PER_YEAR), 0, None)
+    lifespan = np.where(fleet.lifespan > 0, fleet.lifespan, DEFAULT_LIFESPAN_YEARS)
+    life_used = age_years / lifespan
+
+    salvage = purchase_cost * SALVAGE_FRACTION
+    if method == "declining_balance":
+        rate = np.minimum(2.0 / lifespan, 1.0)
+        book_value = np.maximum(purchase_cost * (1.0 - rate) ** age_years, salvage)
+    else:
+        book_value = purchase_cost - (purchase_cost - salvage) * np.minimum(life_used, 1.0)
+
+    # total_repair_cost is kept in step with maintenance records, but may
+    # also carry repairs that predate them; take whichever is larger
+    repair_cost = np.maximum(np.nan_to_num(fleet.repair_cost), np.nan_to_num(fleet.maintenance_cost))
+    tco = purchase_cost + repair_cost
+    annual_cost = tco / np.maximum(age_years, 1.0 / 12)
+    repair_to_value = np.divide(
+        repair_cost, book_value,
+        out=np.where(repair_cost > 0, np.nan, 0.0),
+        where=book_value > 0,
+    )
+
+    exceeds_replace = (repair_to_value >= REPLACE_REPAIR_RATIO) | np.isnan(repair_to_value)
+    exceeds_review = repair_to_value >= REVIEW_REPAIR_RATIO
+    worn_out = life_used >= 1.0
+    recommendation = np.select(
+        [exceeds_replace | (worn_out & exceeds_review), exceeds_review | worn_out],
+        [2, 1],
+        default=0,
+    )
+
+    columns = {
+        "purchase_cost": purchase_cost,
+        "repair_cost": repair_cost,
+        "maintenance_events": np.nan_to_num(fleet.maintenance_events),
+        "age_years": age_years,
+        "lifespan_years": lifespan,
+        "life_used": life_used,
+        "book_value": book_value,
+        "depreciation": purchase_cost - book_value,
+        "tco": tco,
+        "annual_cost": annual_cost,
+        "repair_to_value": repair_to_value,
+    }
+    return FleetScores(fleet.ids, method, as_of, columns, recommendation)
+
+
+def get_snapshot(db: Session, version_key: str, method: str = "straight_line") -> FleetScores:
+    """Cached load_fleet + score_fleet; `version_key` changes whenever assets or maintenance records change."""
+    cache_key = (version_key, method)
+    snapshot = _snapshots.get(cache_key)
+    if snapshot is not None and (datetime.utcnow() - snapshot.as_of).total_seconds() < TCO_SNAPSHOT_SECONDS:
+        _snapshots.move_to_end(cache_key)
+        return snapshot
+
+    snapshot = score_fleet(load_fleet(db), method)
+    _snapshots[cache_key] = snapshot
+    _snapshots.move_to_end(cache_key)
+    while len(_snapshots) > TCO_SNAPSHOT_SIZE:
+        _snapshots.popitem(last=False)
+    return snapshot
+
+
+def select_positions(snapshot: FleetScores, recommendation: Optional[str] = None, sort_by: Optional[str] = None) -> np.ndarray:
+    """Array positions matching the filter, sorted descending by `sort_by`."""
+    positions = np.arange(len(snapshot))
+    if recommendation is not None:
+        positions = positions[snapshot.recommendation == RECOMMENDATIONS.tolist().index(recommendation)]
+    if sort_by is not None:
+        # NaN ratios sort first, as the most urgent
+        values = np.nan_to_num(snapshot.columns[sort_by][positions], nan=np.inf)
+        positions = positions[np.argsort(-values, kind="stable")]
+    return positions
+
+
+def _synthetic_fleet(size: int) -> FleetColumns:
+    rng = np.random.default_rng(0)
+    now = np.datetime64(datetime.utcnow(), "s")
+    return FleetColumns(
+        ids=[f"asset-{index}" for index in range(size)],
+        purchase_cost=rng.uniform(200, 5000, size),
+        purchase_date=now - rng.integers(0, 8 * 365 * 24 * 3600, size).astype("timedelta64[s]"),
+        lifespan=rng.integers(2, 8, size),
+        repair_cost=rng.exponential(300, size),
+        maintenance_cost=rng.exponential(250, size),
+        maintenance_events=rng.integers(0, 10, size),
+    )
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        size = int(sys.argv[sys.argv.index("--benchmark") + 1]) if len(sys.argv) > sys.argv.index("--benchmark") + 1 else 100000
+        fleet = _synthetic_fleet(size)
+        print(f"⏱️  Scoring a synthetic fleet of {size} assets...")
+        for method in DEPRECIATION_METHODS:
+            start = time.perf_counter()
+            scores = score_fleet(fleet, method)
+            summary = scores.summary()
+            elapsed = time.perf_counter() - start
+            print(f"✅ {method}: {elapsed * 1000:.1f} ms, recommendations {summary['recommendations']}")
+    else:
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            scores = score_fleet(load_fleet(db))
+            print(f"✅ Scored {len(scores)} assets in {(time.perf_counter() - start) * 1000:.1f} ms")
+            print(scores.summary())
+        finally:
+            db.close()
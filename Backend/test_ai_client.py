@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the async AI client.
+Runs against a local stub of the chat completions API (no live server or
+API key needed) and checks caching, the circuit breaker and recovery.
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ai_client import AIClient, AIServiceUnavailable, CircuitBreaker
+
+# Stub behaviour, switched by the tests
+stub_state = {"calls": 0, "status": 200}
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        stub_state["calls"] += 1
+        payload = json.dumps({
+            "choices": [{"message": {"content": f"Prediction #{stub_state['calls']} for {body['model']}"}}]
+        }).encode("utf-8")
+        self.send_response(stub_state["status"])
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def run_checks(url):
+    client = AIClient(url=url, api_key="test-key", breaker=CircuitBreaker(failure_threshold=2, reset_seconds=0.5))
+    messages = [{"role": "user", "content": "Predict"}]
+    history = {"complaints": [{"title": "Screen flickers"}]}
+    ok = True
+
+    try:
+        first, cached = await client.cached_complete("asset-1", history, messages)
+        second, cached_again = await client.cached_complete("asset-1", history, messages)
+        if cached or not cached_again or first != second or stub_state["calls"] != 1:
+            print(f"❌ Expected one call and a cache hit, got {stub_state['calls']} calls")
+            ok = False
+        else:
+            print("✅ Unchanged history answered from the cache")
+
+        history["complaints"].append({"title": "Battery swollen"})
+        _, cached = await client.cached_complete("asset-1", history, messages)
+        if cached or stub_state["calls"] != 2:
+            print("❌ A new complaint should bypass the cache")
+            ok = False
+        else:
+            print("✅ New complaint invalidated the cached prediction")
+
+        results = await asyncio.gather(*[
+            client.cached_complete(f"asset-{index}", history, messages) for index in range(10, 20)
+        ])
+        print(f"✅ {len(results)} concurrent predictions through the pooled client")
+
+        stub_state["status"] = 503
+        for _ in range(2):
+            try:
+                await client.complete(messages)
+            except AIServiceUnavailable:
+                pass
+        calls_before = stub_state["calls"]
+        try:
+            await client.complete(messages)
+            print("❌ Circuit should be open")
+            ok = False
+        except AIServiceUnavailable:
+            if stub_state["calls"] == calls_before:
+                print("✅ Circuit opened after repeated failures")
+            else:
+                print("❌ Open circuit still called the service")
+                ok = False
+
+        stub_state["status"] = 200
+        await asyncio.sleep(0.6)
+        await client.complete(messages)
+        if client.breaker.state != "closed":
+            print(f"❌ Circuit should close after a successful trial call, is {client.breaker.state}")
+            ok = False
+        else:
+            print("✅ Circuit closed again after the service recovered")
+    finally:
+        await client.close()
+    return ok
+
+if __name__ == "__main__":
+    print("🤖 AI Client Test Script")
+    print("=" * 50)
+
+    server = start_stub()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+        if asyncio.run(run_checks(url)):
+            print("\n🎉 AI client works!")
+        else:
+            print("\n💥 AI client checks failed!")
+    finally:
+        server.shutdown()
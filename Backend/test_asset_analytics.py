@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQL-side asset analytics endpoint.
+Checks the grouped counts against /assets/statistics, the time series
+buckets and the 304 on a repeated request.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "admin@company.com"
+TEST_PASSWORD = "password123"
+
+def login():
+    """Login and return the access token"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None
+    print(f"✅ Logged in as {TEST_EMAIL}")
+    return response.json()["access_token"]
+
+def test_analytics(headers):
+    statistics = requests.get(f"{BASE_URL}/assets/statistics", headers=headers).json()
+    response = requests.get(f"{BASE_URL}/assets/analytics", params={"group_by": "status"}, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Analytics failed: {response.status_code} - {response.text}")
+        return False
+
+    analytics = response.json()
+    by_status = {group["key"]: group["count"] for group in analytics["groups"]}
+    if analytics["total"] != statistics["total"] or by_status != statistics["by_status"]:
+        print(f"❌ Counts differ from /assets/statistics: {by_status} vs {statistics['by_status']}")
+        return False
+    print(f"✅ {analytics['total']} assets, total cost {analytics['total_purchase_cost']:.2f}")
+    print(f"   Age buckets: {analytics['age_buckets']}")
+    print(f"   Warranty buckets: {analytics['warranty_buckets']}")
+
+    for bucket in ("month", "quarter", "year"):
+        series = requests.get(f"{BASE_URL}/assets/analytics", params={"bucket": bucket}, headers=headers).json()
+        purchased = sum(point["count"] for point in series["purchases"])
+        print(f"✅ {bucket}: {len(series['purchases'])} periods, {purchased} purchases")
+
+    replay = requests.get(
+        f"{BASE_URL}/assets/analytics",
+        params={"group_by": "status"},
+        headers={**headers, "If-None-Match": response.headers["ETag"]}
+    )
+    if replay.status_code != 304:
+        print(f"❌ Expected 304 on a repeated request, got {replay.status_code}")
+        return False
+    print("✅ Repeated request answered with 304")
+    return True
+
+if __name__ == "__main__":
+    print("📈 Asset Analytics Test Script")
+    print("=" * 50)
+
+    token = login()
+    if token:
+        headers = {"Authorization": f"Bearer {token}"}
+        if test_analytics(headers):
+            print("\n🎉 Asset analytics work!")
+        else:
+            print("\n💥 Asset analytics checks failed!")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the fleet TCO and depreciation endpoints.
+Checks the fleet summary, both depreciation methods, the batch lookup
+and the 304 on a repeated request.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "admin@company.com"
+TEST_PASSWORD = "password123"
+
+def login():
+    """Login and return the access token"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None
+    print(f"✅ Logged in as {TEST_EMAIL}")
+    return response.json()["access_token"]
+
+def test_tco(headers):
+    for method in ("straight_line", "declining_balance"):
+        response = requests.get(f"{BASE_URL}/assets/tco", params={"method": method, "limit": 5}, headers=headers)
+        if response.status_code != 200:
+            print(f"❌ TCO ({method}) failed: {response.status_code} - {response.text}")
+            return False
+        summary = response.json()["summary"]
+        print(f"✅ {method}: {summary['assets']} assets, book value {summary['total_book_value']:.2f}, "
+              f"TCO {summary['total_tco']:.2f}, {summary['recommendations']}")
+
+    items = response.json()["items"]
+    if not items:
+        print("ℹ️  No assets to look up")
+        return True
+
+    ids = [item["asset_id"] for item in items] + ["missing-asset-id"]
+    batch = requests.get(f"{BASE_URL}/assets/tco/batch", params={"ids": ",".join(ids)}, headers=headers)
+    body = batch.json()
+    if batch.status_code != 200 or body["errors"] != {"missing-asset-id": "not_found"}:
+        print(f"❌ Batch lookup failed: {batch.status_code} - {batch.text}")
+        return False
+    for asset_id in ids[:-1]:
+        entry = body["items"][asset_id]
+        print(f"   {asset_id}: repair/value {entry['repair_to_value']} -> {entry['recommendation']}")
+
+    replay = requests.get(
+        f"{BASE_URL}/assets/tco/batch",
+        params={"ids": ",".join(ids)},
+        headers={**headers, "If-None-Match": batch.headers["ETag"]}
+    )
+    if replay.status_code != 304:
+        print(f"❌ Expected 304 on a repeated request, got {replay.status_code}")
+        return False
+    print("✅ Repeated request answered with 304")
+    return True
+
+if __name__ == "__main__":
+    print("💰 Asset TCO Test Script")
+    print("=" * 50)
+
+    token = login()
+    if token:
+        headers = {"Authorization": f"Bearer {token}"}
+        if test_tco(headers):
+            print("\n🎉 Asset TCO endpoints work!")
+        else:
+            print("\n💥 Asset TCO checks failed!")
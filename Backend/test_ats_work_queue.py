@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the ATS work queue.
+Files complaints of different priorities, claims them from several threads
+at once and checks that no complaint is handed out twice, that claims come
+most urgent first, and that heartbeat and release only touch the caller's
+claims.
+"""
+
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "employee": ("employee@company.com", "password123"),
+    "ats": ("ats@company.com", "password123"),
+}
+PRIORITY_ORDER = ["critical", "high", "medium", "low"]
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def claim(headers, count):
+    response = requests.post(f"{BASE_URL}/ats/queue/claim", json={"count": count}, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Claim failed: {response.status_code} - {response.text}")
+        return []
+    return response.json()["complaints"]
+
+def test_ats_work_queue():
+    headers = {role: authenticate(role) for role in TEST_CREDENTIALS}
+    if not all(headers.values()):
+        return False
+
+    for priority in ["low", "critical", "medium", "high"]:
+        response = requests.post(f"{BASE_URL}/complaints/", json={
+            "title": f"Work Queue Test ({priority})",
+            "description": "This complaint is claimed from the ATS work queue.",
+            "priority": priority,
+            "employee_id": "test-employee-id"
+        }, headers=headers["employee"])
+        if response.status_code != 200:
+            print(f"❌ Failed to create complaint: {response.status_code} - {response.text}")
+            return False
+    print("✅ Test complaints created")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        batches = list(executor.map(lambda _: claim(headers["ats"], 3), range(4)))
+    claimed = [complaint["id"] for batch in batches for complaint in batch]
+    if len(claimed) != len(set(claimed)):
+        print("❌ A complaint was claimed twice")
+        return False
+    print(f"✅ {len(claimed)} complaints claimed by 4 concurrent requests, none twice")
+
+    for batch in batches:
+        ranks = [PRIORITY_ORDER.index(c["priority"]) if c["priority"] in PRIORITY_ORDER else 4 for c in batch]
+        if ranks != sorted(ranks):
+            print(f"❌ Claims out of priority order: {[c['priority'] for c in batch]}")
+            return False
+    print("✅ Each batch is ordered most urgent first")
+
+    mine = requests.get(f"{BASE_URL}/ats/queue/mine", headers=headers["ats"]).json()
+    if set(claimed) - {complaint["id"] for complaint in mine}:
+        print("❌ Claimed complaints missing from /ats/queue/mine")
+        return False
+
+    response = requests.post(f"{BASE_URL}/ats/queue/heartbeat", json={"complaint_ids": claimed}, headers=headers["ats"])
+    if response.status_code != 200 or set(response.json()["complaint_ids"]) != set(claimed):
+        print(f"❌ Heartbeat failed: {response.status_code} - {response.text}")
+        return False
+    print(f"✅ Leases renewed until {response.json()['lease_expires_at']}")
+
+    response = requests.post(f"{BASE_URL}/ats/queue/release", json={"complaint_ids": claimed}, headers=headers["ats"])
+    if response.status_code != 200 or set(response.json()["complaint_ids"]) != set(claimed):
+        print(f"❌ Release failed: {response.status_code} - {response.text}")
+        return False
+    print("✅ Claims released back to the queue")
+
+    response = requests.post(f"{BASE_URL}/ats/queue/claim", json={"count": 1}, headers=headers["employee"])
+    if response.status_code != 403:
+        print(f"❌ Employee was allowed to claim: {response.status_code}")
+        return False
+    print("✅ Only ATS users can claim")
+    return True
+
+if __name__ == "__main__":
+    print("📥 ATS Work Queue Test Script")
+    print("=" * 50)
+
+    if test_ats_work_queue():
+        print("\n🎉 ATS work queue works!")
+    else:
+        print("\n💥 ATS work queue checks failed!")
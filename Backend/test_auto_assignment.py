@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for automatic complaint assignment.
+Files a few complaints and checks that each one is assigned to an ATS
+agent, that the workload counters match a recount from the database, and
+that every decision is in the assignment audit log.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "employee": ("employee@company.com", "password123"),
+    "manager": ("manager@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def get_workload(headers, reconcile=False):
+    response = requests.get(f"{BASE_URL}/ats/workload", params={"reconcile": reconcile}, headers=headers)
+    return {agent["agent_id"]: agent for agent in response.json()}
+
+def test_auto_assignment():
+    headers = {role: authenticate(role) for role in TEST_CREDENTIALS}
+    if not all(headers.values()):
+        return False
+
+    before = get_workload(headers["manager"], reconcile=True)
+    if not before:
+        print("❌ No active ATS agents to assign to")
+        return False
+    print(f"📊 {len(before)} ATS agents, loads: {[agent['load'] for agent in before.values()]}")
+
+    complaint_ids = []
+    for priority in ["high", "medium", "low", "critical"]:
+        response = requests.post(f"{BASE_URL}/complaints/", json={
+            "title": f"Auto Assignment Test ({priority})",
+            "description": "This complaint should be assigned to an ATS agent automatically.",
+            "priority": priority,
+            "employee_id": "test-employee-id"
+        }, headers=headers["employee"])
+        if response.status_code != 200:
+            print(f"❌ Failed to create complaint: {response.status_code} - {response.text}")
+            return False
+        complaint = response.json()
+        if complaint.get("assigned_to") not in before:
+            print(f"❌ Complaint not assigned to an ATS agent: {complaint.get('assigned_to')}")
+            return False
+        complaint_ids.append(complaint["id"])
+    print(f"✅ {len(complaint_ids)} complaints assigned automatically")
+
+    counted = get_workload(headers["manager"])
+    recounted = get_workload(headers["manager"], reconcile=True)
+    if {k: v["load"] for k, v in counted.items()} != {k: v["load"] for k, v in recounted.items()}:
+        print(f"❌ Workload counters drifted: {counted} vs {recounted}")
+        return False
+    print("✅ Workload counters match a recount from the database")
+
+    for complaint_id in complaint_ids:
+        audit = requests.get(f"{BASE_URL}/complaint-assignments", params={"complaint_id": complaint_id}, headers=headers["manager"]).json()
+        if len(audit) != 1:
+            print(f"❌ Missing assignment audit record for {complaint_id}")
+            return False
+        print(f"📝 {audit[0]['priority']}: {audit[0]['reason']} (agent load {audit[0]['agent_load']})")
+    print("✅ Every assignment decision was recorded")
+    return True
+
+if __name__ == "__main__":
+    print("⚖️ Automatic Assignment Test Script")
+    print("=" * 50)
+
+    if test_auto_assignment():
+        print("\n🎉 Automatic assignment works!")
+    else:
+        print("\n💥 Automatic assignment checks failed!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the multiplexed /batch endpoint.
+Sends several dashboard GETs in one request and checks that each
+sub-request comes back with its own status and body.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "admin@company.com"
+TEST_PASSWORD = "password123"
+
+SUB_REQUESTS = [
+    {"id": "me", "path": "/users/me"},
+    {"id": "complaints", "path": "/complaints/all?limit=10"},
+    {"id": "assets", "path": "/assets/?limit=10&fields=id,name,status"},
+    {"id": "vendors", "path": "/vendor/"},
+    {"id": "notifications", "path": "/notifications"},
+    {"id": "missing", "path": "/assets/does-not-exist"},
+]
+
+def login():
+    """Login and return the access token"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None
+    print(f"✅ Logged in as {TEST_EMAIL}")
+    return response.json()["access_token"]
+
+def test_batch(headers):
+    response = requests.post(f"{BASE_URL}/batch", json={"requests": SUB_REQUESTS}, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Batch failed: {response.status_code} - {response.text}")
+        return False
+
+    all_passed = True
+    for result in response.json()["responses"]:
+        expected = 404 if result["id"] == "missing" else 200
+        if result["status"] == expected:
+            print(f"✅ {result['id']}: {result['status']}")
+        else:
+            print(f"❌ {result['id']}: expected {expected}, got {result['status']} - {result['body']}")
+            all_passed = False
+    return all_passed
+
+def test_write_rejected(headers):
+    response = requests.post(
+        f"{BASE_URL}/batch",
+        json={"requests": [{"id": "write", "method": "DELETE", "path": "/complaints/some-id"}]},
+        headers=headers
+    )
+    result = response.json()["responses"][0]
+    if result["status"] == 405:
+        print("✅ Write sub-request rejected with 405")
+        return True
+    print(f"❌ Expected 405 for a write sub-request, got {result['status']}")
+    return False
+
+if __name__ == "__main__":
+    print("🧺 Batch API Test Script")
+    print("=" * 50)
+
+    token = login()
+    if token:
+        headers = {"Authorization": f"Bearer {token}"}
+        if test_batch(headers) and test_write_rejected(headers):
+            print("\n🎉 Batch API works!")
+        else:
+            print("\n💥 Batch API checks failed!")
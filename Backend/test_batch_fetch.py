@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for the batch fetch-by-ids endpoints.
+Loads a few ids from the list endpoints, fetches them in one batch request
+together with an unknown id, and checks the id-keyed map and not-found markers.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "admin@company.com"
+TEST_PASSWORD = "password123"
+
+# (list endpoint, batch endpoint)
+ENDPOINTS = [
+    ("/employees/all", "/employees/batch"),
+    ("/assets/", "/assets/batch"),
+    ("/vendor/", "/vendor/batch"),
+]
+
+def login():
+    """Login and return the access token"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None
+    print(f"✅ Logged in as {TEST_EMAIL}")
+    return response.json()["access_token"]
+
+def test_batch(headers):
+    all_passed = True
+    for list_endpoint, batch_endpoint in ENDPOINTS:
+        ids = [item["id"] for item in requests.get(f"{BASE_URL}{list_endpoint}", params={"limit": 5}, headers=headers).json()]
+        ids.append("does-not-exist")
+
+        response = requests.get(f"{BASE_URL}{batch_endpoint}", params={"ids": ",".join(ids)}, headers=headers)
+        if response.status_code != 200:
+            print(f"❌ {batch_endpoint}: expected 200, got {response.status_code} - {response.text}")
+            all_passed = False
+            continue
+
+        result = response.json()
+        found = [entity_id for entity_id, item in result["items"].items() if item is not None]
+        if set(result["items"]) != set(ids) or result["errors"].get("does-not-exist") != "not_found":
+            print(f"❌ {batch_endpoint}: unexpected result {result['errors']}")
+            all_passed = False
+        else:
+            print(f"✅ {batch_endpoint}: {len(found)} found, errors {result['errors']}")
+    return all_passed
+
+if __name__ == "__main__":
+    print("📦 Batch Fetch Test Script")
+    print("=" * 50)
+
+    token = login()
+    if token:
+        headers = {"Authorization": f"Bearer {token}"}
+        if test_batch(headers):
+            print("\n🎉 Batch fetch works!")
+        else:
+            print("\n💥 Batch fetch checks failed!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk complaint transitions.
+Files a batch of complaints, forwards them in one call as ATS, rejects part
+of them as manager and resolves the rest, checking the per-complaint
+report and the all_or_nothing mode along the way.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "employee": ("employee@company.com", "password123"),
+    "ats": ("ats@company.com", "password123"),
+    "manager": ("manager@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def bulk(headers, action, complaint_ids, notes=None, all_or_nothing=False):
+    response = requests.post(f"{BASE_URL}/complaints/bulk-transition", json={
+        "action": action,
+        "complaint_ids": complaint_ids,
+        "notes": notes,
+        "all_or_nothing": all_or_nothing,
+    }, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Bulk {action} failed: {response.status_code} - {response.text}")
+        return None
+    report = response.json()
+    print(f"📦 {action}: {report['applied']} applied, {report['failed']} failed")
+    return report
+
+def test_bulk_transitions():
+    headers = {role: authenticate(role) for role in TEST_CREDENTIALS}
+    if not all(headers.values()):
+        return False
+
+    complaint_ids = []
+    for i in range(6):
+        response = requests.post(f"{BASE_URL}/complaints/", json={
+            "title": f"Bulk Transition Test {i + 1}",
+            "description": "This complaint is moved through the workflow in bulk.",
+            "priority": "medium",
+            "employee_id": "test-employee-id"
+        }, headers=headers["employee"])
+        if response.status_code != 200:
+            print(f"❌ Failed to create complaint: {response.status_code} - {response.text}")
+            return False
+        complaint_ids.append(response.json()["id"])
+    print(f"✅ {len(complaint_ids)} complaints created")
+
+    report = bulk(headers["ats"], "forward", complaint_ids[:4] + ["missing-complaint-id"], "Replacement parts are required")
+    if not report or report["applied"] != 4 or report["results"][-1]["error"] != "Complaint not found":
+        print("❌ Unexpected forward report")
+        return False
+
+    report = bulk(headers["ats"], "forward", complaint_ids[3:], "Replacement parts are required", all_or_nothing=True)
+    if not report or report["applied"] != 0:
+        print("❌ all_or_nothing applied a batch containing an invalid complaint")
+        return False
+    print("✅ all_or_nothing left the batch untouched")
+
+    report = bulk(headers["manager"], "reject", complaint_ids[:2], "Use spare parts from stock")
+    if not report or report["applied"] != 2:
+        return False
+
+    report = bulk(headers["ats"], "resolve", complaint_ids, "Fixed during the bulk test")
+    if not report or report["applied"] != len(complaint_ids):
+        print("❌ Not every complaint was resolved")
+        return False
+
+    for complaint_id in complaint_ids[:2]:
+        timeline = requests.get(f"{BASE_URL}/complaints/{complaint_id}/events", headers=headers["employee"]).json()
+        actions = [event["action"] for event in timeline]
+        if actions != ["created", "forwarded", "rejected", "resolved"]:
+            print(f"❌ Unexpected timeline: {actions}")
+            return False
+    print("✅ Bulk transitions appear in the complaint timelines")
+    return True
+
+if __name__ == "__main__":
+    print("📦 Bulk Complaint Transition Test Script")
+    print("=" * 50)
+
+    if test_bulk_transitions():
+        print("\n🎉 Bulk transitions work!")
+    else:
+        print("\n💥 Bulk transition checks failed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk vendor invitations.
+Invites every vendor to a new quote request in one call, then repeats the
+call and checks that the vendors already invited are skipped rather than
+added twice.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "employee": ("employee@company.com", "password123"),
+    "manager": ("manager@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_bulk_vendor_invitations():
+    headers = {role: authenticate(role) for role in TEST_CREDENTIALS}
+    if not all(headers.values()):
+        return False
+
+    response = requests.get(f"{BASE_URL}/vendor/", headers=headers["manager"])
+    if response.status_code != 200 or not response.json():
+        print(f"❌ No vendors to invite: {response.status_code}")
+        return False
+    vendor_ids = [vendor["id"] for vendor in response.json()]
+
+    response = requests.post(f"{BASE_URL}/quote-requests/", json={
+        "title": "Test Quote Request for Bulk Invitations",
+        "description": "Broadcast to every vendor",
+        "priority": "medium"
+    }, headers=headers["manager"])
+    if response.status_code != 200:
+        print(f"❌ Failed to create quote request: {response.status_code} - {response.text}")
+        return False
+    quote_request_id = response.json()["id"]
+    print(f"✅ Quote request created: {quote_request_id}")
+
+    url = f"{BASE_URL}/quote-requests/{quote_request_id}/vendors/bulk"
+    response = requests.post(url, json={"vendor_ids": vendor_ids, "send_email": False}, headers=headers["employee"])
+    if response.status_code != 403:
+        print(f"❌ Employee was allowed to invite vendors: {response.status_code}")
+        return False
+    print("✅ Employees cannot invite vendors to someone else's quote request")
+
+    response = requests.post(url, json={"vendor_ids": vendor_ids + ["missing-vendor-id"], "send_email": False},
+                             headers=headers["manager"])
+    if response.status_code != 200:
+        print(f"❌ Bulk invitation failed: {response.status_code} - {response.text}")
+        return False
+    report = response.json()
+    if report["invited"] != len(vendor_ids) or report["not_found"] != ["missing-vendor-id"]:
+        print(f"❌ Unexpected invitation report: {report}")
+        return False
+    print(f"✅ Invited {report['invited']} vendors in one call")
+
+    response = requests.post(url, json={"vendor_ids": vendor_ids, "send_email": False}, headers=headers["manager"])
+    report = response.json()
+    if response.status_code != 200 or report["invited"] != 0 or report["already_invited"] != len(vendor_ids):
+        print(f"❌ Repeated invitation was not skipped: {response.status_code} - {response.text}")
+        return False
+    print("✅ Vendors already invited were skipped")
+
+    response = requests.get(f"{BASE_URL}/quote-requests/{quote_request_id}", headers=headers["manager"])
+    quote_request = response.json()
+    if response.status_code != 200 or quote_request["status"] != "open":
+        print(f"❌ Quote request was not opened by the invitations: {response.status_code} - {response.text}")
+        return False
+    print("✅ The draft quote request was opened")
+    return True
+
+if __name__ == "__main__":
+    print("📨 Bulk Vendor Invitation Test Script")
+    print("=" * 50)
+
+    if test_bulk_vendor_invitations():
+        print("\n🎉 Bulk vendor invitations work!")
+    else:
+        print("\n💥 Bulk vendor invitation checks failed!")
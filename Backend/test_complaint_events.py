@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the complaint workflow event log.
+Walks a complaint through create -> forward -> forward to manager -> reject
+and checks the timeline, the assistant manager's approval history and the
+audit search.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "employee": ("employee@company.com", "password123"),
+    "ats": ("ats@company.com", "password123"),
+    "assistant_manager": ("assistant.manager@company.com", "password123"),
+    "manager": ("manager@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_complaint_events():
+    headers = {role: authenticate(role) for role in TEST_CREDENTIALS}
+    if not all(headers.values()):
+        return False
+
+    response = requests.post(f"{BASE_URL}/complaints/", json={
+        "title": "Test Complaint for Event Log",
+        "description": "This complaint walks through the workflow to check the event log.",
+        "priority": "medium",
+        "employee_id": "test-employee-id"
+    }, headers=headers["employee"])
+    if response.status_code != 200:
+        print(f"❌ Failed to create complaint: {response.status_code} - {response.text}")
+        return False
+    complaint_id = response.json()["id"]
+    print(f"✅ Complaint created: {complaint_id}")
+
+    steps = [
+        ("ats", f"/complaints/{complaint_id}/forward", {"component_purchase_reason": "Replacement keyboard required"}),
+        ("assistant_manager", f"/complaints/{complaint_id}/forward-to-manager", {}),
+        ("manager", f"/complaints/{complaint_id}/reject", {"reason": "Use a spare keyboard from stock"}),
+    ]
+    for role, path, body in steps:
+        response = requests.patch(f"{BASE_URL}{path}", json=body, headers=headers[role])
+        if response.status_code != 200:
+            print(f"❌ {role} step {path} failed: {response.status_code} - {response.text}")
+            return False
+
+    timeline = requests.get(f"{BASE_URL}/complaints/{complaint_id}/events", headers=headers["employee"]).json()
+    actions = [event["action"] for event in timeline]
+    print(f"📜 Timeline: {' -> '.join(actions)}")
+    if actions != ["created", "forwarded", "forwarded_to_manager", "rejected"]:
+        print("❌ Unexpected timeline")
+        return False
+    print("✅ Every transition recorded with its actor and status change")
+
+    history = requests.get(f"{BASE_URL}/assistant-manager/approval-history", headers=headers["assistant_manager"]).json()
+    if complaint_id not in [complaint["id"] for complaint in history]:
+        print("❌ Complaint missing from the assistant manager's approval history")
+        return False
+    print(f"✅ Approval history has {len(history)} complaints, including this one")
+
+    audit = requests.get(
+        f"{BASE_URL}/complaint-events",
+        params={"complaint_id": complaint_id, "action": "rejected"},
+        headers=headers["manager"]
+    ).json()
+    if len(audit) != 1 or audit[0]["role"] != "manager":
+        print(f"❌ Audit search returned {audit}")
+        return False
+    print(f"✅ Audit search found the rejection: {audit[0]['notes']}")
+    return True
+
+if __name__ == "__main__":
+    print("📜 Complaint Event Log Test Script")
+    print("=" * 50)
+
+    if test_complaint_events():
+        print("\n🎉 Complaint event log works!")
+    else:
+        print("\n💥 Complaint event log checks failed!")
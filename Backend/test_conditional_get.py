@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for conditional GETs on the list endpoints.
+Fetches each list, replays the request with If-None-Match and expects 304,
+then changes a complaint and expects the complaint list to be re-sent.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "admin@company.com"
+TEST_PASSWORD = "password123"
+
+ENDPOINTS = ["/complaints/all", "/assets/", "/vendor/", "/notifications"]
+
+def login():
+    """Login and return the access token"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None
+    print(f"✅ Logged in as {TEST_EMAIL}")
+    return response.json()["access_token"]
+
+def test_not_modified(headers):
+    all_passed = True
+    for endpoint in ENDPOINTS:
+        response = requests.get(f"{BASE_URL}{endpoint}", headers=headers)
+        etag = response.headers.get("ETag")
+        if response.status_code != 200 or not etag:
+            print(f"❌ {endpoint}: expected 200 with an ETag, got {response.status_code}")
+            all_passed = False
+            continue
+
+        replay = requests.get(f"{BASE_URL}{endpoint}", headers={**headers, "If-None-Match": etag})
+        if replay.status_code == 304 and not replay.content:
+            print(f"✅ {endpoint}: 304 Not Modified for {etag}")
+        else:
+            print(f"❌ {endpoint}: expected 304, got {replay.status_code}")
+            all_passed = False
+    return all_passed
+
+def test_invalidation(headers):
+    response = requests.get(f"{BASE_URL}/complaints/all", headers=headers)
+    complaints = response.json()
+    if not complaints:
+        print("⚠️  No complaints to modify - skipping invalidation check")
+        return True
+
+    etag = response.headers["ETag"]
+    complaint = complaints[0]
+    requests.patch(
+        f"{BASE_URL}/complaints/{complaint['id']}",
+        json={"priority": "medium" if complaint["priority"] == "high" else "high"},
+        headers=headers
+    )
+
+    replay = requests.get(f"{BASE_URL}/complaints/all", headers={**headers, "If-None-Match": etag})
+    if replay.status_code == 200 and replay.headers.get("ETag") != etag:
+        print("✅ Complaint list re-sent with a new ETag after an update")
+        return True
+    print(f"❌ Expected 200 with a new ETag after an update, got {replay.status_code}")
+    return False
+
+if __name__ == "__main__":
+    print("🔁 Conditional GET Test Script")
+    print("=" * 50)
+
+    token = login()
+    if token:
+        headers = {"Authorization": f"Bearer {token}"}
+        if test_not_modified(headers) and test_invalidation(headers):
+            print("\n🎉 Conditional GETs work!")
+        else:
+            print("\n💥 Conditional GET checks failed!")
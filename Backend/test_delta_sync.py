@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for delta sync on the complaint inboxes.
+Loads the full list to get a sync cursor, creates and deletes a complaint,
+then polls with ?updated_since= and checks the new row and tombstone.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "employee@company.com"
+TEST_PASSWORD = "password123"
+
+def login():
+    """Login and return token and employee ID"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None, None
+    token_data = response.json()
+    print(f"✅ Logged in as {token_data['email']}")
+    return token_data["access_token"], token_data.get("employee_id")
+
+def test_delta_sync(token, employee_id):
+    headers = {"Authorization": f"Bearer {token}"}
+    inbox_url = f"{BASE_URL}/employees/{employee_id}/complaints"
+
+    # 1. Full load hands out the starting cursor
+    response = requests.get(inbox_url, headers=headers)
+    cursor = response.headers.get("X-Sync-Cursor")
+    if response.status_code != 200 or cursor is None:
+        print(f"❌ Full load did not return a sync cursor: {response.status_code}")
+        return False
+    print(f"✅ Loaded {len(response.json())} complaints, cursor {cursor}")
+
+    # 2. Create one complaint and delete another
+    created = requests.post(
+        f"{BASE_URL}/complaints/",
+        json={
+            "title": "Delta sync check",
+            "description": "Created by the delta sync test script",
+            "priority": "low",
+            "employee_id": employee_id
+        },
+        headers=headers
+    ).json()
+    removed = requests.post(
+        f"{BASE_URL}/complaints/",
+        json={
+            "title": "Delta sync tombstone",
+            "description": "Created and deleted by the delta sync test script",
+            "priority": "low",
+            "employee_id": employee_id
+        },
+        headers=headers
+    ).json()
+    requests.delete(f"{BASE_URL}/complaints/{removed['id']}", headers=headers)
+
+    # 3. Poll for changes since the cursor
+    delta = requests.get(inbox_url, params={"updated_since": cursor}, headers=headers).json()
+    item_ids = [item["id"] for item in delta["items"]]
+    print(f"📦 Delta: {len(item_ids)} changed, {len(delta['deleted'])} deleted, next cursor {delta['cursor']}")
+
+    if created["id"] not in item_ids:
+        print("❌ New complaint missing from the delta")
+        return False
+    if removed["id"] not in delta["deleted"]:
+        print("❌ Deleted complaint missing from the tombstones")
+        return False
+
+    # 4. Polling again from the new cursor returns nothing
+    delta = requests.get(inbox_url, params={"updated_since": delta["cursor"]}, headers=headers).json()
+    if delta["items"] or delta["deleted"]:
+        print(f"❌ Expected an empty delta, got {delta}")
+        return False
+    print("✅ Second poll is empty")
+    return True
+
+if __name__ == "__main__":
+    print("🔄 Delta Sync Test Script")
+    print("=" * 50)
+
+    token, employee_id = login()
+    if token and employee_id:
+        if test_delta_sync(token, employee_id):
+            print("\n🎉 Delta sync works!")
+        else:
+            print("\n💥 Delta sync failed!")
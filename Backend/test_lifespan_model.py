@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the local asset lifespan model.
+Retrains the model, lists the riskiest assets and checks that the
+single-asset prediction matches the fleet listing.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "admin@company.com"
+TEST_PASSWORD = "password123"
+
+def login():
+    """Login and return the access token"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None
+    print(f"✅ Logged in as {TEST_EMAIL}")
+    return response.json()["access_token"]
+
+def test_lifespan_model(headers):
+    response = requests.post(f"{BASE_URL}/assets/lifespan-predictions/train", headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Training failed: {response.status_code} - {response.text}")
+        return False
+    model = response.json()
+    print(f"✅ Model {model['id']} trained on {model['assets']} assets ({model['failures']} retired)")
+    for feature, weight in model["coefficients"].items():
+        print(f"   {feature}: {weight:+.3f}")
+
+    response = requests.get(f"{BASE_URL}/assets/lifespan-predictions", params={"limit": 5}, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Listing predictions failed: {response.status_code} - {response.text}")
+        return False
+    predictions = response.json()
+    print(f"✅ Riskiest assets:")
+    for prediction in predictions:
+        print(f"   {prediction['asset_id']}: {prediction['remaining_months']} months left, "
+              f"{prediction['failure_probability_12m']:.0%} failure risk in 12 months")
+
+    if not predictions:
+        print("ℹ️  No active assets to check")
+        return True
+
+    asset_id = predictions[0]["asset_id"]
+    response = requests.get(f"{BASE_URL}/assets/{asset_id}/lifespan-prediction", headers=headers)
+    if response.status_code != 200 or response.json()["remaining_months"] != predictions[0]["remaining_months"]:
+        print(f"❌ Single prediction differs from the list: {response.status_code} - {response.text}")
+        return False
+    print("✅ Single-asset prediction matches the fleet listing")
+    return True
+
+if __name__ == "__main__":
+    print("🧮 Lifespan Model Test Script")
+    print("=" * 50)
+
+    token = login()
+    if token:
+        headers = {"Authorization": f"Bearer {token}"}
+        if test_lifespan_model(headers):
+            print("\n🎉 Lifespan model works!")
+        else:
+            print("\n💥 Lifespan model checks failed!")
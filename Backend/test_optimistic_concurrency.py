@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for optimistic concurrency control.
+Two reviewers read the same complaint; the first update wins and the second,
+based on the old version, gets 409 Conflict instead of silently overwriting
+it. Also checks If-Match and the ETag returned by updates.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "employee": ("employee@company.com", "password123"),
+    "assistant_manager": ("assistant.manager@company.com", "password123"),
+    "manager": ("manager@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_optimistic_concurrency():
+    headers = {role: authenticate(role) for role in TEST_CREDENTIALS}
+    if not all(headers.values()):
+        return False
+
+    response = requests.post(f"{BASE_URL}/complaints/", json={
+        "title": "Test Complaint for Concurrent Updates",
+        "description": "Two reviewers update this complaint at the same time.",
+        "priority": "medium",
+        "employee_id": "test-employee-id"
+    }, headers=headers["employee"])
+    if response.status_code != 200:
+        print(f"❌ Failed to create complaint: {response.status_code} - {response.text}")
+        return False
+    complaint = response.json()
+    read_version = complaint["version"]
+    print(f"✅ Complaint created at version {read_version}")
+
+    # Both reviewers start from the same version
+    response = requests.patch(f"{BASE_URL}/complaints/{complaint['id']}", json={
+        "priority": "high", "version": read_version
+    }, headers=headers["manager"])
+    if response.status_code != 200:
+        print(f"❌ First update failed: {response.status_code} - {response.text}")
+        return False
+    print(f"✅ First update applied, now version {response.json()['version']} (ETag {response.headers.get('ETag')})")
+
+    response = requests.patch(f"{BASE_URL}/complaints/{complaint['id']}", json={
+        "priority": "low", "version": read_version
+    }, headers=headers["assistant_manager"])
+    if response.status_code != 409:
+        print(f"❌ Stale update was not rejected: {response.status_code}")
+        return False
+    current_version = response.json()["current_version"]
+    print(f"✅ Stale update rejected with 409 (current version {current_version})")
+
+    response = requests.patch(f"{BASE_URL}/complaints/{complaint['id']}", json={"priority": "low"},
+                              headers={**headers["assistant_manager"], "If-Match": f'"{current_version}"'})
+    if response.status_code != 200 or response.json()["priority"] != "low":
+        print(f"❌ Retry with If-Match failed: {response.status_code} - {response.text}")
+        return False
+    print("✅ Retry with the current version via If-Match succeeded")
+    return True
+
+if __name__ == "__main__":
+    print("🔒 Optimistic Concurrency Test Script")
+    print("=" * 50)
+
+    if test_optimistic_concurrency():
+        print("\n🎉 Optimistic concurrency control works!")
+    else:
+        print("\n💥 Optimistic concurrency checks failed!")
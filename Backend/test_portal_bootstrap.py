@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-role portal bootstrap endpoint.
+Logs in as each test user (see create_test_users.py), loads
+/portal/bootstrap and fails when the reported query count exceeds the
+role's budget (portal_bootstrap.QUERY_BUDGETS, reported in X-Query-Budget).
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "employee": ("employee@company.com", "password123"),
+    "ats": ("ats@company.com", "password123"),
+    "assistant_manager": ("assistant.manager@company.com", "password123"),
+    "manager": ("manager@company.com", "password123"),
+    "admin": ("admin@company.com", "password123"),
+}
+
+def login(email, password):
+    """Login and return the access token"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": email, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {email}: {response.status_code} - {response.text}")
+        return None
+    return response.json()["access_token"]
+
+def test_bootstrap(role, email, password):
+    token = login(email, password)
+    if not token:
+        return False
+
+    response = requests.get(f"{BASE_URL}/portal/bootstrap", headers={"Authorization": f"Bearer {token}"})
+    if response.status_code != 200:
+        print(f"❌ {role}: expected 200, got {response.status_code} - {response.text}")
+        return False
+
+    data = response.json()
+    sections = ", ".join(key for key in data if key not in ("role", "user"))
+    if data["role"] != role:
+        print(f"❌ {role}: bootstrap composed for {data['role']}")
+        return False
+    if "X-Query-Budget" not in response.headers:
+        print(f"❌ {role}: no query budget reported")
+        return False
+    query_count = int(response.headers["X-Query-Count"])
+    budget = int(response.headers["X-Query-Budget"])
+    if query_count > budget:
+        print(f"❌ {role}: {query_count} queries, budget is {budget}")
+        return False
+    print(f"✅ {role}: {query_count}/{budget} queries - {sections}")
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Portal Bootstrap Test Script")
+    print("=" * 50)
+
+    results = [test_bootstrap(role, email, password) for role, (email, password) in TEST_CREDENTIALS.items()]
+    if all(results):
+        print("\n🎉 Every portal bootstrap is within its query budget!")
+    else:
+        print("\n💥 Portal bootstrap checks failed!")
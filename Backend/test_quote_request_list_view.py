@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for the list view of the quote request lists.
+Invites a vendor to a new quote request, submits its quote and checks that
+?view=list reports the invited and responded counts and quote amounts
+without the nested vendor selections and responses.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "manager": ("manager@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_quote_request_list_view():
+    headers = authenticate("manager")
+    if not headers:
+        return False
+
+    response = requests.get(f"{BASE_URL}/vendor/", headers=headers)
+    if response.status_code != 200 or not response.json():
+        print(f"❌ No vendor to invite: {response.status_code}")
+        return False
+    vendor_id = response.json()[0]["id"]
+
+    response = requests.post(f"{BASE_URL}/quote-requests/", json={
+        "title": "Test Quote Request for the List View",
+        "description": "Two monitors",
+        "priority": "low"
+    }, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Failed to create quote request: {response.status_code} - {response.text}")
+        return False
+    quote_request_id = response.json()["id"]
+
+    requests.post(f"{BASE_URL}/quote-requests/{quote_request_id}/vendors", json={"vendor_id": vendor_id}, headers=headers)
+    response = requests.post(f"{BASE_URL}/quotes/{quote_request_id}/respond", json={
+        "quote_request_id": quote_request_id,
+        "vendor_id": vendor_id,
+        "quote_amount": 450.0,
+        "description": "Two 27 inch monitors"
+    }, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Failed to submit quote: {response.status_code} - {response.text}")
+        return False
+    print(f"✅ Quote request {quote_request_id} has one invited vendor and one quote")
+
+    for path in ["/quote-requests/", "/quote-requests/my-requests"]:
+        response = requests.get(f"{BASE_URL}{path}?view=list", headers=headers)
+        if response.status_code != 200:
+            print(f"❌ {path}?view=list failed: {response.status_code} - {response.text}")
+            return False
+        summary = next((row for row in response.json() if row["id"] == quote_request_id), None)
+        if summary is None or "responses" in summary:
+            print(f"❌ {path}?view=list did not return the summary: {summary}")
+            return False
+        expected = {"invited_count": 1, "responded_count": 1, "min_quote_amount": 450.0, "avg_quote_amount": 450.0}
+        if any(summary[key] != value for key, value in expected.items()) or not summary["latest_submission"]:
+            print(f"❌ Unexpected stats from {path}?view=list: {summary}")
+            return False
+        print(f"✅ {path}?view=list reports the response stats")
+
+    response = requests.get(f"{BASE_URL}/quote-requests/?view=other", headers=headers)
+    if response.status_code != 400:
+        print(f"❌ Unknown view was accepted: {response.status_code}")
+        return False
+    print("✅ Unknown views are rejected")
+    return True
+
+if __name__ == "__main__":
+    print("📋 Quote Request List View Test Script")
+    print("=" * 50)
+
+    if test_quote_request_list_view():
+        print("\n🎉 Quote request list view works!")
+    else:
+        print("\n💥 Quote request list view checks failed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for quote submission and vendor selection upserts.
+Adding the same vendor twice returns the same selection, and resubmitting a
+quote updates the vendor's single response in place (bumping its version)
+instead of creating a second one.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "manager": ("manager@company.com", "password123"),
+    "admin": ("admin@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_quote_upserts():
+    headers = authenticate("manager")
+    if not headers:
+        return False
+
+    response = requests.get(f"{BASE_URL}/vendor/", headers=headers)
+    if response.status_code != 200 or not response.json():
+        print(f"❌ No vendor to invite: {response.status_code}")
+        return False
+    vendor_id = response.json()[0]["id"]
+
+    response = requests.post(f"{BASE_URL}/quote-requests/", json={
+        "title": "Test Quote Request for Upserts",
+        "description": "Ten docking stations",
+        "priority": "medium"
+    }, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Failed to create quote request: {response.status_code} - {response.text}")
+        return False
+    quote_request_id = response.json()["id"]
+    print(f"✅ Quote request created: {quote_request_id}")
+
+    selections = [
+        requests.post(f"{BASE_URL}/quote-requests/{quote_request_id}/vendors",
+                      json={"vendor_id": vendor_id}, headers=headers)
+        for _ in range(2)
+    ]
+    if any(selection.status_code != 200 for selection in selections):
+        print(f"❌ Failed to add vendor: {selections[-1].status_code} - {selections[-1].text}")
+        return False
+    if selections[0].json()["id"] != selections[1].json()["id"]:
+        print("❌ Adding the same vendor twice created two selections")
+        return False
+    print("✅ Adding the same vendor twice returned the same selection")
+
+    responses = []
+    for amount, description in [(900.0, "First offer"), (800.0, "Revised offer")]:
+        response = requests.post(f"{BASE_URL}/quotes/{quote_request_id}/respond", json={
+            "quote_request_id": quote_request_id,
+            "vendor_id": vendor_id,
+            "quote_amount": amount,
+            "description": description
+        }, headers=headers)
+        if response.status_code != 200:
+            print(f"❌ Failed to submit quote: {response.status_code} - {response.text}")
+            return False
+        responses.append(response.json())
+
+    first, second = responses
+    if first["id"] != second["id"] or second["quote_amount"] != 800.0 or second["version"] != first["version"] + 1:
+        print(f"❌ Resubmission did not update the response in place: {first} / {second}")
+        return False
+    print(f"✅ Resubmission updated the response in place (version {second['version']})")
+
+    response = requests.get(f"{BASE_URL}/quote-requests/{quote_request_id}/responses", headers=headers)
+    if response.status_code != 200 or len(response.json()) != 1:
+        print(f"❌ Expected one response: {response.status_code} - {response.text}")
+        return False
+    print("✅ The quote request has exactly one response from the vendor")
+    return True
+
+if __name__ == "__main__":
+    print("🔁 Quote Upsert Test Script")
+    print("=" * 50)
+
+    if test_quote_upserts():
+        print("\n🎉 Quote upserts work!")
+    else:
+        print("\n💥 Quote upsert checks failed!")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the resumable chunked upload flow.
+Uploads a generated log file in chunks, simulates a retried chunk and a
+resume from the server offset, then attaches the upload to a new complaint.
+"""
+
+import requests
+import hashlib
+import os
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "employee@company.com"
+TEST_PASSWORD = "password123"
+CHUNK_SIZE = 1024 * 1024
+
+def login():
+    """Login and return token and employee ID"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None, None
+    token_data = response.json()
+    print(f"✅ Logged in as {token_data['email']}")
+    return token_data["access_token"], token_data.get("employee_id")
+
+def test_resumable_upload(token, employee_id):
+    headers = {"Authorization": f"Bearer {token}"}
+    data = os.urandom(3 * CHUNK_SIZE + 12345)
+
+    # 1. Start an upload session
+    response = requests.post(
+        f"{BASE_URL}/upload-sessions",
+        json={"filename": "diagnostics.log", "total_size": len(data), "content_type": "text/plain"},
+        headers=headers
+    )
+    if response.status_code != 200:
+        print(f"❌ Failed to create upload session: {response.status_code} - {response.text}")
+        return False
+    session_id = response.json()["id"]
+    print(f"✅ Created upload session {session_id}")
+
+    # 2. Send the first chunk twice - the retry must not duplicate data
+    for attempt in range(2):
+        response = requests.put(
+            f"{BASE_URL}/upload-sessions/{session_id}/chunks",
+            params={"offset": 0},
+            data=data[:CHUNK_SIZE],
+            headers=headers
+        )
+        print(f"📦 Chunk 0 attempt {attempt + 1}: {response.status_code}, offset={response.headers.get('Upload-Offset')}")
+
+    # 3. Skipping ahead must be rejected with the current offset
+    response = requests.put(
+        f"{BASE_URL}/upload-sessions/{session_id}/chunks",
+        params={"offset": 2 * CHUNK_SIZE},
+        data=data[2 * CHUNK_SIZE:3 * CHUNK_SIZE],
+        headers=headers
+    )
+    if response.status_code == 409:
+        print(f"✅ Out-of-order chunk rejected, server offset: {response.headers.get('Upload-Offset')}")
+    else:
+        print(f"❌ Expected 409 for out-of-order chunk, got {response.status_code}")
+
+    # 4. Resume from the offset the server reports
+    offset = int(requests.get(f"{BASE_URL}/upload-sessions/{session_id}", headers=headers).headers["Upload-Offset"])
+    while offset < len(data):
+        response = requests.put(
+            f"{BASE_URL}/upload-sessions/{session_id}/chunks",
+            params={"offset": offset},
+            data=data[offset:offset + CHUNK_SIZE],
+            headers=headers
+        )
+        offset = int(response.headers["Upload-Offset"])
+        print(f"📦 Uploaded up to {offset}/{len(data)} bytes")
+
+    # 5. Assemble
+    response = requests.post(f"{BASE_URL}/upload-sessions/{session_id}/complete", headers=headers)
+    upload = response.json()
+    if upload.get("checksum") == hashlib.sha256(data).hexdigest():
+        print(f"✅ Upload assembled at {upload['file_path']} with matching checksum")
+    else:
+        print(f"❌ Checksum mismatch or assembly failed: {upload}")
+        return False
+
+    # 6. Attach to a complaint
+    response = requests.post(
+        f"{BASE_URL}/complaints/",
+        json={
+            "title": "Laptop crashes on boot",
+            "description": "Diagnostic log attached from the crash reporter",
+            "priority": "high",
+            "employee_id": employee_id,
+            "upload_ids": [session_id]
+        },
+        headers=headers
+    )
+    if response.status_code != 200:
+        print(f"❌ Failed to create complaint: {response.status_code} - {response.text}")
+        return False
+    complaint_id = response.json()["id"]
+
+    attachments = requests.get(f"{BASE_URL}/complaints/{complaint_id}/attachments", headers=headers).json()
+    print(f"✅ Complaint {complaint_id} has {len(attachments)} attachment(s)")
+    return len(attachments) == 1
+
+if __name__ == "__main__":
+    print("📤 Resumable Upload Test Script")
+    print("=" * 50)
+
+    token, employee_id = login()
+    if token and employee_id:
+        if test_resumable_upload(token, employee_id):
+            print("\n🎉 Resumable upload flow works!")
+        else:
+            print("\n💥 Resumable upload flow failed!")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-statement update paths.
+Updates a complaint and a notification through the API and checks that
+each update returns the new values and version straight from the UPDATE,
+that a stale version is still rejected, and that the change reaches the
+complaint's timeline.
+Run benchmark_updates.py to compare the statements per update.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "employee": ("employee@company.com", "password123"),
+    "manager": ("manager@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_single_statement_updates():
+    headers = {role: authenticate(role) for role in TEST_CREDENTIALS}
+    if not all(headers.values()):
+        return False
+
+    response = requests.post(f"{BASE_URL}/complaints/", json={
+        "title": "Test Complaint for Single-Statement Updates",
+        "description": "This complaint is updated with UPDATE ... RETURNING.",
+        "priority": "medium",
+        "employee_id": "test-employee-id"
+    }, headers=headers["employee"])
+    if response.status_code != 200:
+        print(f"❌ Failed to create complaint: {response.status_code} - {response.text}")
+        return False
+    complaint = response.json()
+    print(f"✅ Complaint created at version {complaint['version']}")
+
+    response = requests.patch(f"{BASE_URL}/complaints/{complaint['id']}", json={
+        "status": "resolved", "resolution_notes": "Fixed in place", "version": complaint["version"]
+    }, headers=headers["manager"])
+    updated = response.json()
+    if response.status_code != 200 or updated["status"] != "resolved" or not updated["resolution_date"]:
+        print(f"❌ Update failed: {response.status_code} - {response.text}")
+        return False
+    if updated["version"] != complaint["version"] + 1 or response.headers.get("ETag") != f'"{updated["version"]}"':
+        print(f"❌ Unexpected version {updated['version']} / ETag {response.headers.get('ETag')}")
+        return False
+    print(f"✅ Update returned the new row at version {updated['version']}")
+
+    response = requests.patch(f"{BASE_URL}/complaints/{complaint['id']}", json={
+        "priority": "low", "version": complaint["version"]
+    }, headers=headers["manager"])
+    if response.status_code != 409:
+        print(f"❌ Stale update was not rejected: {response.status_code}")
+        return False
+    print("✅ Stale update rejected with 409")
+
+    timeline = requests.get(f"{BASE_URL}/complaints/{complaint['id']}/events", headers=headers["employee"]).json()
+    if [event["action"] for event in timeline][-1] != "resolved":
+        print(f"❌ Resolution missing from the timeline: {timeline}")
+        return False
+    print("✅ Resolution recorded in the complaint timeline")
+
+    notifications = requests.get(f"{BASE_URL}/notifications", headers=headers["employee"]).json()
+    unread = [notification for notification in notifications if not notification["read"]]
+    if unread:
+        response = requests.put(f"{BASE_URL}/notifications/{unread[0]['id']}/read", headers=headers["employee"])
+        if response.status_code != 200 or not response.json()["read"]:
+            print(f"❌ Marking a notification read failed: {response.status_code} - {response.text}")
+            return False
+        print("✅ Notification marked read")
+    else:
+        print("ℹ️  No unread notification to mark read")
+    return True
+
+if __name__ == "__main__":
+    print("⚡ Single-Statement Update Test Script")
+    print("=" * 50)
+
+    if test_single_statement_updates():
+        print("\n🎉 Single-statement updates work!")
+    else:
+        print("\n💥 Single-statement update checks failed!")
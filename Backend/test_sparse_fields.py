@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for sparse fieldsets (?fields=) on the read endpoints.
+Checks that only the requested fields come back and that unknown
+fields are rejected with 400.
+"""
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_EMAIL = "admin@company.com"
+TEST_PASSWORD = "password123"
+
+CASES = [
+    ("/assets/", "id,name,serial_number"),
+    ("/complaints/all", "id,title,status,employee"),
+    ("/employees/all", "id,name,department"),
+    ("/vendor/", "id,name"),
+    ("/quote-requests/", "title,status,due_date"),
+]
+
+def login():
+    """Login and return the access token"""
+    response = requests.post(f"{BASE_URL}/token", data={"username": TEST_EMAIL, "password": TEST_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Login failed: {response.status_code} - {response.text}")
+        return None
+    print(f"✅ Logged in as {TEST_EMAIL}")
+    return response.json()["access_token"]
+
+def test_sparse_lists(headers):
+    all_passed = True
+    for endpoint, fields in CASES:
+        response = requests.get(f"{BASE_URL}{endpoint}", params={"fields": fields}, headers=headers)
+        if response.status_code != 200:
+            print(f"❌ {endpoint}: expected 200, got {response.status_code} - {response.text}")
+            all_passed = False
+            continue
+
+        expected = set(fields.split(","))
+        unexpected = [item for item in response.json() if set(item) != expected]
+        if unexpected:
+            print(f"❌ {endpoint}: got fields {sorted(unexpected[0])}, expected {sorted(expected)}")
+            all_passed = False
+        else:
+            print(f"✅ {endpoint}?fields={fields}: {len(response.json())} items, {len(response.content)} bytes")
+    return all_passed
+
+def test_unknown_field(headers):
+    response = requests.get(f"{BASE_URL}/assets/", params={"fields": "id,not_a_field"}, headers=headers)
+    if response.status_code == 400:
+        print(f"✅ Unknown field rejected: {response.json()['detail'][:60]}...")
+        return True
+    print(f"❌ Expected 400 for an unknown field, got {response.status_code}")
+    return False
+
+if __name__ == "__main__":
+    print("✂️  Sparse Fieldset Test Script")
+    print("=" * 50)
+
+    token = login()
+    if token:
+        headers = {"Authorization": f"Bearer {token}"}
+        if test_sparse_lists(headers) and test_unknown_field(headers):
+            print("\n🎉 Sparse fieldsets work!")
+        else:
+            print("\n💥 Sparse fieldset checks failed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the request-scoped unit of work.
+Creates a vendor (user account and vendor record in one transaction) and
+checks the vendor can log in with the returned credentials, then files,
+forwards and rejects a complaint and checks the rejection and the ATS
+notifications were committed together.
+"""
+
+import uuid
+
+import requests
+
+# Test configuration
+BASE_URL = "http://localhost:8000"
+TEST_CREDENTIALS = {
+    "admin": ("admin@company.com", "password123"),
+    "employee": ("employee@company.com", "password123"),
+    "ats": ("ats@company.com", "password123"),
+    "manager": ("manager@company.com", "password123"),
+}
+
+def authenticate(role):
+    """Log in as the test user of a role and return auth headers"""
+    username, password = TEST_CREDENTIALS[role]
+    response = requests.post(f"{BASE_URL}/token", data={"username": username, "password": password})
+    if response.status_code != 200:
+        print(f"❌ Login failed for {username}: {response.status_code}")
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_vendor_creation(headers):
+    email = f"uow-vendor-{uuid.uuid4().hex[:8]}@example.com"
+    response = requests.post(f"{BASE_URL}/vendor/", json={
+        "name": "Unit of Work Test Vendor",
+        "email": email,
+        "phone": "555-0100",
+        "service_type": "Hardware"
+    }, headers=headers["admin"])
+    if response.status_code != 200:
+        print(f"❌ Failed to create vendor: {response.status_code} - {response.text}")
+        return False
+    vendor = response.json()
+
+    response = requests.post(f"{BASE_URL}/token", data={"username": vendor["username"], "password": vendor["temp_password"]})
+    if response.status_code != 200:
+        print(f"❌ Vendor cannot log in: {response.status_code}")
+        return False
+    print("✅ Vendor record and login committed together")
+    return True
+
+def test_rejection_with_notifications(headers):
+    response = requests.post(f"{BASE_URL}/complaints/", json={
+        "title": "Test Complaint for Unit of Work",
+        "description": "This complaint is rejected together with its notifications.",
+        "priority": "medium",
+        "employee_id": "test-employee-id"
+    }, headers=headers["employee"])
+    if response.status_code != 200:
+        print(f"❌ Failed to create complaint: {response.status_code} - {response.text}")
+        return False
+    complaint_id = response.json()["id"]
+
+    response = requests.post(f"{BASE_URL}/complaints/bulk-transition", json={
+        "action": "forward", "complaint_ids": [complaint_id], "notes": "Replacement parts are required"
+    }, headers=headers["ats"])
+    if response.status_code != 200 or response.json()["applied"] != 1:
+        print(f"❌ Failed to forward complaint: {response.status_code} - {response.text}")
+        return False
+
+    response = requests.patch(f"{BASE_URL}/complaints/{complaint_id}/reject", json={
+        "reason": "Use spare parts from stock"
+    }, headers=headers["manager"])
+    if response.status_code != 200 or response.json()["status"] != "in_progress":
+        print(f"❌ Rejection failed: {response.status_code} - {response.text}")
+        return False
+
+    notifications = requests.get(f"{BASE_URL}/notifications", headers=headers["ats"]).json()
+    if not any(notification["related_id"] == complaint_id for notification in notifications):
+        print("❌ ATS notification missing after the rejection")
+        return False
+    print("✅ Rejection and ATS notifications committed together")
+    return True
+
+if __name__ == "__main__":
+    print("🧾 Unit of Work Test Script")
+    print("=" * 50)
+
+    headers = {role: authenticate(role) for role in TEST_CREDENTIALS}
+    if all(headers.values()) and test_vendor_creation(headers) and test_rejection_with_notifications(headers):
+        print("\n🎉 Multi-step endpoints commit as one unit!")
+    else:
+        print("\n💥 Unit of work checks failed!")
@@ -0,0 +1,104 @@
+"""
+Request-scoped unit of work.
+
+The crud functions commit after every call, so an endpoint that creates a
+user and then a vendor, or accepts a quote, notifies the employee and
+updates the complaint, used to commit (and fsync) once per step, and a
+failure half way left the earlier steps committed behind it.
+
+Endpoints decorated with @atomic run as one unit of work on their session:
+inside it, Session.commit() only flushes, so every step still sees the
+rows written before it and the before-commit listeners run once, and the
+unit commits once when the endpoint returns or rolls everything back when
+it raises (including HTTPException). Steps whose failure the endpoint
+tolerates run in a savepoint, so only that step is undone:
+
+    with unit_of_work.savepoint(db):
+        crud.create_notification(db, notification_data)
+
+Session.rollback() outside a savepoint discards everything the unit wrote so
+far, so a unit rolled back that way refuses to commit: the endpoint fails
+with UnitOfWorkRolledBack instead of reporting success for writes that are
+gone. Steps that may fail and be rolled back belong in a savepoint.
+"""
+
+import functools
+from contextlib import contextmanager
+
+from sqlalchemy.orm import Session
+
+UNIT_OF_WORK_KEY = "unit_of_work"
+ROLLED_BACK_KEY = "unit_of_work_rolled_back"
+
+
+class UnitOfWorkRolledBack(Exception):
+    """Raised when a unit of work that was rolled back part way tries to commit."""
+
+
+class UnitOfWorkSession(Session):
+    """Session whose commits are deferred to the end of the enclosing unit of work."""
+
+    def commit(self):
+        if self.info.get(UNIT_OF_WORK_KEY):
+            self.flush()
+            return
+        super().commit()
+
+    def rollback(self):
+        if self.info.get(UNIT_OF_WORK_KEY):
+            if self.in_nested_transaction():
+                # A step inside a savepoint rolls back only that step
+                self.get_nested_transaction().rollback()
+                return
+            # The unit's earlier writes are gone, so it must not commit what is left
+            self.info[ROLLED_BACK_KEY] = True
+        super().rollback()
+
+
+@contextmanager
+def transaction(db: Session):
+    """Run the block as one transaction; nested blocks join the outer one."""
+    if db.info.get(UNIT_OF_WORK_KEY):
+        yield db
+        return
+    db.info[UNIT_OF_WORK_KEY] = True
+    try:
+        yield db
+    except BaseException:
+        db.info.pop(UNIT_OF_WORK_KEY, None)
+        db.info.pop(ROLLED_BACK_KEY, None)
+        db.rollback()
+        raise
+    db.info.pop(UNIT_OF_WORK_KEY, None)
+    if db.info.pop(ROLLED_BACK_KEY, False):
+        db.rollback()
+        raise UnitOfWorkRolledBack("The unit of work was rolled back before it finished; nothing was committed")
+    # Everything the unit wrote is flushed, so its objects stay loaded for the response
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+
+def atomic(endpoint):
+    """Run an endpoint as one unit of work on its `db` session."""
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        with transaction(kwargs["db"]):
+            return await endpoint(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def savepoint(db: Session):
+    """Undo only the block's writes if it raises; the exception propagates."""
+    nested = db.begin_nested()
+    try:
+        yield db
+    except BaseException:
+        if nested.is_active:
+            nested.rollback()
+        raise
+    nested.commit()
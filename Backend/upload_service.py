@@ -0,0 +1,227 @@
+"""
+Resumable chunked upload storage for large complaint attachments.
+
+Chunks are streamed straight to a partial file on disk so neither the whole
+upload nor a whole chunk is ever held in memory. The upload session row in the
+database records the committed offset; a client that loses its connection asks
+for the session's offset and resumes from there.
+
+File I/O runs in the threadpool so a slow disk never blocks the event loop.
+Uploads that receive no chunk for UPLOAD_SESSION_EXPIRY_HOURS are aborted
+by a periodic sweep, which also deletes their partial files and drops the
+per-session locks of uploads that are no longer in progress.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+import crud
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Partial files live outside the /uploads static mount so half-written
+# uploads are never publicly served.
+PARTIAL_UPLOAD_DIR = Path("uploads_partial")
+ATTACHMENT_UPLOAD_DIR = Path("uploads/complaint_attachments")
+
+MAX_UPLOAD_SIZE = 500 * 1024 * 1024  # 500MB per attachment
+MAX_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB per chunk request
+RECOMMENDED_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Idle uploads are aborted after this long; the sweep runs every interval (0 = never)
+UPLOAD_SESSION_EXPIRY_HOURS = float(os.getenv("UPLOAD_SESSION_EXPIRY_HOURS", "24"))
+UPLOAD_SWEEP_INTERVAL_SECONDS = int(os.getenv("UPLOAD_SWEEP_INTERVAL_SECONDS", "3600"))
+
+ALLOWED_ATTACHMENT_EXTENSIONS = {
+    'jpg', 'jpeg', 'png', 'gif', 'webp',
+    'txt', 'log', 'zip', 'gz', 'pdf',
+    'mp4', 'mov', 'webm',
+}
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+
+# One lock per session so concurrent retries of the same chunk cannot
+# interleave their appends.
+_session_locks: Dict[str, asyncio.Lock] = {}
+
+
+class ChunkOffsetMismatch(Exception):
+    """Raised when a chunk starts past the committed offset of the upload."""
+
+    def __init__(self, expected_offset: int):
+        super().__init__(f"Expected chunk at offset {expected_offset}")
+        self.expected_offset = expected_offset
+
+
+class UploadTooLarge(Exception):
+    """Raised when a chunk would grow the upload past its declared size."""
+
+
+def get_extension(filename: str) -> str:
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+
+def is_allowed_attachment(filename: str) -> bool:
+    return get_extension(filename) in ALLOWED_ATTACHMENT_EXTENSIONS
+
+
+def is_image(filename: str) -> bool:
+    return get_extension(filename) in IMAGE_EXTENSIONS
+
+
+def get_session_lock(session_id: str) -> asyncio.Lock:
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+
+def release_session_lock(session_id: str):
+    _session_locks.pop(session_id, None)
+
+
+def partial_path(session_id: str) -> Path:
+    return PARTIAL_UPLOAD_DIR / f"{session_id}.part"
+
+
+def create_partial_file(session_id: str):
+    """Create the empty partial file backing a new upload session."""
+    PARTIAL_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    partial_path(session_id).touch()
+
+
+async def write_chunk(
+    session_id: str,
+    stream: AsyncIterator[bytes],
+    offset: int,
+    committed: int,
+    total_size: int,
+) -> int:
+    """
+    Append a chunk starting at `offset` to the session's partial file.
+
+    Chunk PUTs are idempotent: bytes the server has already committed are
+    skipped, so retrying a chunk whose response was lost is harmless.
+    Returns the new committed offset.
+    """
+    if offset > committed:
+        raise ChunkOffsetMismatch(committed)
+
+    path = partial_path(session_id)
+    # Drop anything past the committed offset left behind by an interrupted write
+    if path.exists() and path.stat().st_size != committed:
+        await run_in_threadpool(_truncate, path, committed)
+
+    skip = committed - offset
+    position = committed
+    chunk_bytes = 0
+
+    buffer = await run_in_threadpool(open, path, "ab")
+    try:
+        async for piece in stream:
+            if not piece:
+                continue
+            chunk_bytes += len(piece)
+            if chunk_bytes > MAX_CHUNK_SIZE:
+                await run_in_threadpool(buffer.truncate, committed)
+                raise UploadTooLarge(f"Chunk exceeds {MAX_CHUNK_SIZE} bytes")
+
+            if skip:
+                if len(piece) <= skip:
+                    skip -= len(piece)
+                    continue
+                piece = piece[skip:]
+                skip = 0
+
+            if position + len(piece) > total_size:
+                await run_in_threadpool(buffer.truncate, committed)
+                raise UploadTooLarge("Chunk extends past the declared upload size")
+
+            await run_in_threadpool(buffer.write, piece)
+            position += len(piece)
+    finally:
+        await run_in_threadpool(buffer.close)
+
+    return position
+
+
+def _truncate(path: Path, size: int):
+    with open(path, "r+b") as f:
+        f.truncate(size)
+
+
+def assemble_upload(session_id: str, filename: str) -> Tuple[str, str]:
+    """
+    Move a fully received partial file to its final location.
+    Returns the relative file path and the SHA-256 checksum of the content.
+    """
+    ATTACHMENT_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    source = partial_path(session_id)
+
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+    extension = get_extension(filename)
+    unique_filename = f"{uuid.uuid4()}.{extension}" if extension else str(uuid.uuid4())
+    target = ATTACHMENT_UPLOAD_DIR / unique_filename
+    os.replace(source, target)
+
+    return f"uploads/complaint_attachments/{unique_filename}", digest.hexdigest()
+
+
+def discard_partial_file(session_id: str):
+    path = partial_path(session_id)
+    if path.exists():
+        path.unlink()
+
+
+async def sweep_expired_sessions() -> int:
+    """Abort idle uploads, delete their partial files and drop unused locks; returns the number aborted."""
+    cutoff = datetime.utcnow() - timedelta(hours=UPLOAD_SESSION_EXPIRY_HOURS)
+    expired = 0
+    db = SessionLocal()
+    try:
+        for session_id in crud.get_expired_upload_sessions(db, cutoff):
+            lock = get_session_lock(session_id)
+            if lock.locked():
+                # A chunk is being written right now
+                continue
+            async with lock:
+                if not crud.expire_upload_session(db, session_id, cutoff):
+                    continue
+                await run_in_threadpool(discard_partial_file, session_id)
+            release_session_lock(session_id)
+            expired += 1
+
+        # Locks taken by requests for uploads that were completed or aborted since
+        idle = [session_id for session_id, lock in _session_locks.items() if not lock.locked()]
+        in_progress = crud.get_in_progress_upload_ids(db, idle)
+        for session_id in idle:
+            lock = _session_locks.get(session_id)
+            if session_id not in in_progress and lock is not None and not lock.locked():
+                release_session_lock(session_id)
+    finally:
+        db.close()
+    return expired
+
+
+async def run_sweeper():
+    """Sweep expired uploads every UPLOAD_SWEEP_INTERVAL_SECONDS until cancelled."""
+    while True:
+        try:
+            expired = await sweep_expired_sessions()
+            if expired:
+                logger.info(f"Aborted {expired} expired upload sessions")
+        except Exception as e:
+            logger.error(f"Upload session sweep failed: {e}")
+        await asyncio.sleep(UPLOAD_SWEEP_INTERVAL_SECONDS)
@@ -0,0 +1,143 @@
+"""
+Bulk vendor invitations for quote requests.
+
+Broadcasting a request for quotation used to be one
+POST /quote-requests/{id}/vendors call per vendor, each with its own
+quote request and vendor lookups and commit. Here the vendors, given by id
+and/or service type, are resolved together with their existing selections
+in one query, the new selections are inserted in one multi-row INSERT that
+skips vendors already invited (including ones invited concurrently), and
+the vendor notifications are inserted in one flush, all in one
+transaction. The invitation emails go out afterwards as one batch over a
+single SMTP connection.
+"""
+
+import os
+import uuid
+from datetime import datetime
+from typing import List, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+import crud
+import fast_updates
+import schemas
+from models import QuoteRequest, QuoteRequestVendor, User, Vendor
+
+MAX_BULK_INVITATIONS = int(os.getenv("MAX_BULK_INVITATIONS", "1000"))
+
+# Vendors offering both hardware and software match either service type
+ALL_SERVICES = "Both"
+
+
+def _check_can_invite(quote_request: QuoteRequest, current_user: User):
+    """The same rules as adding a single vendor"""
+    if current_user.role not in ["admin", "manager"] and quote_request.created_by_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to add vendors to this quote request"
+        )
+    if quote_request.status not in ["draft", "open"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot add vendors to a quote request that is not in draft or open status"
+        )
+
+
+def _resolve_vendors(db: Session, quote_request_id: str, data: schemas.BulkVendorInvitation) -> list:
+    """(id, name, email, already invited) of every vendor the invitation targets"""
+    targets = []
+    if data.vendor_ids:
+        targets.append(Vendor.id.in_(data.vendor_ids))
+    if data.service_type:
+        targets.append(Vendor.service_type.in_([data.service_type, ALL_SERVICES]))
+    return db.execute(
+        select(Vendor.id, Vendor.name, Vendor.email, QuoteRequestVendor.id.is_not(None))
+        .outerjoin(QuoteRequestVendor, and_(
+            QuoteRequestVendor.vendor_id == Vendor.id,
+            QuoteRequestVendor.quote_request_id == quote_request_id,
+        ))
+        .where(or_(*targets))
+        .order_by(Vendor.name)
+    ).all()
+
+
+def _notifications(db: Session, quote_request: QuoteRequest, vendors: list) -> List[schemas.NotificationCreate]:
+    """One notification for the user account of each invited vendor"""
+    emails = [email for _, _, email, _ in vendors]
+    vendor_users = db.execute(
+        select(User.id).where(User.role == "vendor", User.email.in_(emails))
+    ).scalars()
+    return [
+        schemas.NotificationCreate(
+            user_id=user_id,
+            message=f"You have been invited to quote for '{quote_request.title}'.",
+            type="Quote Request",
+            related_id=quote_request.id,
+        )
+        for user_id in vendor_users
+    ]
+
+
+def invite(db: Session, quote_request: QuoteRequest, data: schemas.BulkVendorInvitation, current_user: User) -> Tuple[dict, List[dict]]:
+    """Invite the vendors; returns the report and the invitation emails to send."""
+    _check_can_invite(quote_request, current_user)
+    data.vendor_ids = list(dict.fromkeys(data.vendor_ids))
+    if not data.vendor_ids and not data.service_type:
+        raise HTTPException(status_code=422, detail="Give vendor_ids or a service_type")
+
+    vendors = _resolve_vendors(db, quote_request.id, data)
+    if len(vendors) > MAX_BULK_INVITATIONS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BULK_INVITATIONS} vendors per call")
+    found = {vendor_id for vendor_id, _, _, _ in vendors}
+    not_found = [vendor_id for vendor_id in data.vendor_ids if vendor_id not in found]
+
+    now = datetime.utcnow()
+    new_vendors = [vendor for vendor in vendors if not vendor[3]]
+    inserted = fast_updates.insert_ignoring_conflicts(
+        db, QuoteRequestVendor,
+        [
+            {
+                "id": str(uuid.uuid4()),
+                "quote_request_id": quote_request.id,
+                "vendor_id": vendor_id,
+                "sent_date": now,
+                "has_responded": False,
+            }
+            for vendor_id, _, _, _ in new_vendors
+        ],
+        ["quote_request_id", "vendor_id"],
+        returning=["vendor_id"],
+    )
+    if inserted is not None:
+        # Vendors invited by a concurrent request since the lookup were skipped
+        inserted_ids = {vendor_id for vendor_id, in inserted}
+        new_vendors = [vendor for vendor in new_vendors if vendor[0] in inserted_ids]
+
+    if new_vendors:
+        # Notifications and selections are committed together
+        crud.create_notifications(db, _notifications(db, quote_request, new_vendors))
+        if quote_request.status == "draft":
+            crud.update_quote_request(db, quote_request.id, status="open")
+
+    emails = [
+        {
+            "name": name,
+            "email": email,
+            "title": quote_request.title,
+            "description": quote_request.description,
+            "requirements": quote_request.requirements,
+            "due_date": quote_request.due_date.strftime("%Y-%m-%d") if quote_request.due_date else None,
+        }
+        for _, name, email, _ in new_vendors
+    ] if data.send_email else []
+    report = {
+        "quote_request_id": quote_request.id,
+        "invited": len(new_vendors),
+        "already_invited": len(vendors) - len(new_vendors),
+        "invited_vendor_ids": [vendor_id for vendor_id, _, _, _ in new_vendors],
+        "not_found": not_found,
+    }
+    return report, emails
@@ -0,0 +1,69 @@
+"""
+Optimistic concurrency control for complaints, assets and quote responses.
+
+Each of these rows carries a version number. It is mapped as the ORM
+version counter, so every ORM update is issued as
+UPDATE ... SET version = version + 1 WHERE id = ? AND version = ? and
+SQLAlchemy raises StaleDataError when another writer got there first. No
+lock is held between reading a row and writing it back.
+
+Clients send the version they last saw, in an If-Match header (the ETag of
+the single-resource responses, e.g. "3") or in a `version` field of the
+request body. A mismatch with the stored version is a VersionConflict; the
+app turns both that and StaleDataError into 409 Conflict, with the current
+version where it is known. Requests without a version keep the old
+last-writer-wins behaviour, except that concurrent writes between the read
+and the write of the same request are still detected.
+"""
+
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+
+
+class VersionConflict(Exception):
+    def __init__(self, resource: str, expected_version: int, current_version: Optional[int]):
+        super().__init__(f"{resource} was modified: version {current_version}, expected {expected_version}")
+        self.resource = resource
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+def parse_if_match(value: Optional[str]) -> Optional[int]:
+    """The version in an If-Match header, e.g. "3" or W/"3"; None for * or no header"""
+    if not value or value.strip() == "*":
+        return None
+    tag = value.split(",")[0].strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a version ETag such as \"3\"")
+
+
+def expected_version(request: Request, body_version: Optional[int] = None) -> Optional[int]:
+    """The version the client expects, from the request body or If-Match"""
+    header_version = parse_if_match(request.headers.get("if-match"))
+    if body_version is not None:
+        try:
+            body_version = int(body_version)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="version must be an integer")
+    if body_version is not None and header_version is not None and body_version != header_version:
+        raise HTTPException(status_code=400, detail="If-Match and version disagree")
+    return body_version if body_version is not None else header_version
+
+
+def check_version(obj, expected: Optional[int], resource: str):
+    if expected is not None and obj.version != expected:
+        raise VersionConflict(resource, expected, obj.version)
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def set_etag(response: Response, obj):
+    if obj is not None:
+        response.headers["ETag"] = etag(obj.version)
@@ -0,0 +1,263 @@
+"""
+ATS work queue with leased claims.
+
+ats_queue holds one row per complaint in the ATS inbox, with its priority
+rank and submission time, and the agent holding it and until when. Rows are
+kept in step with the complaints by session listeners: a complaint entering
+an ATS inbox status gets a row, a priority change updates its rank, and
+leaving the inbox (forwarded, resolved, deleted) removes it, all in the same
+transaction as the complaint change.
+
+Agents claim the next N unclaimed complaints, most urgent and oldest first.
+Unclaimed rows and expired leases both have lease_expires_at in the past,
+so the next items are read in order from the (priority_rank, submitted_at)
+index, skipping only the rows under an active lease. On MySQL the claim
+locks its rows with SELECT ... FOR UPDATE SKIP LOCKED so concurrent agents
+pass each other; elsewhere each row is taken with a conditional UPDATE that
+only succeeds while the row is still free. Leases last
+ATS_CLAIM_LEASE_SECONDS and are renewed by heartbeats; an agent that stops
+sending them loses its claims to the next agent.
+"""
+
+import os
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+import fast_updates
+from models import ATSQueueItem, Complaint
+
+ATS_CLAIM_LEASE_SECONDS = int(os.getenv("ATS_CLAIM_LEASE_SECONDS", "600"))
+MAX_CLAIM_COUNT = 20
+
+# Extra candidates read per claim attempt, for rows taken by concurrent agents
+CLAIM_CANDIDATE_FACTOR = 3
+CLAIM_ATTEMPTS = 3
+
+# lease_expires_at of rows nobody holds
+UNCLAIMED = datetime(1970, 1, 1)
+
+# Complaint statuses of the ATS inbox, i.e. the complaints that are queued
+QUEUED_STATUSES = ["open", "submitted"]
+
+# Complaint columns a queue row depends on
+QUEUE_COLUMNS = {"status", "priority"}
+
+PRIORITY_RANKS = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+DEFAULT_PRIORITY_RANK = len(PRIORITY_RANKS)
+
+
+def priority_rank(priority: Optional[str]) -> int:
+    return PRIORITY_RANKS.get((priority or "").lower(), DEFAULT_PRIORITY_RANK)
+
+
+def _pending_complaints(session: Session) -> set:
+    return session.info.setdefault("ats_queue_complaints", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_queue_changes(session, flush_context):
+    pending = _pending_complaints(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Complaint):
+            continue
+        if obj in session.dirty:
+            state = inspect(obj)
+            if not any(getattr(state.attrs, key).history.added for key in QUEUE_COLUMNS):
+                continue
+        pending.add(obj.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_queue_changes(orm_execute_state):
+    """Bulk complaint updates and deletes bypass the flush; resync their rows."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    statement = orm_execute_state.statement
+    if statement.table.name != Complaint.__tablename__:
+        return
+    if orm_execute_state.is_update and not QUEUE_COLUMNS & set(fast_updates.statement_values(statement)):
+        return
+    complaint_ids = fast_updates.affected_ids(orm_execute_state)
+    if complaint_ids is None:
+        complaint_ids = [row["id"] for row in fast_updates.affected_rows(orm_execute_state)]
+    _pending_complaints(orm_execute_state.session).update(complaint_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _sync_queue(session):
+    session.flush()
+    complaint_ids = session.info.pop("ats_queue_complaints", None)
+    if complaint_ids:
+        sync_complaints(session, complaint_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_queue_changes(session):
+    session.info.pop("ats_queue_complaints", None)
+
+
+def sync_complaints(db: Session, complaint_ids) -> None:
+    """Add, update or remove the queue rows of the given complaints to match them."""
+    complaint_ids = sorted(complaint_ids)
+    rows = db.execute(
+        select(Complaint.id, Complaint.status, Complaint.priority, Complaint.date_submitted)
+        .where(Complaint.id.in_(complaint_ids))
+    ).all()
+    queued = {row.id: row for row in rows if row.status in QUEUED_STATUSES}
+
+    removed = [complaint_id for complaint_id in complaint_ids if complaint_id not in queued]
+    if removed:
+        db.execute(delete(ATSQueueItem).where(ATSQueueItem.complaint_id.in_(removed)))
+
+    for complaint_id, row in queued.items():
+        rank = priority_rank(row.priority)
+        db.execute(
+            insert(ATSQueueItem)
+            .prefix_with("OR IGNORE", dialect="sqlite")
+            .prefix_with("IGNORE", dialect="mysql")
+            .values(
+                complaint_id=complaint_id,
+                priority_rank=rank,
+                submitted_at=row.date_submitted or datetime.utcnow(),
+                lease_expires_at=UNCLAIMED,
+            )
+        )
+        db.execute(
+            update(ATSQueueItem)
+            .where(ATSQueueItem.complaint_id == complaint_id, ATSQueueItem.priority_rank != rank)
+            .values(priority_rank=rank)
+        )
+
+
+def ensure_queue(db: Session) -> None:
+    """Fill the queue from the ATS inbox the first time it is used."""
+    if not inspect(db.get_bind()).has_table(Complaint.__tablename__):
+        # Fresh database: complaints start empty and the listeners fill the queue
+        return
+    if db.query(ATSQueueItem.complaint_id).first() is not None:
+        return
+    complaint_ids = [
+        complaint_id for complaint_id, in
+        db.query(Complaint.id).filter(Complaint.status.in_(QUEUED_STATUSES)).all()
+    ]
+    if complaint_ids:
+        sync_complaints(db, complaint_ids)
+        db.commit()
+
+
+def _next_free(db: Session, now: datetime, limit: int, lock: bool = False) -> List[str]:
+    query = select(ATSQueueItem.complaint_id)\
+        .where(ATSQueueItem.lease_expires_at < now)\
+        .order_by(ATSQueueItem.priority_rank, ATSQueueItem.submitted_at)\
+        .limit(limit)
+    if lock:
+        query = query.with_for_update(skip_locked=True)
+    return [complaint_id for complaint_id, in db.execute(query)]
+
+
+def claim(db: Session, agent_id: str, count: int, lease_seconds: int = ATS_CLAIM_LEASE_SECONDS) -> Tuple[List[str], datetime]:
+    """Claim up to `count` complaints for the agent; returns their ids, in queue order, and the lease expiry."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    claim_values = {"claimed_by": agent_id, "lease_expires_at": expires_at, "heartbeat_at": now}
+
+    if db.get_bind().dialect.name == "mysql":
+        # Rows locked by a concurrent claim are skipped rather than waited on
+        claimed = _next_free(db, now, count, lock=True)
+        if claimed:
+            db.execute(update(ATSQueueItem).where(ATSQueueItem.complaint_id.in_(claimed)).values(**claim_values))
+        db.commit()
+        return claimed, expires_at
+
+    claimed = []
+    for _ in range(CLAIM_ATTEMPTS):
+        candidates = _next_free(db, now, (count - len(claimed)) * CLAIM_CANDIDATE_FACTOR)
+        for complaint_id in candidates:
+            # Only succeeds if no other agent took the row since it was read
+            result = db.execute(
+                update(ATSQueueItem)
+                .where(ATSQueueItem.complaint_id == complaint_id, ATSQueueItem.lease_expires_at < now)
+                .values(**claim_values)
+            )
+            if result.rowcount == 1:
+                claimed.append(complaint_id)
+                if len(claimed) == count:
+                    break
+        if len(claimed) == count or len(candidates) < (count - len(claimed)) * CLAIM_CANDIDATE_FACTOR:
+            break
+    db.commit()
+    return claimed, expires_at
+
+
+def heartbeat(db: Session, agent_id: str, complaint_ids: List[str], lease_seconds: int = ATS_CLAIM_LEASE_SECONDS) -> Tuple[List[str], datetime]:
+    """Extend the agent's live leases; returns the renewed ids and the new expiry."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    held = _held_by(db, agent_id, complaint_ids, now)
+    if held:
+        db.execute(
+            update(ATSQueueItem)
+            .where(ATSQueueItem.complaint_id.in_(held), ATSQueueItem.claimed_by == agent_id)
+            .values(lease_expires_at=expires_at, heartbeat_at=now)
+        )
+    db.commit()
+    return held, expires_at
+
+
+def release(db: Session, agent_id: str, complaint_ids: List[str]) -> List[str]:
+    """Give the agent's claims back to the queue; returns the released ids."""
+    held = _held_by(db, agent_id, complaint_ids, datetime.utcnow())
+    if held:
+        db.execute(
+            update(ATSQueueItem)
+            .where(ATSQueueItem.complaint_id.in_(held), ATSQueueItem.claimed_by == agent_id)
+            .values(claimed_by=None, lease_expires_at=UNCLAIMED, heartbeat_at=None)
+        )
+    db.commit()
+    return held
+
+
+def _held_by(db: Session, agent_id: str, complaint_ids: List[str], now: datetime) -> List[str]:
+    return [
+        complaint_id for complaint_id, in db.execute(
+            select(ATSQueueItem.complaint_id).where(
+                ATSQueueItem.complaint_id.in_(complaint_ids),
+                ATSQueueItem.claimed_by == agent_id,
+                ATSQueueItem.lease_expires_at >= now,
+            )
+        )
+    ]
+
+
+def get_claims(db: Session, agent_id: str) -> List[ATSQueueItem]:
+    """The agent's live claims, in queue order"""
+    return db.query(ATSQueueItem)\
+        .filter(ATSQueueItem.claimed_by == agent_id, ATSQueueItem.lease_expires_at >= datetime.utcnow())\
+        .order_by(ATSQueueItem.priority_rank, ATSQueueItem.submitted_at)\
+        .all()
+
+
+def claimed_by_others(db: Session, complaint_ids: List[str], agent_id: str) -> set:
+    """Ids of the given complaints under a live claim of another agent"""
+    return {
+        complaint_id for complaint_id, in db.query(ATSQueueItem.complaint_id).filter(
+            ATSQueueItem.complaint_id.in_(complaint_ids),
+            ATSQueueItem.claimed_by.isnot(None),
+            ATSQueueItem.claimed_by != agent_id,
+            ATSQueueItem.lease_expires_at >= datetime.utcnow(),
+        )
+    }
+
+
+def check_not_claimed_by_other(db: Session, complaint_id: str, agent_id: str) -> None:
+    """Raise 409 if another agent holds a live claim on the complaint."""
+    if claimed_by_others(db, [complaint_id], agent_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Complaint is claimed by another ATS agent"
+        )